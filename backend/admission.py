@@ -0,0 +1,178 @@
+"""
+Admission Control for TrendFall AI
+Keeps latency bounded under overload by shedding work early instead of letting
+every request pile into the threadpool and time out together.
+
+- AdmissionController: per-worker concurrency cap with a bounded, prioritized wait
+  queue per lane (e.g. interactive users ahead of watchlist refreshes). A full lane
+  is rejected at once with 429; a request that waits too long for a slot gets 503.
+  Both carry a Retry-After estimate.
+- StageLimiter: concurrency limits per stage class inside the pipeline
+  ("io" = external API calls, "cpu" = features / scoring / SHAP).
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+
+class Lane(NamedTuple):
+    name: str
+    priority: int     # lower is served first
+    max_queue: int    # waiting requests allowed before 429
+    max_wait: float   # seconds a request may wait for a slot before 503
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Event-loop side admission (async endpoints only): a freed slot is handed
+    directly to the highest-priority waiter, so queued requests are never overtaken.
+    """
+
+    def __init__(self, max_concurrent: int, lanes: Iterable[Lane], default_lane: str = "interactive"):
+        self.max_concurrent = max_concurrent
+        self._lanes = {lane.name: lane for lane in lanes}
+        self.default_lane = default_lane
+        self._in_flight = 0
+        self._waiters: List[Any] = []  # heap of (priority, seq, lane name, future)
+        self._queued = {name: 0 for name in self._lanes}
+        self._seq = itertools.count()
+        self._service_time = 1.0  # EWMA of admitted request duration (seconds)
+        self.admitted = 0
+        self.rejected = {429: 0, 503: 0}
+
+    def lane(self, name: Optional[str]) -> Lane:
+        return self._lanes.get(name or self.default_lane) or self._lanes[self.default_lane]
+
+    @asynccontextmanager
+    async def admit(self, lane_name: Optional[str] = None):
+        """Hold one slot for the duration of the block, or raise AdmissionRejected."""
+        lane = self.lane(lane_name)
+        await self._acquire(lane)
+        start = time.perf_counter()
+        try:
+            yield lane
+        finally:
+            self._release(time.perf_counter() - start)
+
+    async def _acquire(self, lane: Lane):
+        if self._in_flight < self.max_concurrent:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if self._queued[lane.name] >= lane.max_queue:
+            raise self._reject(429, f"'{lane.name}' queue is full")
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane.priority, next(self._seq), lane.name, fut))
+        self._queued[lane.name] += 1
+        try:
+            done, _ = await asyncio.wait({fut}, timeout=lane.max_wait)
+        except BaseException:
+            # Client went away while queued: give back a slot we were already handed
+            if fut.done() and not fut.cancelled():
+                self._release(None)
+            else:
+                fut.cancel()
+                self._queued[lane.name] -= 1
+            raise
+        if not done:
+            fut.cancel()
+            self._queued[lane.name] -= 1
+            raise self._reject(503, f"no capacity within {lane.max_wait:g}s")
+        self.admitted += 1
+
+    def _release(self, duration: Optional[float]):
+        if duration is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * duration
+        while self._waiters:
+            _, _, lane_name, fut = heapq.heappop(self._waiters)
+            if fut.cancelled():
+                continue
+            # Hand the slot over: in-flight count is unchanged
+            self._queued[lane_name] -= 1
+            fut.set_result(None)
+            return
+        self._in_flight -= 1
+
+    def utilization(self) -> float:
+        """(in-flight + queued) / capacity: 1.0 means every slot is busy, above 1.0 requests are queueing."""
+        return (self._in_flight + sum(self._queued.values())) / max(self.max_concurrent, 1)
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to be admitted (queue drain estimate)."""
+        queued = sum(self._queued.values())
+        estimate = self._service_time * (queued + 1) / max(self.max_concurrent, 1)
+        return int(min(max(math.ceil(estimate), 1), 60))
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        self.rejected[status_code] += 1
+        return AdmissionRejected(status_code, f"Server busy: {reason}", self.retry_after())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._in_flight,
+            "utilization": round(self.utilization(), 3),
+            "queued": dict(self._queued),
+            "lanes": {name: lane._asdict() for name, lane in self._lanes.items()},
+            "service_time_ewma": round(self._service_time, 3),
+            "admitted": self.admitted,
+            "rejected": {str(code): n for code, n in self.rejected.items()},
+        }
+
+
+class StageLimiter:
+    """Thread-side concurrency limits per stage class; waiting longer than `timeout` raises 503."""
+
+    def __init__(self, limits: Dict[str, int], timeout: float = 10.0):
+        self.limits = dict(limits)
+        self.timeout = timeout
+        self._semaphores = {name: threading.BoundedSemaphore(n) for name, n in limits.items()}
+
+    @contextmanager
+    def limit(self, stage_class: str):
+        semaphore = self._semaphores.get(stage_class)
+        if semaphore is None:
+            yield
+            return
+        if not semaphore.acquire(timeout=self.timeout):
+            raise AdmissionRejected(503, f"Server busy: '{stage_class}' stage saturated", 1)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+# Global instances (per worker process)
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "16")),
+    lanes=[
+        Lane("interactive", 0, int(os.getenv("ADMISSION_INTERACTIVE_QUEUE", "32")),
+             float(os.getenv("ADMISSION_INTERACTIVE_WAIT", "10"))),
+        Lane("watchlist", 1, int(os.getenv("ADMISSION_WATCHLIST_QUEUE", "8")),
+             float(os.getenv("ADMISSION_WATCHLIST_WAIT", "5"))),
+    ],
+)
+
+stage_limiter = StageLimiter(
+    {
+        "io": int(os.getenv("ADMISSION_IO_LIMIT", "8")),
+        "cpu": int(os.getenv("ADMISSION_CPU_LIMIT", str(os.cpu_count() or 4))),
+    },
+    timeout=float(os.getenv("ADMISSION_STAGE_WAIT", "10")),
+)
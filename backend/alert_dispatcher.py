@@ -0,0 +1,323 @@
+"""
+Alert Dispatcher for TrendFall AI
+Pushes trend alerts to webhooks so nobody has to poll the UI:
+
+- lifecycle_change: a monitored trend's lifecycle_stage changed (e.g. Peak -> Decay)
+- cringe_point:     the cringe flag switched on (or off)
+- early_decline:    a change point from the ChangeMonitor
+
+Delivery runs on the dispatcher's own event loop thread. emit() only hands the
+event over (never blocks the analysis path; a full queue drops and counts).
+Per endpoint, events are batched (ALERT_BATCH_SIZE or ALERT_BATCH_WINDOW seconds),
+at most ALERT_ENDPOINT_CONCURRENCY batches are in flight (each endpoint has its own
+POST threads, each thread its own requests.Session), and failed deliveries
+(connection errors, 408/429/5xx) are retried with exponential backoff, honouring
+Retry-After up to ALERT_MAX_BACKOFF seconds. Identical alerts within
+ALERT_DEDUPE_SECONDS are sent once per endpoint; an alert dropped on a full queue
+does not count, so it goes out when it is raised again.
+
+Try it against the local sink: python alert_sink.py --port 8099, then
+ALERT_WEBHOOKS=http://127.0.0.1:8099/alerts
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+RETRYABLE_STATUS = {408, 429}
+
+
+class LifecycleWatcher:
+    """Last lifecycle stage / cringe flag per trend; observe() returns the transitions."""
+
+    def __init__(self, max_trends: int = 10_000):
+        self.max_trends = max_trends
+        self._state: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, trend_key: str, lifecycle_stage: str, is_cringe_point: bool) -> List[Dict[str, Any]]:
+        with self._lock:
+            previous = self._state.get(trend_key)
+            self._state[trend_key] = (lifecycle_stage, is_cringe_point)
+            self._state.move_to_end(trend_key)
+            if len(self._state) > self.max_trends:
+                self._state.popitem(last=False)
+        if previous is None:
+            return []
+        events = []
+        if previous[0] != lifecycle_stage:
+            events.append({"type": "lifecycle_change", "from": previous[0], "to": lifecycle_stage})
+        if previous[1] != is_cringe_point:
+            events.append({"type": "cringe_point", "from": previous[1], "to": is_cringe_point})
+        return events
+
+
+class _EndpointStats:
+    __slots__ = ("sent", "batches", "retries", "failed", "dropped", "in_flight", "pending")
+
+    def __init__(self):
+        self.sent = self.batches = self.retries = self.failed = self.dropped = self.in_flight = 0
+        self.pending = 0  # accepted and not yet delivered or given up on
+
+
+class AlertDispatcher:
+    def __init__(
+        self,
+        endpoints: List[str],
+        batch_size: int = 50,
+        batch_window: float = 1.0,
+        concurrency: int = 2,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 5.0,
+        dedupe_seconds: float = 600.0,
+        max_queue: int = 10_000
+    ):
+        self.endpoints = list(endpoints)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.dedupe_seconds = dedupe_seconds
+        self.max_queue = max_queue
+        self.watcher = LifecycleWatcher()
+        self.stats = {url: _EndpointStats() for url in self.endpoints}
+        self.deduped = 0
+        self._recent: Dict[tuple, float] = {}  # (endpoint, dedupe key) -> expiry
+        self._dedupe_lock = threading.Lock()  # also guards the pending counters
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._local = threading.local()  # requests.Session per POST thread
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    # --- Producers (any thread, never block) ---
+
+    def observe(self, trend_key: str, trend_name: str, lifecycle_stage: str, is_cringe_point: bool,
+                risk_score: float) -> List[Dict[str, Any]]:
+        """Record a trend's latest stage / cringe flag and emit an alert for each transition."""
+        events = self.watcher.observe(trend_key, lifecycle_stage, is_cringe_point)
+        for event in events:
+            event.update(trend=trend_key, trend_name=trend_name, risk_score=round(float(risk_score), 2))
+            self.emit(event)
+        return events
+
+    def notify_change_point(self, alert: Dict[str, Any]):
+        """ChangeMonitor listener."""
+        event = {"type": "early_decline", "to": alert["series"]}
+        event.update(alert)
+        self.emit(event)
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        """Queue an alert for every endpoint. Returns False if disabled or a duplicate everywhere."""
+        if not self.enabled:
+            return False
+        key = f"{event['type']}:{event.get('trend')}:{event.get('to')}"
+        targets = self._reserve(key)
+        if not targets:
+            self.deduped += 1
+            return False
+        event = dict(event, id=uuid.uuid4().hex, emitted_at=round(time.time(), 3))
+        self._ensure_started()
+        self._count_pending(1, targets)
+        self._loop.call_soon_threadsafe(self._fan_out, event, key, targets)
+        return True
+
+    def _count_pending(self, delta: int, urls: List[str]):
+        """Accepted-but-unfinished alerts per endpoint (updated from callers and the loop thread)."""
+        with self._dedupe_lock:
+            for url in urls:
+                self.stats[url].pending += delta
+
+    def _reserve(self, key: str) -> List[str]:
+        """Endpoints that have not had `key` within dedupe_seconds; marks it sent to them."""
+        now = time.monotonic()
+        with self._dedupe_lock:
+            targets = [url for url in self.endpoints if self._recent.get((url, key), 0.0) <= now]
+            for url in targets:
+                self._recent[(url, key)] = now + self.dedupe_seconds
+            if len(self._recent) > 10_000:
+                self._recent = {k: expiry for k, expiry in self._recent.items() if expiry > now}
+        return targets
+
+    def _release(self, key: str, url: str):
+        """Forget a reservation whose alert was never queued (it may be raised again)."""
+        with self._dedupe_lock:
+            self._recent.pop((url, key), None)
+
+    # --- Event loop side ---
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            # Blocking POSTs run on per-endpoint threads, one Session each (Session is not thread-safe)
+            for url in self.endpoints:
+                self._executors[url] = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="alert-post",
+                    initializer=self._open_session
+                )
+
+            def run():
+                asyncio.set_event_loop(loop)
+                for url in self.endpoints:
+                    self._queues[url] = asyncio.Queue(maxsize=self.max_queue)
+                    loop.create_task(self._endpoint_worker(url))
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._loop = loop
+            self._thread = threading.Thread(target=run, name="alert-dispatcher", daemon=True)
+            self._thread.start()
+            started.wait()
+
+    def _fan_out(self, event: Dict[str, Any], key: str, targets: List[str]):
+        for url in targets:
+            try:
+                self._queues[url].put_nowait(event)
+            except asyncio.QueueFull:
+                self.stats[url].dropped += 1
+                self._count_pending(-1, [url])
+                self._release(key, url)
+
+    async def _endpoint_worker(self, url: str):
+        queue = self._queues[url]
+        slots = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await slots.acquire()
+            task = loop.create_task(self._deliver(url, batch))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _deliver(self, url: str, batch: List[Dict[str, Any]]):
+        stats = self.stats[url]
+        stats.in_flight += 1
+        loop = asyncio.get_running_loop()
+        payload = {"batch_id": uuid.uuid4().hex, "sent_at": round(time.time(), 3), "alerts": batch}
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    stats.retries += 1
+                try:
+                    status, retry_after = await loop.run_in_executor(
+                        self._executors[url], self._post, url, payload
+                    )
+                except Exception as e:
+                    status, retry_after = None, None
+                    error = str(e)
+                else:
+                    if 200 <= status < 300:
+                        stats.sent += len(batch)
+                        stats.batches += 1
+                        return
+                    error = f"HTTP {status}"
+                    if status < 500 and status not in RETRYABLE_STATUS:
+                        break  # permanent rejection
+                if attempt < self.max_retries:
+                    # The server's Retry-After is honoured, but never beyond max_backoff
+                    delay = retry_after if retry_after is not None else self.backoff * 2 ** attempt
+                    await asyncio.sleep(min(delay, self.max_backoff) * random.uniform(1.0, 1.25))
+            stats.failed += len(batch)
+            print(f"⚠️ Alert delivery to {url} failed ({len(batch)} alerts): {error}")
+        finally:
+            stats.in_flight -= 1
+            self._count_pending(-len(batch), [url])
+
+    def _open_session(self):
+        import requests
+        self._local.session = requests.Session()
+
+    def _post(self, url: str, payload: Dict[str, Any]):
+        response = self._local.session.post(
+            url, data=json.dumps(payload, default=str),
+            headers={"Content-Type": "application/json"}, timeout=self.timeout
+        )
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None
+        return response.status_code, retry_after
+
+    # --- Lifecycle / status ---
+
+    def pending(self) -> int:
+        return sum(s.pending for s in self.stats.values())
+
+    def stop(self, timeout: float = 5.0):
+        """Give queued alerts up to `timeout` seconds to go out, then stop the loop."""
+        if self._loop is None or not self._loop.is_running():
+            return
+        deadline = time.monotonic() + timeout
+        while self.pending() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=1.0)
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+
+    async def _shutdown(self):
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+        asyncio.get_running_loop().call_soon(asyncio.get_running_loop().stop)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None,
+            "deduped": self.deduped,
+            "endpoints": {
+                url: {
+                    "queued": self._queues[url].qsize() if url in self._queues else 0,
+                    "pending": s.pending,
+                    "in_flight": s.in_flight,
+                    "sent": s.sent,
+                    "batches": s.batches,
+                    "retries": s.retries,
+                    "failed": s.failed,
+                    "dropped": s.dropped,
+                }
+                for url, s in self.stats.items()
+            },
+        }
+
+
+# Global instance (ALERT_WEBHOOKS: comma-separated URLs; empty disables delivery)
+alert_dispatcher = AlertDispatcher(
+    endpoints=[url.strip() for url in os.getenv("ALERT_WEBHOOKS", "").split(",") if url.strip()],
+    batch_size=int(os.getenv("ALERT_BATCH_SIZE", "50")),
+    batch_window=float(os.getenv("ALERT_BATCH_WINDOW", "1.0")),
+    concurrency=int(os.getenv("ALERT_ENDPOINT_CONCURRENCY", "2")),
+    max_retries=int(os.getenv("ALERT_MAX_RETRIES", "4")),
+    max_backoff=float(os.getenv("ALERT_MAX_BACKOFF", "30")),
+    dedupe_seconds=float(os.getenv("ALERT_DEDUPE_SECONDS", "600")),
+)
@@ -0,0 +1,79 @@
+"""
+Local webhook sink for the alert dispatcher.
+Prints every alert batch it receives; --fail-rate makes it answer 503 at random
+(--fail-first: the first N requests) and --slow adds latency, to exercise retries
+and per-endpoint concurrency.
+
+    python alert_sink.py [--port 8099] [--fail-rate 0.3] [--fail-first 2] [--slow 0.5]
+    ALERT_WEBHOOKS=http://127.0.0.1:8099/alerts uvicorn main:app
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class AlertSink(ThreadingHTTPServer):
+    def __init__(self, address, fail_rate: float = 0.0, slow: float = 0.0, fail_first: int = 0,
+                 retry_after: str = "0.2"):
+        super().__init__(address, _SinkHandler)
+        self.fail_rate = fail_rate
+        self.slow = slow
+        self.fail_first = fail_first
+        self.retry_after = retry_after  # Retry-After header sent with each 503
+        self.requests = 0
+        self.batches = []
+        self.max_concurrent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        with server._lock:
+            server._active += 1
+            server.max_concurrent = max(server.max_concurrent, server._active)
+            server.requests += 1
+            fail = server.requests <= server.fail_first
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if server.slow:
+                time.sleep(server.slow)
+            if fail or random.random() < server.fail_rate:
+                self.send_response(503)
+                self.send_header("Retry-After", server.retry_after)
+                self.end_headers()
+                return
+            batch = json.loads(body)
+            with server._lock:
+                server.batches.append(batch)
+            for alert in batch["alerts"]:
+                print(f"[ALERT] {alert['type']}: {alert.get('trend')} {alert.get('from')} -> {alert.get('to')}")
+            self.send_response(204)
+            self.end_headers()
+        finally:
+            with server._lock:
+                server._active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local webhook sink for TrendFall alerts")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with 503")
+    parser.add_argument("--slow", type=float, default=0.0, help="seconds of latency per request")
+    args = parser.parse_args()
+
+    sink = AlertSink(("127.0.0.1", args.port), args.fail_rate, args.slow, args.fail_first)
+    print(f"Alert sink listening on http://127.0.0.1:{args.port}/alerts")
+    try:
+        sink.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nReceived {sum(len(b['alerts']) for b in sink.batches)} alerts in {len(sink.batches)} batches")
@@ -0,0 +1,43 @@
+import time
+from pydantic import TypeAdapter
+
+from main import AnalysisResponse, fast_analysis_serializer
+from trend_engine import analyze_trend_real
+
+SAMPLE_TOPICS = ["Bitcoin", "#TechReview", "#AIupdates", "https://www.instagram.com/reel/Cxyz123abc/"]
+
+
+def _time_per_call(fn, payloads, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            fn(payload)
+    return (time.perf_counter() - start) / (rounds * len(payloads)) * 1e6
+
+
+def bench_serialization(rounds=2000):
+    print("Building sample responses...")
+    payloads = [analyze_trend_real(topic) for topic in SAMPLE_TOPICS]
+
+    # What FastAPI does with response_model: validate, then dump to JSON bytes
+    adapter = TypeAdapter(AnalysisResponse)
+
+    def pydantic_path(payload):
+        return adapter.dump_json(adapter.validate_python(payload))
+
+    # Byte-for-byte check before timing anything
+    for topic, payload in zip(SAMPLE_TOPICS, payloads):
+        if pydantic_path(payload) != fast_analysis_serializer.dumps(payload):
+            print(f"❌ MISMATCH for '{topic}'")
+            return
+    print(f"✅ Fast path output is byte-identical for {len(payloads)} responses")
+
+    slow_us = _time_per_call(pydantic_path, payloads, rounds)
+    fast_us = _time_per_call(fast_analysis_serializer.dumps, payloads, rounds)
+    print(f"response_model (validate + dump): {slow_us:8.1f} µs/response")
+    print(f"fast path (project + orjson):     {fast_us:8.1f} µs/response")
+    print(f"Speedup: {slow_us / fast_us:.1f}x")
+
+
+if __name__ == "__main__":
+    bench_serialization()
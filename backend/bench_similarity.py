@@ -0,0 +1,67 @@
+import sys
+import time
+
+import numpy as np
+
+from feature_schema import feature_schema
+from similarity_index import SimilarityIndex, _feature_scaling
+
+
+def random_features(n, seed=0):
+    """Clustered full-layout feature rows (trends share regimes, so real data is not uniform)."""
+    rng = np.random.default_rng(seed)
+    lo, scale = _feature_scaling()
+    centers = rng.uniform(0, 1, (256, len(feature_schema.model_names)))
+    model = centers[rng.integers(0, len(centers), n)] + rng.normal(0, 0.08, (n, len(feature_schema.model_names)))
+    features = np.zeros((n, len(feature_schema)), dtype=np.float64)
+    features[:, feature_schema.model_index] = lo + np.clip(model, 0, 1) * scale
+    return features
+
+
+def build_index(n, batch=100_000, **kwargs):
+    index = SimilarityIndex(background_training=False, **kwargs)
+    features = random_features(n)
+    risks = np.random.default_rng(1).uniform(0, 100, n)
+    for start in range(0, n, batch):
+        stop = min(start + batch, n)
+        index.add([f"r{i}" for i in range(start, stop)], features[start:stop], risks=risks[start:stop])
+    return index
+
+
+def measure(index, queries, k=10):
+    """(p50 ms, p99 ms, exact p50 ms, recall@k) over embedded query vectors."""
+    ivf_ms, exact_ms, recall = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        approx = index.search(query, k)
+        ivf_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        exact = index.search(query, k, exact=True)
+        exact_ms.append((time.perf_counter() - start) * 1000)
+        recall.append(len({n["id"] for n in approx} & {n["id"] for n in exact}) / k)
+    return (float(np.percentile(ivf_ms, 50)), float(np.percentile(ivf_ms, 99)),
+            float(np.percentile(exact_ms, 50)), float(np.mean(recall)))
+
+
+def bench_similarity(n=1_000_000, n_queries=200):
+    print(f"Building an index of {n:,} vectors...")
+    start = time.perf_counter()
+    index = build_index(n)
+    print(f"Built in {time.perf_counter() - start:.1f}s: {index.stats()}")
+
+    queries = index.embed_matrix(random_features(n_queries, seed=7))
+    p50, p99, exact_p50, recall = measure(index, queries)
+    print(f"IVF search:   p50 {p50:6.2f} ms, p99 {p99:6.2f} ms (nprobe {index.nprobe})")
+    print(f"Exact search: p50 {exact_p50:6.2f} ms")
+    print(f"recall@10 vs exact: {recall:.3f}")
+
+    # Inserts keep landing in their IVF list (no retrain until the index grows 4x)
+    inserts = random_features(1000, seed=100)
+    start = time.perf_counter()
+    for i, row in enumerate(inserts):
+        index.add_one(f"new{i}", feature_schema.to_dict(row))
+    print(f"Incremental insert: {(time.perf_counter() - start):.3f} ms/insert")
+
+
+if __name__ == "__main__":
+    bench_similarity(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
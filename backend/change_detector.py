@@ -0,0 +1,170 @@
+"""
+Change-Point Detection for TrendFall AI
+Online early-decline detection over each monitored trend's sentiment, engagement
+and risk series, so an exit can be flagged as soon as a decline begins instead of
+waiting for static thresholds (USPEngine.detect_cringe_point).
+
+Each series runs a one-sided CUSUM on standardized values:
+- the baseline mean / spread is learned from the first `min_samples` points, then
+  tracked with a slow EWMA until an alert
+- S = max(0, S + z - k) accumulates deviation in the decline direction
+  (down for sentiment / engagement, up for risk); S > h raises an alert
+- the last time S was 0 estimates when the decline started
+- after an alert the baseline is re-learned, so one regime change alerts once
+
+Every update is O(1) per series; histories are never re-scanned.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class SeriesSpec(NamedTuple):
+    name: str
+    direction: int   # +1: an increase is a decline (risk), -1: a decrease is (sentiment)
+    min_sd: float    # spread floor, so a flat baseline doesn't alert on noise
+
+
+class Cusum:
+    __slots__ = ("spec", "k", "h", "min_samples", "alpha", "n", "mean", "m2", "score", "start_at")
+
+    def __init__(self, spec: SeriesSpec, k: float, h: float, min_samples: int, alpha: float):
+        self.spec, self.k, self.h = spec, k, h
+        self.min_samples, self.alpha = min_samples, alpha
+        self.reset(None)
+
+    def reset(self, at: Optional[float]):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0       # Welford sum of squares while learning, variance after
+        self.score = 0.0
+        self.start_at = at
+
+    @property
+    def sd(self) -> float:
+        return max(math.sqrt(max(self.m2, 0.0)), self.spec.min_sd)
+
+    def update(self, x: float, at: float) -> Optional[Dict[str, Any]]:
+        if self.n < self.min_samples:
+            # Learn the baseline (Welford)
+            self.n += 1
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.m2 += delta * (x - self.mean)
+            if self.n == self.min_samples:
+                self.m2 = self.m2 / max(self.n - 1, 1)  # from here on m2 holds the (EWMA) variance
+            return None
+
+        z = self.spec.direction * (x - self.mean) / self.sd
+        if self.score == 0.0:
+            self.start_at = at
+        self.score = max(0.0, self.score + z - self.k)
+        if self.score > self.h:
+            alert = {
+                "series": self.spec.name,
+                "value": round(x, 4),
+                "baseline": round(self.mean, 4),
+                "score": round(self.score, 2),
+                "decline_started_at": self.start_at,
+                "detected_at": at,
+            }
+            self.reset(at)
+            return alert
+        # No alert yet: the baseline follows slow drift (alpha is small next to the CUSUM's reaction time)
+        delta = x - self.mean
+        self.mean += self.alpha * delta
+        self.m2 = (1 - self.alpha) * (self.m2 + self.alpha * delta * delta)
+        return None
+
+
+class ChangeMonitor:
+    """Per-trend CUSUM detectors, a bounded alert log and alert listeners."""
+
+    def __init__(
+        self,
+        series: Iterable[SeriesSpec],
+        k: float = 0.5,
+        h: float = 5.0,
+        min_samples: int = 10,
+        alpha: float = 0.02,
+        max_trends: int = 10_000,
+        max_alerts: int = 1000
+    ):
+        self.series = list(series)
+        self.k, self.h = k, h
+        self.min_samples, self.alpha = min_samples, alpha
+        self.max_trends = max_trends
+        self._trends: "OrderedDict[str, Dict[str, Cusum]]" = OrderedDict()
+        self.alerts: deque = deque(maxlen=max_alerts)
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call `listener(alert)` for every alert raised (e.g. webhook dispatch)."""
+        self._listeners.append(listener)
+
+    def update(self, trend_key: str, observations: Dict[str, float], at: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Feed one observation per series (missing series are skipped). Returns new alerts."""
+        at = time.time() if at is None else at
+        raised = []
+        with self._lock:
+            detectors = self._trends.get(trend_key)
+            if detectors is None:
+                detectors = {
+                    spec.name: Cusum(spec, self.k, self.h, self.min_samples, self.alpha)
+                    for spec in self.series
+                }
+                self._trends[trend_key] = detectors
+                if len(self._trends) > self.max_trends:
+                    self._trends.popitem(last=False)
+            else:
+                self._trends.move_to_end(trend_key)
+            for name, value in observations.items():
+                detector = detectors.get(name)
+                if detector is None or value is None:
+                    continue
+                alert = detector.update(float(value), at)
+                if alert is not None:
+                    alert["trend"] = trend_key
+                    self.alerts.append(alert)
+                    raised.append(alert)
+        for alert in raised:
+            print(f"🚨 Early decline: '{trend_key}' {alert['series']} shifted "
+                  f"({alert['baseline']} -> {alert['value']})")
+            for listener in self._listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    print(f"⚠️ Alert listener failed: {e}")
+        return raised
+
+    def recent(self, limit: int = 50, trend_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        alerts = [a for a in self.alerts if trend_key is None or a["trend"] == trend_key]
+        return alerts[-limit:][::-1]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "trends": len(self._trends),
+            "series": [spec._asdict() for spec in self.series],
+            "k": self.k,
+            "h": self.h,
+            "min_samples": self.min_samples,
+            "alerts": len(self.alerts),
+        }
+
+
+# Global instance: every analysed trend is a point on its series
+change_monitor = ChangeMonitor(
+    series=[
+        SeriesSpec("sentiment", -1, 0.05),
+        SeriesSpec("engagement", -1, 0.05),
+        SeriesSpec("risk", 1, 2.0),
+    ],
+    k=float(os.getenv("CHANGE_CUSUM_K", "0.5")),
+    h=float(os.getenv("CHANGE_CUSUM_H", "5")),
+    min_samples=int(os.getenv("CHANGE_MIN_SAMPLES", "10")),
+)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules import each other by bare name (the server runs from backend/)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Manual scripts that call live APIs at import time, not pytest tests
+collect_ignore = ["test_engine.py", "test_gemini_key.py"]
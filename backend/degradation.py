@@ -0,0 +1,120 @@
+"""
+Degradation Policy for TrendFall AI
+Steps expensive pipeline stages down to cheaper tiers as load or latency rises,
+so admitted requests keep meeting the latency SLO during spikes:
+
+- xai:   shap -> linear -> rule-based
+- genai: gemini -> cached -> template
+
+The tier level for a stage is the higher of:
+- load level: how many DEGRADE_LOAD_THRESHOLDS the worker's admission utilization
+  has crossed ((in-flight + queued) / capacity)
+- latency level: 1 when the full tier's EWMA latency exceeds the stage budget,
+  2 when it exceeds twice the budget
+
+Only the full tier's latency is tracked. A measurement older than
+DEGRADE_RECOVERY_SECONDS is ignored, so the next request probes the full tier again.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from admission import admission
+
+
+class StagePolicy(NamedTuple):
+    name: str
+    tiers: Tuple[str, ...]   # most to least expensive
+    budget_ms: float         # full-tier latency budget
+
+
+class DegradationPolicy:
+    def __init__(
+        self,
+        stages: Iterable[StagePolicy],
+        load_fn: Callable[[], float],
+        load_thresholds: Tuple[float, ...] = (0.75, 1.0),
+        recovery_seconds: float = 30.0,
+        enabled: bool = True
+    ):
+        self._stages = {stage.name: stage for stage in stages}
+        self._load_fn = load_fn
+        self.load_thresholds = tuple(sorted(load_thresholds))
+        self.recovery_seconds = recovery_seconds
+        self.enabled = enabled
+        self._latency: Dict[str, Tuple[float, float]] = {}  # stage -> (EWMA ms, measured at)
+        self._lock = threading.Lock()
+
+    def full_tiers(self) -> Dict[str, str]:
+        return {name: stage.tiers[0] for name, stage in self._stages.items()}
+
+    def select(self) -> Dict[str, str]:
+        """Tier per stage for one request."""
+        if not self.enabled:
+            return self.full_tiers()
+        load = self._load_fn()
+        load_level = sum(load >= t for t in self.load_thresholds)
+        tiers = {}
+        for name, stage in self._stages.items():
+            level = max(load_level, self._latency_level(stage))
+            tiers[name] = stage.tiers[min(level, len(stage.tiers) - 1)]
+        return tiers
+
+    def record(self, stage_name: str, tier: str, elapsed_ms: float):
+        """Feed back a stage latency (only full-tier runs drive the latency level)."""
+        stage = self._stages.get(stage_name)
+        if stage is None or tier != stage.tiers[0]:
+            return
+        now = time.monotonic()
+        with self._lock:
+            previous = self._latency.get(stage_name)
+            if previous is None or now - previous[1] > self.recovery_seconds:
+                ewma = elapsed_ms
+            else:
+                ewma = 0.7 * previous[0] + 0.3 * elapsed_ms
+            self._latency[stage_name] = (ewma, now)
+
+    def _latency_level(self, stage: StagePolicy) -> int:
+        measured = self._latency.get(stage.name)
+        if measured is None or time.monotonic() - measured[1] > self.recovery_seconds:
+            return 0
+        ewma = measured[0]
+        if ewma > 2 * stage.budget_ms:
+            return 2
+        return 1 if ewma > stage.budget_ms else 0
+
+    def status(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "load": round(self._load_fn(), 3),
+            "load_thresholds": list(self.load_thresholds),
+            "tiers": self.select(),
+            "latency_ms": {
+                name: {"ewma": round(ewma, 1), "age_seconds": round(now - at, 1)}
+                for name, (ewma, at) in self._latency.items()
+            },
+        }
+
+
+def _parse_thresholds(spec: Optional[str]) -> Tuple[float, ...]:
+    try:
+        return tuple(float(v) for v in spec.split(",") if v.strip())
+    except (AttributeError, ValueError):
+        print(f"[WARN] Ignoring invalid DEGRADE_LOAD_THRESHOLDS '{spec}'")
+        return (0.75, 1.0)
+
+
+# Global instance (DEGRADATION=off pins every stage to its full tier)
+degradation = DegradationPolicy(
+    stages=[
+        StagePolicy("xai", ("shap", "linear", "rule-based"), float(os.getenv("DEGRADE_XAI_BUDGET_MS", "500"))),
+        StagePolicy("genai", ("gemini", "cached", "template"), float(os.getenv("DEGRADE_GENAI_BUDGET_MS", "2500"))),
+    ],
+    load_fn=admission.utilization,
+    load_thresholds=_parse_thresholds(os.getenv("DEGRADE_LOAD_THRESHOLDS", "0.75,1.0")),
+    recovery_seconds=float(os.getenv("DEGRADE_RECOVERY_SECONDS", "30")),
+    enabled=os.getenv("DEGRADATION", "auto") != "off",
+)
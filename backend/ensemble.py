@@ -0,0 +1,161 @@
+"""
+Ensemble Engine for TrendFall AI
+Registry of risk scorers that all consume the same feature matrix
+(n, len(feature_schema)) and are evaluated in one batched pass.
+
+Adding a model is one register() call, e.g. a gradient-boosted classifier:
+
+    ensemble.register(
+        "gbm",
+        lambda X: gbm.predict_proba(X[:, feature_schema.model_index])[:, 1] * 100,
+        weight=0.3,
+        parallel=True,  # heavy model: runs on the thread pool alongside the others
+    )
+"""
+
+import os
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from feature_schema import SignalVector, feature_schema
+from ml_model import ml_classifier
+from prediction_model import model as decline_model
+
+
+class Scorer(NamedTuple):
+    name: str
+    score_fn: Callable[[np.ndarray], np.ndarray]  # (n, F) feature matrix -> (n,) risk 0-100
+    weight: float
+    parallel: bool
+
+
+class EnsembleEngine:
+    """
+    Weighted (or stacked) combination of registered scorers.
+    Light scorers run inline; scorers registered with parallel=True run concurrently
+    on a shared thread pool (NumPy/sklearn release the GIL for the heavy lifting).
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._scorers: List[Scorer] = []
+        self._stacker: Optional[Callable[[np.ndarray], np.ndarray]] = None
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, score_fn, weight: float = 1.0, parallel: bool = False):
+        """Add (or replace) a scorer."""
+        with self._lock:
+            scorers = [s for s in self._scorers if s.name != name]
+            scorers.append(Scorer(name, score_fn, float(weight), parallel))
+            self._scorers = scorers
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._scorers = [s for s in self._scorers if s.name != name]
+
+    def configure(self, weights: Optional[Dict[str, float]] = None, stacker=None):
+        """
+        Update scorer weights and/or set a stacker: a callable mapping the
+        (n, k) matrix of component scores (registration order) to (n,) risk.
+        """
+        with self._lock:
+            if weights:
+                self._scorers = [
+                    s._replace(weight=float(weights.get(s.name, s.weight))) for s in self._scorers
+                ]
+            if stacker is not None:
+                self._stacker = stacker
+
+    @property
+    def scorer_names(self) -> List[str]:
+        return [s.name for s in self._scorers]
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return {s.name: s.weight for s in self._scorers}
+
+    def score(self, signals, overrides: Optional[Dict[str, Callable]] = None) -> Dict[str, object]:
+        """Score a single signal vector/dict. Returns the combined risk and each component."""
+        features = feature_schema.to_array(signals).reshape(1, -1)
+        result = self.score_batch(features, overrides)
+        return {
+            "risk_score": float(result["risk_score"][0]),
+            "components": {name: float(v[0]) for name, v in result["components"].items()}
+        }
+
+    def score_batch(self, features, overrides: Optional[Dict[str, Callable]] = None) -> Dict[str, object]:
+        """
+        Score an (n, len(feature_schema)) matrix (or a list of SignalVectors) in one pass.
+        `overrides` swaps a scorer's function for this call only (e.g. a pinned model version).
+        Returns {"risk_score": (n,), "components": {name: (n,)}}; scores are rounded to 2 dp.
+        """
+        if isinstance(features, list):
+            features = SignalVector.stack(features)
+        scorers = self._scorers
+        if not scorers:
+            raise RuntimeError("Ensemble has no registered scorers.")
+
+        overrides = overrides or {}
+        components: Dict[str, np.ndarray] = {}
+        futures = {}
+        for scorer in scorers:
+            if scorer.parallel:
+                score_fn = overrides.get(scorer.name, scorer.score_fn)
+                futures[scorer.name] = self._get_executor().submit(score_fn, features)
+        for scorer in scorers:
+            if not scorer.parallel:
+                score_fn = overrides.get(scorer.name, scorer.score_fn)
+                components[scorer.name] = np.asarray(score_fn(features), dtype=np.float64)
+        for name, future in futures.items():
+            components[name] = np.asarray(future.result(), dtype=np.float64)
+
+        if self._stacker is not None:
+            stacked = np.column_stack([components[s.name] for s in scorers])
+            combined = np.asarray(self._stacker(stacked), dtype=np.float64)
+        else:
+            combined = np.zeros(features.shape[0])
+            total_weight = 0.0
+            for scorer in scorers:
+                combined += components[scorer.name] * scorer.weight
+                total_weight += scorer.weight
+            if total_weight and total_weight != 1.0:
+                combined /= total_weight
+
+        return {
+            "risk_score": np.round(np.clip(combined, 0, 100), 2),
+            "components": {s.name: components[s.name] for s in scorers}
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._max_workers, thread_name_prefix="ensemble"
+                    )
+        return self._executor
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    """ENSEMBLE_WEIGHTS="ml_proxy=0.4,business_logic=0.6" -> dict"""
+    weights = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            try:
+                weights[name.strip()] = float(value)
+            except ValueError:
+                print(f"[WARN] Ignoring invalid ensemble weight '{item}'")
+    return weights
+
+
+# Global instance
+ensemble = EnsembleEngine()
+
+# Model A: Proxy Logistic Regression / Model B: Weighted Business Logic Model
+ensemble.register("ml_proxy", ml_classifier.score_batch, weight=0.4)
+ensemble.register("business_logic", decline_model.score_batch, weight=0.6)
+ensemble.configure(weights=_parse_weights(os.getenv("ENSEMBLE_WEIGHTS", "")))
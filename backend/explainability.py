@@ -3,9 +3,29 @@ Enhanced Explainability Layer with SHAP Integration
 Provides both mathematical (SHAP) and business (rule-based) explanations.
 """
 
-import shap
+import threading
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from feature_schema import feature_schema
+
+
+class SerializedExplainer:
+    """
+    KernelExplainer is not thread-safe: shap_values() reuses per-explainer sample
+    buffers, so concurrent calls corrupt each other ("index N is out of bounds").
+    Wraps one explainer so its calls run one at a time.
+    """
+
+    def __init__(self, explainer):
+        self._explainer = explainer
+        self._lock = threading.Lock()
+
+    def shap_values(self, X, **kwargs):
+        with self._lock:
+            return self._explainer.shap_values(X, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._explainer, name)
 
 
 class ExplainabilityLayer:
@@ -32,92 +52,152 @@ class ExplainabilityLayer:
         
         # SHAP explainer will be initialized when ML model is passed
         self.shap_explainer = None
+        self._explained_model = None
+        # SHAP calls that failed and fell back to rule-based reasons (reported by /models)
+        self.shap_failures = 0
+        self._failure_lock = threading.Lock()
     
+    def build_shap_explainer(self, ml_model):
+        """
+        Build a SHAP explainer for `ml_model` without touching the shared one.
+        Used by the model registry so each model version owns its explainer.
+        """
+        import shap  # heavy (~1s): imported on first explainer build, not at startup
+
+        # Use KernelExplainer for compatibility with sklearn pipelines
+        background_data = _background_sample()
+        
+        # Define prediction function for SHAP (model consumes schema-ordered arrays directly)
+        def predict_fn(X):
+            return ml_model.predict_proba(X)[:, 1]
+        
+        return SerializedExplainer(shap.KernelExplainer(predict_fn, background_data))
+    
+    def build_linear_attributor(self, ml_model):
+        """
+        Cheap attribution for linear models (optionally behind a scaler pipeline):
+        per-feature logit contributions w_i * (z_i - mean background z_i), rescaled to
+        probability units so they sum to f(x) - sigmoid(mean background logit).
+        Exact in log-odds; tracks KernelExplainer closely. Returns None for non-linear models.
+        """
+        steps = getattr(ml_model, "steps", None)
+        classifier = steps[-1][1] if steps else ml_model
+        coef = getattr(classifier, "coef_", None)
+        if coef is None:
+            return None
+
+        if steps and len(steps) > 1:
+            transform = ml_model[:-1].transform
+        else:
+            transform = np.asarray
+        weights = np.asarray(coef, dtype=np.float64).ravel()
+        background_data = _background_sample()
+        z_mean = transform(background_data).mean(axis=0)
+        intercept = float(np.ravel(getattr(classifier, "intercept_", [0.0]))[0])
+        base_value = 1.0 / (1.0 + np.exp(-(float(z_mean @ weights) + intercept)))
+
+        def attribute(X):
+            logits = (transform(X) - z_mean) * weights
+            total = logits.sum(axis=1, keepdims=True)
+            delta = 1.0 / (1.0 + np.exp(-(total + float(z_mean @ weights) + intercept))) - base_value
+            # sigmoid is monotone, so delta/total > 0: directions match the logit contributions
+            scale = np.divide(delta, total, out=np.full_like(total, base_value * (1 - base_value)),
+                              where=np.abs(total) > 1e-12)
+            return logits * scale
+
+        return attribute
+
     def initialize_shap_explainer(self, ml_model):
         """
         Initialize SHAP explainer with the trained ML model.
         Called once when the system starts.
         """
         try:
-            # Use KernelExplainer for compatibility with sklearn pipelines
-            # We'll create a small background dataset for SHAP
-            background_data = np.random.uniform(-1, 1, (100, 11))
-            
-            # Define prediction function for SHAP
-            def predict_fn(X):
-                import pandas as pd
-                feature_order = [
-                    "engagement_velocity", "sentiment_score", "comment_fatigue",
-                    "influencer_ratio", "posting_change", "trend_age",
-                    "engagement_per_view", "interaction_quality", "fatigue_keyword_ratio",
-                    "engagement_decay_rate", "format_repetition_score"
-                ]
-                df = pd.DataFrame(X, columns=feature_order)
-                return ml_model.predict_proba(df)[:, 1]
-            
-            self.shap_explainer = shap.KernelExplainer(predict_fn, background_data)
+            self.shap_explainer = self.build_shap_explainer(ml_model)
+            self._explained_model = ml_model
             print("[OK] SHAP Explainer initialized successfully")
         except Exception as e:
             print(f"[WARN] SHAP initialization failed: {e}. Using rule-based XAI only.")
             self.shap_explainer = None
     
-    def generate_shap_explanation(self, signals: Dict[str, float], ml_model) -> List[Dict[str, Any]]:
+    def generate_shap_explanation(
+        self, 
+        signals: Dict[str, float], 
+        ml_model, 
+        shap_explainer=None
+    ) -> List[Dict[str, Any]]:
         """
         Generate SHAP-based feature attribution.
+        Pass `shap_explainer` to pin a specific (e.g. registry-owned) explainer.
         
         Returns:
             List of drivers with SHAP values (contribution to prediction)
         """
         
-        # Initialize SHAP if not done
-        if self.shap_explainer is None and ml_model is not None:
-            self.initialize_shap_explainer(ml_model)
+        if shap_explainer is None:
+            # Initialize SHAP if not done (or if the model was hot-swapped since)
+            if ml_model is not None and (self.shap_explainer is None or ml_model is not self._explained_model):
+                self.initialize_shap_explainer(ml_model)
+            shap_explainer = self.shap_explainer
         
         # If SHAP is unavailable, return empty (fallback to rule-based)
-        if self.shap_explainer is None:
+        if shap_explainer is None:
             return []
         
         try:
-            # Convert signals dict to numpy array in correct order
-            feature_order = [
-                "engagement_velocity", "sentiment_score", "comment_fatigue",
-                "influencer_ratio", "posting_change", "trend_age",
-                "engagement_per_view", "interaction_quality", "fatigue_keyword_ratio",
-                "engagement_decay_rate", "format_repetition_score"
-            ]
-            signal_array = np.array([[signals.get(f, 0) for f in feature_order]])
+            # Convert signals to the schema-ordered model vector
+            signal_array = feature_schema.to_model_array(signals).reshape(1, -1)
             
             # Compute SHAP values
-            shap_values = self.shap_explainer.shap_values(signal_array)
-            
-            # Convert to business-friendly format
-            drivers = []
-            for idx, feature_name in enumerate(feature_order):
-                contribution = float(shap_values[0][idx])
-                # Only include significant contributors
-                if abs(contribution) > 0.01:
-                    drivers.append({
-                        "feature": feature_name,
-                        "label": self.business_map.get(feature_name, feature_name),
-                        "shap_value": round(contribution, 4),
-                        "contribution": abs(contribution),  # For sorting
-                        "direction": "negative" if contribution > 0 else "positive"  # Positive SHAP = higher risk
-                    })
-            
-            # Sort by absolute contribution
-            drivers.sort(key=lambda x: x["contribution"], reverse=True)
-            
-            return drivers
+            shap_values = shap_explainer.shap_values(signal_array)
+            return self._format_drivers(shap_values[0])
         
         except Exception as e:
-            print(f"⚠️ SHAP computation error: {e}")
+            with self._failure_lock:
+                self.shap_failures += 1
+            print(f"⚠️ SHAP computation error ({self.shap_failures} so far, falling back to rules): {e!r}")
             return []
+
+    def generate_linear_explanation(self, signals: Dict[str, float], linear_attributor) -> List[Dict[str, Any]]:
+        """Degraded-tier attribution from build_linear_attributor (same driver format as SHAP)."""
+        if linear_attributor is None:
+            return []
+        try:
+            signal_array = feature_schema.to_model_array(signals).reshape(1, -1)
+            return self._format_drivers(linear_attributor(signal_array)[0])
+        except Exception as e:
+            print(f"⚠️ Linear attribution error: {e}")
+            return []
+
+    def _format_drivers(self, values) -> List[Dict[str, Any]]:
+        """Convert per-feature attributions (model feature order) to business-friendly drivers."""
+        drivers = []
+        for idx, feature_name in enumerate(feature_schema.model_names):
+            contribution = float(values[idx])
+            # Only include significant contributors
+            if abs(contribution) > 0.01:
+                drivers.append({
+                    "feature": feature_name,
+                    "label": self.business_map.get(feature_name, feature_name),
+                    "shap_value": round(contribution, 4),
+                    "contribution": abs(contribution),  # For sorting
+                    "direction": "negative" if contribution > 0 else "positive"  # Positive SHAP = higher risk
+                })
+        
+        # Sort by absolute contribution
+        drivers.sort(key=lambda x: x["contribution"], reverse=True)
+        
+        return drivers
     
     def generate_decision_justification(
         self, 
         signals: dict, 
         risk_score: float,
-        ml_model=None
+        ml_model=None,
+        shap_explainer=None,
+        tier: str = "shap",
+        linear_attributor=None,
+        comment_terms: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Returns the 'WHY' behind the risk score.
@@ -127,13 +207,22 @@ class ExplainabilityLayer:
             signals: Feature dictionary
             risk_score: ML prediction (0-100)
             ml_model: Optional ML model for SHAP
+            shap_explainer: Optional explainer pinned to ml_model (model registry)
+            tier: "shap" (exact), "linear" (linear_attributor) or "rule-based" (no attribution)
+            linear_attributor: Optional attributor pinned to ml_model (model registry)
+            comment_terms: Optional FeatureEngine.extract_comment_terms result (cited complaints)
         
         Returns:
             Comprehensive explanation with SHAP + business reasoning
         """
         
-        # 1. Try SHAP-based explanation first
-        shap_drivers = self.generate_shap_explanation(signals, ml_model)
+        # 1. Try attribution for the requested tier first
+        if tier == "shap":
+            shap_drivers = self.generate_shap_explanation(signals, ml_model, shap_explainer)
+        elif tier == "linear":
+            shap_drivers = self.generate_linear_explanation(signals, linear_attributor)
+        else:
+            shap_drivers = []
         
         # 2. Generate rule-based reasons (always available as fallback)
         rule_reasons = []
@@ -150,6 +239,11 @@ class ExplainabilityLayer:
         if signals.get("influencer_ratio", 0) < 0.3:
             rule_reasons.append(self.business_map["influencer_ratio"])
         
+        complaint_terms = (comment_terms or {}).get("complaint_terms", [])
+        if complaint_terms:
+            quoted = ", ".join(f'"{t["term"]}"' for t in complaint_terms[:3])
+            rule_reasons.append(f"Audience complaints increasingly mention {quoted}")
+        
         # Fallback if no specific triggers
         if not rule_reasons and risk_score > 50:
             rule_reasons.append("Combined signal degradation detected across multiple metrics")
@@ -174,7 +268,8 @@ class ExplainabilityLayer:
             "recommended_action": action,
             "top_signals": top_signals,
             "shap_drivers": shap_drivers,  # NEW: Include SHAP data
-            "explanation_method": "shap" if shap_drivers else "rule-based"
+            "complaint_terms": complaint_terms,
+            "explanation_method": tier if shap_drivers else "rule-based"
         }
     
     def _recommend_action(self, risk_score: float) -> str:
@@ -216,5 +311,10 @@ class ExplainabilityLayer:
         return summary
 
 
+def _background_sample() -> np.ndarray:
+    """Seeded background data for attribution (identical on every worker)."""
+    return np.random.default_rng(42).uniform(-1, 1, (100, len(feature_schema.model_names)))
+
+
 # Global Instance
 xai_layer = ExplainabilityLayer()
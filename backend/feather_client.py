@@ -1,4 +1,10 @@
+import csv
+import os
+import threading
 import time
+import numpy as np
+from feature_schema import feature_schema
+from shared_cache import shared_cache
 
 class FeatherClient:
     """
@@ -7,11 +13,27 @@ class FeatherClient:
     - Store feature values per request
     - Serve features from Feather to the model
     Feather is the single source of truth for features.
+    Values are kept as one contiguous float64 array per request, laid out by feature_schema,
+    and mirrored to the shared cache tier so any worker can serve any request's features.
     """
     def __init__(self):
         # In a real scenario, this would connect to a remote Feature Store (e.g., Feast, Tecton, or custom Feather service)
         self.feature_registry = {}
         self.feature_values = {}
+        # Optional append-only CSV of every stored vector (input for offline retraining)
+        self.history_path = None
+        self._history_lock = threading.Lock()
+
+    def enable_history(self, path):
+        """Persist every stored feature vector to `path` (CSV: request_id, stored_at, <schema features>)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(["request_id", "stored_at"] + feature_schema.names)
+        self.history_path = path
+        print(f"Feather History: Persisting features to '{path}'")
 
     def register_feature(self, name, description, dtype="float"):
         """Register a feature in the Feather registry"""
@@ -24,32 +46,50 @@ class FeatherClient:
 
     def store_features(self, request_id, features):
         """Store feature values for a specific request ID"""
-        if request_id not in self.feature_values:
-            self.feature_values[request_id] = {}
-        
-        # Only store registered features
-        for k, v in features.items():
-            if k in self.feature_registry:
-                self.feature_values[request_id][k] = v
-        
+        values = feature_schema.to_array(features)
+        self.feature_values[request_id] = values
+        shared_cache.set("features", request_id, values.tobytes())
+        if self.history_path:
+            self._append_history(request_id, values)
         print(f"Feather Storage: Stored {len(features)} features for request '{request_id}'")
 
+    def _append_history(self, request_id, values):
+        row = [request_id, round(time.time(), 3)] + values.tolist()
+        try:
+            with self._history_lock, open(self.history_path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(row)
+        except OSError as e:
+            print(f"⚠️ Feather History write failed: {e}")
+
+    def get_feature_array(self, request_id):
+        """Serve the raw feature array (schema order) for a specific request ID, or None"""
+        values = self.feature_values.get(request_id)
+        if values is None:
+            # Stored by another worker?
+            data = shared_cache.get("features", request_id)
+            if data is not None and len(data) == len(feature_schema.names) * 8:
+                values = np.frombuffer(data, dtype=np.float64)
+        return values
+
     def get_features(self, request_id):
         """Serve features from Feather for a specific request ID"""
-        return self.feature_values.get(request_id, {})
+        values = self.get_feature_array(request_id)
+        if values is None:
+            return {}
+        # Only serve registered features
+        return {
+            name: float(values[feature_schema.index[name]])
+            for name in self.feature_registry
+            if name in feature_schema.index
+        }
 
 # Global instance
 feather = FeatherClient()
 
-# Initialize registry with mandatory features
-feather.register_feature("engagement_velocity", "Rate of change in views/likes over 24h")
-feather.register_feature("engagement_decay_rate", "Rate at which engagement is decreasing")
-feather.register_feature("engagement_per_view", "Ratio of likes+comments to views")
-feather.register_feature("comment_sentiment_score", "Aggregated sentiment from user comments (-1 to 1)")
-feather.register_feature("fatigue_keyword_ratio", "Ratio of comments containing 'boring', 'tired', 'again', etc.")
-feather.register_feature("format_repetition_score", "Estimated reuse of content format/tropes")
-feather.register_feature("trend_age", "Days since the trend/video was published")
-feather.register_feature("time_since_peak", "Estimated time in hours since peak engagement")
-feather.register_feature("viewCount", "Raw view count from source")
-feather.register_feature("likeCount", "Raw like count from source")
-feather.register_feature("interaction_quality", "Aggregated metric for sentiment and interaction depth")
+# Initialize registry with mandatory features from the shared schema
+for spec in feature_schema.specs:
+    if spec.stored:
+        feather.register_feature(spec.name, spec.description, spec.dtype)
+
+if os.getenv("FEATHER_HISTORY_PATH"):
+    feather.enable_history(os.getenv("FEATHER_HISTORY_PATH"))
@@ -1,14 +1,23 @@
-import pandas as pd
-from textblob import TextBlob
+import numpy as np
 from datetime import datetime
+from feature_schema import feature_schema, SignalVector
+from sketches import TermSketch, TOKEN_RE
 
 class FeatureEngine:
     def __init__(self):
         self.fatigue_keywords = ["boring", "tired", "repost", "again", "old", "dying", "dead", "over", "fake", "scripted"]
+        # Words that mark a comment as a complaint for term extraction (fatigue keywords + negative cues)
+        self.complaint_cues = frozenset(self.fatigue_keywords) | frozenset([
+            "hate", "worst", "bad", "cringe", "annoying", "overrated", "stop", "lame", "trash", "ruined",
+            "waste", "unfunny", "sucks", "meh", "stale", "clickbait", "overdone", "enough", "ads", "sponsored"
+        ])
 
-    def compute_signals(self, metadata: dict, comments: list) -> dict:
+    def compute_signals(self, metadata: dict, comments: list, out=None, dynamics=None) -> SignalVector:
         """
         Converts raw YouTube/Trend data into 11 Universal Features for Feature Store (Feather).
+        Pass `out` (a row of a preallocated batch matrix) to write the vector in place.
+        Pass `dynamics` (SnapshotStore.record) to use measured rates instead of the
+        trend_age heuristics for velocity, decay, time since peak and posting change.
         """
         # 1. Parse Basic Inputs
         views = metadata.get("viewCount", 1) or 1
@@ -27,6 +36,7 @@ class FeatureEngine:
         # 4. Compute Sentiment Score (-1 to 1)
         sentiment_score = 0.0
         if comments:
+            from textblob import TextBlob  # heavy (pulls in nltk): imported on first use
             sentiments = [TextBlob(c).sentiment.polarity for c in comments]
             sentiment_score = sum(sentiments) / len(sentiments)
 
@@ -57,29 +67,75 @@ class FeatureEngine:
         posting_change = -0.1 if trend_age > 60 else 0.0
         time_since_peak = min(24.0, trend_age * 0.5)
         
+        # 7b. Measured rates from stat snapshots (video polled at least twice)
+        if dynamics:
+            norm_velocity = dynamics["engagement_velocity"]
+            engagement_decay_rate = dynamics["engagement_decay_rate"]
+            time_since_peak = dynamics["time_since_peak"]
+            posting_change = dynamics["posting_change"]
+        
         # 8. Interaction Quality (Combined Metric)
         interaction_quality = (sentiment_score * 0.5) + (engagement_per_view * 10)
         interaction_quality = min(1.0, max(-1.0, interaction_quality))
 
-        # Return full 11-feature vector for Feather
+        # Return full 11-feature vector for Feather (array-backed, schema order)
+        vector = SignalVector(out if out is not None else np.empty(len(feature_schema), dtype=np.float64))
+        v, idx = vector.values, feature_schema.index
+        v[idx["engagement_velocity"]] = round(norm_velocity, 4)
+        v[idx["sentiment_score"]] = round(sentiment_score, 4)
+        v[idx["comment_fatigue"]] = round((fatigue_keyword_ratio + format_repetition_score)/2, 4)
+        v[idx["influencer_ratio"]] = round(influencer_ratio, 4)
+        v[idx["posting_change"]] = round(posting_change, 4)
+        
+        # New Feather-specific features
+        v[idx["fatigue_keyword_ratio"]] = round(fatigue_keyword_ratio, 4)
+        v[idx["engagement_decay_rate"]] = round(engagement_decay_rate, 4)
+        v[idx["format_repetition_score"]] = round(format_repetition_score, 4)
+        v[idx["trend_age"]] = float(trend_age)
+        v[idx["engagement_per_view"]] = round(engagement_per_view, 6)
+        v[idx["comment_sentiment_score"]] = round(sentiment_score, 4)
+        v[idx["interaction_quality"]] = round(interaction_quality, 4)
+        v[idx["viewCount"]] = views
+        v[idx["likeCount"]] = likes
+        v[idx["time_since_peak"]] = round(time_since_peak, 2)
+        return vector
+
+    def extract_comment_terms(self, comments, k: int = 5, chunk_size: int = 2000) -> dict:
+        """
+        What the audience is saying: top n-grams (1-2 words) across the comment stream and
+        the emerging complaint terms (over-represented in complaint comments, beyond the
+        cue words themselves). `comments` may be any iterable (e.g. a generator over 100k+
+        comments); memory stays bounded by the sketches and one chunk of n-grams.
+        """
+        cues = self.complaint_cues
+        sketch = TermSketch()
+        sketch.update(
+            comments,
+            lambda c: any(t in cues for t in TOKEN_RE.findall(c.lower())),
+            chunk_size=chunk_size
+        )
         return {
-            "engagement_velocity": round(norm_velocity, 4),
-            "sentiment_score": round(sentiment_score, 4),
-            "comment_fatigue": round((fatigue_keyword_ratio + format_repetition_score)/2, 4),
-            "influencer_ratio": round(influencer_ratio, 4),
-            "posting_change": round(posting_change, 4),
-            
-            # New Feather-specific features
-            "fatigue_keyword_ratio": round(fatigue_keyword_ratio, 4),
-            "engagement_decay_rate": round(engagement_decay_rate, 4),
-            "format_repetition_score": round(format_repetition_score, 4),
-            "trend_age": float(trend_age),
-            "engagement_per_view": round(engagement_per_view, 6),
-            "comment_sentiment_score": round(sentiment_score, 4),
-            "interaction_quality": round(interaction_quality, 4),
-            "viewCount": views,
-            "likeCount": likes,
-            "time_since_peak": round(time_since_peak, 2)
+            "comments_scanned": sketch.comments,
+            "complaint_comments": sketch.complaints,
+            "top_terms": sketch.top_terms(k),
+            "complaint_terms": sketch.emerging_complaints(k, exclude=cues),
         }
 
+    def compute_topic_signals(self, videos: list, dynamics: list = None) -> SignalVector:
+        """
+        Topic-level vector for a keyword: per-video signals computed into one matrix,
+        then averaged with log-view weights (large videos count more, without drowning
+        out the rest). Counts stay per-video scale, comparable to single-video analysis.
+        `videos` is [(metadata, comments), ...] as returned by YouTubeClient.fetch_videos;
+        `dynamics` optionally holds each video's snapshot dynamics (or None) in the same order.
+        """
+        matrix = np.empty((len(videos), len(feature_schema)), dtype=np.float64)
+        dynamics = dynamics or [None] * len(videos)
+        for row, (metadata, comments), video_dynamics in zip(matrix, videos, dynamics):
+            self.compute_signals(metadata, comments, out=row, dynamics=video_dynamics)
+        weights = np.log1p(np.maximum(matrix[:, feature_schema.index["viewCount"]], 0.0))
+        if not weights.any():
+            weights = None
+        return SignalVector(np.round(np.average(matrix, axis=0, weights=weights), 6))
+
 ft_engine = FeatureEngine()
\ No newline at end of file
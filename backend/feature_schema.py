@@ -0,0 +1,221 @@
+"""
+Feature Schema Registry for TrendFall AI
+Single source of truth for feature names, order, dtype, ranges and normalization.
+FeatureEngine, the ML model, the XAI layer and Feather all read from this schema,
+so the feature order is defined exactly once.
+"""
+
+import operator
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class FeatureSpec(NamedTuple):
+    name: str
+    description: str
+    dtype: str = "float"
+    value_range: Tuple[float, float] = (-1.0, 1.0)
+    norm_range: Optional[Tuple[float, float]] = None  # None = already on model scale
+    stored: bool = False  # Registered in Feather
+
+
+# Order matters: this is the layout of every full feature array (and of featureBreakdown).
+FEATURE_SPECS: List[FeatureSpec] = [
+    FeatureSpec("engagement_velocity", "Rate of change in views/likes over 24h",
+                value_range=(-1.0, 1.0), stored=True),
+    FeatureSpec("sentiment_score", "Mean comment polarity (-1 to 1)",
+                value_range=(-1.0, 1.0)),
+    FeatureSpec("comment_fatigue", "Blend of fatigue keywords and repeated comments",
+                value_range=(0.0, 1.0)),
+    FeatureSpec("influencer_ratio", "Share of activity driven by creators",
+                value_range=(0.0, 1.0)),
+    FeatureSpec("posting_change", "Change in posting frequency",
+                value_range=(-1.0, 1.0)),
+    FeatureSpec("fatigue_keyword_ratio", "Ratio of comments containing 'boring', 'tired', 'again', etc.",
+                value_range=(0.0, 1.0), stored=True),
+    FeatureSpec("engagement_decay_rate", "Rate at which engagement is decreasing",
+                value_range=(0.0, 1.0), stored=True),
+    FeatureSpec("format_repetition_score", "Estimated reuse of content format/tropes",
+                value_range=(0.0, 1.0), stored=True),
+    FeatureSpec("trend_age", "Days since the trend/video was published",
+                value_range=(0.0, float("inf")), norm_range=(0.0, 30.0), stored=True),
+    FeatureSpec("engagement_per_view", "Ratio of likes+comments to views",
+                value_range=(0.0, 1.0), stored=True),
+    FeatureSpec("comment_sentiment_score", "Aggregated sentiment from user comments (-1 to 1)",
+                value_range=(-1.0, 1.0), norm_range=(-1.0, 1.0), stored=True),
+    FeatureSpec("interaction_quality", "Aggregated metric for sentiment and interaction depth",
+                value_range=(-1.0, 1.0), stored=True),
+    FeatureSpec("viewCount", "Raw view count from source",
+                dtype="int", value_range=(0.0, float("inf")), stored=True),
+    FeatureSpec("likeCount", "Raw like count from source",
+                dtype="int", value_range=(0.0, float("inf")), stored=True),
+    FeatureSpec("time_since_peak", "Estimated time in hours since peak engagement",
+                value_range=(0.0, 24.0), stored=True),
+]
+
+# The 11-feature ML vector, in training order
+MODEL_FEATURES: List[str] = [
+    "engagement_velocity", "sentiment_score", "comment_fatigue",
+    "influencer_ratio", "posting_change", "trend_age",
+    "engagement_per_view", "interaction_quality", "fatigue_keyword_ratio",
+    "engagement_decay_rate", "format_repetition_score"
+]
+
+
+class FeatureSchema:
+    """
+    Owns the feature layout and compiles the dict <-> array vectorizers once.
+    All arrays are contiguous float64 in the order of FEATURE_SPECS (or a subset of it).
+    """
+
+    def __init__(self, specs: List[FeatureSpec], model_features: List[str]):
+        self.specs = list(specs)
+        self.names = [s.name for s in self.specs]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+        self.model_names = list(model_features)
+        self.stored_names = [s.name for s in self.specs if s.stored]
+        self.model_index = np.array([self.index[n] for n in self.model_names], dtype=np.intp)
+        self.stored_index = np.array([self.index[n] for n in self.stored_names], dtype=np.intp)
+
+        # Normalization to 0..1 (identity for features without a norm_range)
+        lo = np.zeros(len(self.specs))
+        scale = np.ones(len(self.specs))
+        self.normalized_mask = np.zeros(len(self.specs), dtype=bool)
+        for i, spec in enumerate(self.specs):
+            if spec.norm_range is not None:
+                lo[i] = spec.norm_range[0]
+                scale[i] = spec.norm_range[1] - spec.norm_range[0]
+                self.normalized_mask[i] = True
+        self._norm_lo = lo
+        self._norm_scale = scale
+
+        # Compiled getters: a single C-level call when every key is present
+        self._all_getter = operator.itemgetter(*self.names)
+        self._model_getter = operator.itemgetter(*self.model_names)
+
+    def __len__(self):
+        return len(self.specs)
+
+    def spec(self, name: str) -> FeatureSpec:
+        return self.specs[self.index[name]]
+
+    def to_array(self, signals: Dict[str, float]) -> np.ndarray:
+        """Full feature dict -> float64 array in schema order (missing keys become 0.0)."""
+        if isinstance(signals, SignalVector):
+            return signals.values
+        return self._vectorize(signals, self._all_getter, self.names)
+
+    def to_model_array(self, signals: Dict[str, float]) -> np.ndarray:
+        """Feature dict -> 11-feature model vector in training order."""
+        if isinstance(signals, SignalVector):
+            return signals.values[self.model_index]
+        return self._vectorize(signals, self._model_getter, self.model_names)
+
+    def to_model_matrix(self, rows: List[Dict[str, float]]) -> np.ndarray:
+        """Stack many feature dicts into an (n, 11) model matrix."""
+        if rows and all(isinstance(row, SignalVector) for row in rows):
+            return SignalVector.stack(rows)[:, self.model_index]
+        matrix = np.empty((len(rows), len(self.model_names)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            matrix[i] = self.to_model_array(row)
+        return matrix
+
+    def to_dict(self, values: np.ndarray, names: Optional[List[str]] = None) -> Dict[str, float]:
+        """Array -> dict. Defaults to the full layout; pass model_names for model vectors."""
+        return dict(zip(names or self.names, values.tolist()))
+
+    def normalize(self, values: np.ndarray) -> np.ndarray:
+        """Scale a full-layout array to the 0..1 model scale using each feature's norm_range."""
+        normalized = (values - self._norm_lo) / self._norm_scale
+        return np.where(self.normalized_mask, np.clip(normalized, 0.0, 1.0), values)
+
+    @staticmethod
+    def _vectorize(signals, getter, names) -> np.ndarray:
+        try:
+            values = getter(signals)
+        except KeyError:
+            values = [signals.get(n, 0.0) for n in names]
+        return np.array(values, dtype=np.float64)
+
+
+# Global instance
+feature_schema = FeatureSchema(FEATURE_SPECS, MODEL_FEATURES)
+
+
+class SignalVector:
+    """
+    Compact signal container backed by one float64 array in feature_schema order.
+    Reads like a read-only dict (get, [], items) so existing layers keep working,
+    and only becomes a real dict when serialized via to_dict().
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Optional[np.ndarray] = None):
+        if values is None:
+            values = np.zeros(len(feature_schema), dtype=np.float64)
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, signals: Dict[str, float]) -> "SignalVector":
+        return cls(feature_schema.to_array(signals).copy())
+
+    @classmethod
+    def rows(cls, matrix: np.ndarray) -> List["SignalVector"]:
+        """Wrap each row of an (n, len(schema)) matrix as a view, without copying."""
+        return [cls(row) for row in matrix]
+
+    @staticmethod
+    def stack(vectors: List["SignalVector"]) -> np.ndarray:
+        """Stack vectors into an (n, len(schema)) matrix (no copy if they are already rows of one)."""
+        if not vectors:
+            return np.empty((0, len(feature_schema)), dtype=np.float64)
+        base = vectors[0].values.base
+        if (base is not None and base.ndim == 2 and base.shape == (len(vectors), len(feature_schema))
+                and base.flags.c_contiguous):
+            start, step = base.ctypes.data, base.strides[0]
+            if all(v.values.ctypes.data == start + i * step for i, v in enumerate(vectors)):
+                return base
+        return np.stack([v.values for v in vectors])
+
+    def model_array(self) -> np.ndarray:
+        return self.values[feature_schema.model_index]
+
+    def to_dict(self) -> Dict[str, float]:
+        return feature_schema.to_dict(self.values)
+
+    # --- Read-only mapping protocol ---
+    def __getitem__(self, name: str) -> float:
+        return float(self.values[feature_schema.index[name]])
+
+    def get(self, name: str, default=None):
+        i = feature_schema.index.get(name)
+        return default if i is None else float(self.values[i])
+
+    def __contains__(self, name) -> bool:
+        return name in feature_schema.index
+
+    def __iter__(self):
+        return iter(feature_schema.names)
+
+    def __len__(self) -> int:
+        return len(feature_schema.names)
+
+    def keys(self):
+        return list(feature_schema.names)
+
+    def items(self):
+        return zip(feature_schema.names, self.values.tolist())
+
+    def __repr__(self):
+        return f"SignalVector({self.to_dict()})"
+
+
+def _named_accessor(i: int):
+    return property(lambda self: float(self.values[i]))
+
+
+# Named accessors, e.g. vector.sentiment_score
+for _i, _name in enumerate(feature_schema.names):
+    setattr(SignalVector, _name, _named_accessor(_i))
@@ -11,8 +11,7 @@ def find_moderate_trend():
     ]
     
     for trend in test_keywords:
-        random.seed(trend)
-        risk = random.randint(20, 95)
+        risk = random.Random(trend).randint(20, 95)
         if 40 <= risk <= 75:
             moderates.append((trend, risk))
             
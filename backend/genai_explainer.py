@@ -4,9 +4,12 @@ Converts XAI outputs into executive-level business explanations using Google Gem
 """
 
 import os
-import google.generativeai as genai
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from tenants import tenant_registry
+from shared_cache import shared_cache
 
 load_dotenv()
 
@@ -17,27 +20,57 @@ class GenAIExplainer:
     Translates technical XAI signals into natural language business insights.
     """
     
-    def __init__(self):
-        self.model = None
-        self.refresh_key()
+    def __init__(self, summary_cache_size: int = 512):
+        self._model = None
+        self._initialized = False
+        self._init_lock = threading.RLock()
+        # Live Gemini summaries, reused by the "cached" degradation tier
+        self._summary_cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._summary_cache_size = summary_cache_size
+        self._cache_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Gemini model, configured on first use (the SDK import is slow)."""
+        if not self._initialized:
+            # Double-checked: concurrent first requests configure the SDK once
+            with self._init_lock:
+                if not self._initialized:
+                    self.refresh_key()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._initialized = True
     
     def refresh_key(self):
         """Reloads the API key and re-initializes the model."""
-        load_dotenv(override=True)
-        api_key = os.getenv("GEMINI_API_KEY")
-        
-        if not api_key or api_key == "your_gemini_api_key_here":
-            print("[WARN] GEMINI_API_KEY not configured. Using fallback text generation.")
-            self.model = None
-        else:
-            try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-1.5-flash')
-                print(f"[OK] Gemini AI (1.5-Flash) initialized with key: {api_key[:5]}...{api_key[-5:]}")
-            except Exception as e:
-                print(f"[WARN] Failed to initialize Gemini: {e}")
+        # The model is published (and _initialized set) only once it is configured
+        with self._init_lock:
+            load_dotenv(override=True)
+            api_key = os.getenv("GEMINI_API_KEY")
+            
+            if not api_key or api_key == "your_gemini_api_key_here":
+                print("[WARN] GEMINI_API_KEY not configured. Using fallback text generation.")
                 self.model = None
+            else:
+                try:
+                    import google.generativeai as genai
+                    genai.configure(api_key=api_key)
+                    self.model = genai.GenerativeModel('gemini-1.5-flash')
+                    print(f"[OK] Gemini AI (1.5-Flash) initialized with key: {api_key[:5]}...{api_key[-5:]}")
+                except Exception as e:
+                    print(f"[WARN] Failed to initialize Gemini: {e}")
+                    self.model = None
     
+    def ping(self):
+        """Model metadata lookup (no generation, no cost): raises if the key or API is unusable."""
+        if self.model is None:
+            raise RuntimeError("GEMINI_API_KEY not configured or model unavailable")
+        import google.generativeai as genai
+        genai.get_model(self.model.model_name, request_options={"timeout": 10})
+
     def generate_executive_summary(
         self, 
         risk_score: float, 
@@ -58,10 +91,62 @@ class GenAIExplainer:
             Natural language explanation
         """
         
+        summary, _ = self.generate_summary_for_tier(risk_score, shap_drivers, lifecycle_stage, is_cringe_point)
+        return summary
+
+    def generate_summary_for_tier(
+        self,
+        risk_score: float,
+        shap_drivers: List[Dict[str, Any]],
+        lifecycle_stage: str,
+        is_cringe_point: bool,
+        tier: str = "gemini"
+    ) -> Tuple[str, str]:
+        """
+        Degradation-aware summary. Tiers, most to least expensive:
+        "gemini" (live call; result cached) -> "cached" (reuse a live summary for the
+        same risk band, stage and drivers; no call) -> "template" (_fallback_summary).
+        Returns (summary, tier actually used).
+        """
+        key = self._summary_key(risk_score, shap_drivers, lifecycle_stage, is_cringe_point)
+
+        if tier == "gemini" and self.model:
+            try:
+                prompt = self._build_prompt(risk_score, shap_drivers, lifecycle_stage, is_cringe_point)
+                tenant_registry.record_api_call("gemini")
+                response = self.model.generate_content(prompt)
+                summary = response.text.strip()
+                self._remember_summary(key, summary)
+                return summary, "gemini"
+            except Exception as e:
+                print(f"⚠️ GenAI Error: {e}. Using fallback.")
+
+        if tier in ("gemini", "cached"):
+            with self._cache_lock:
+                cached = self._summary_cache.get(key)
+                if cached is not None:
+                    self._summary_cache.move_to_end(key)
+            if cached is None:
+                # Another worker may already have paid for this summary
+                cached = shared_cache.get_json("genai_summary", repr(key))
+                if cached is not None:
+                    self._remember_summary(key, cached, share=False)
+            if cached is not None:
+                return cached, "cached"
+
+        return self._fallback_summary(risk_score, shap_drivers, lifecycle_stage, is_cringe_point), "template"
+
+    def _build_prompt(
+        self,
+        risk_score: float,
+        shap_drivers: List[Dict[str, Any]],
+        lifecycle_stage: str,
+        is_cringe_point: bool
+    ) -> str:
         # Prepare context for LLM
         drivers_text = ", ".join([f"{d['label']} (impact: {d['contribution']:.1%})" for d in shap_drivers[:3]])
         
-        prompt = f"""You are an AI analyst for marketing executives. Generate a clear, professional 2-3 sentence summary.
+        return f"""You are an AI analyst for marketing executives. Generate a clear, professional 2-3 sentence summary.
 
 CONTEXT:
 - Trend Decline Risk: {risk_score:.0f}/100
@@ -80,15 +165,24 @@ RULES:
 
 SUMMARY:"""
 
-        if self.model:
-            try:
-                response = self.model.generate_content(prompt)
-                return response.text.strip()
-            except Exception as e:
-                print(f"⚠️ GenAI Error: {e}. Using fallback.")
-                return self._fallback_summary(risk_score, shap_drivers, lifecycle_stage, is_cringe_point)
-        else:
-            return self._fallback_summary(risk_score, shap_drivers, lifecycle_stage, is_cringe_point)
+    @staticmethod
+    def _summary_key(risk_score, shap_drivers, lifecycle_stage, is_cringe_point) -> tuple:
+        # 5-point risk bands: close enough for a degraded-tier summary to stay accurate
+        return (
+            int(risk_score // 5),
+            lifecycle_stage,
+            bool(is_cringe_point),
+            tuple(d["label"] for d in shap_drivers[:3]),
+        )
+
+    def _remember_summary(self, key: tuple, summary: str, share: bool = True):
+        with self._cache_lock:
+            self._summary_cache[key] = summary
+            self._summary_cache.move_to_end(key)
+            while len(self._summary_cache) > self._summary_cache_size:
+                self._summary_cache.popitem(last=False)
+        if share:
+            shared_cache.set_json("genai_summary", repr(key), summary)
     
     def _fallback_summary(
         self, 
@@ -1,11 +1,42 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import os
+from fastapi import FastAPI, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Any, Dict
+import numpy as np
+import time
 from contextlib import asynccontextmanager
 
 # Import the new orchestrator
 from trend_engine import analyze_trend_real
+from response_serializer import FastModelSerializer
+from usp_engine import usp_engine
+from model_registry import model_registry
+from startup import warmup
+from admission import AdmissionRejected, admission
+from degradation import degradation
+from feather_client import feather
+from feature_schema import feature_schema
+from similarity_index import calibrated_risk, neighbor_predicted_risk, similarity_index
+from change_detector import change_monitor
+from alert_dispatcher import alert_dispatcher
+from tenants import tenant_registry
+from simulation_cache import simulation_cache
+from shared_cache import shared_cache
+from profiler import request_profiler
+
+# Opt-in: serialize trusted engine results directly instead of re-validating via response_model
+FAST_RESPONSE = os.getenv("FAST_RESPONSE", "0") == "1"
+# Build the model, SHAP explainer and NLP stack in the background after startup (set 0 to stay lazy)
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+# Finish warm-up inside lifespan before the worker accepts traffic (instead of in the background)
+WARMUP_BLOCKING = os.getenv("WARMUP_BLOCKING", "0") == "1"
+# Shared secret for the control endpoints (X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -14,8 +45,14 @@ async def lifespan(app: FastAPI):
     print("[INFO] TRENDFALL AI: DECISION ENGINE IS ONLINE")
     print("[INFO] Listening for Trend Forensic Requests...")
     print("="*50 + "\n")
+    if STARTUP_WARMUP:
+        if WARMUP_BLOCKING:
+            await asyncio.to_thread(warmup.start, False)
+        else:
+            warmup.start(background=True)
     yield
-    # Shutdown: Clean exit
+    # Shutdown: Clean exit (queued webhook alerts get a few seconds to go out)
+    await asyncio.to_thread(alert_dispatcher.stop)
     print("\n" + "="*50)
     print("[SHUTDOWN] SHUTTING DOWN DECISION ENGINE...")
     print("[INFO] All signals saved. Goodbye.")
@@ -71,22 +108,156 @@ class AnalysisResponse(BaseModel):
     explanation: str
     recommendedAction: str
     confidence: float
+    # Monte Carlo savings bands (p5..p95, mean, std in ₹) around insight's ROI estimate
+    roiDistribution: Optional[Dict[str, float]] = None
     trend: Dict[str, Any]
     insight: InsightObj 
+    modelVersion: Optional[str] = None
+    requestId: Optional[str] = None
+    commentTerms: Optional[Dict[str, Any]] = None
+    alerts: Optional[List[Dict[str, Any]]] = None
+    degradation: Optional[Dict[str, str]] = None
+
+fast_analysis_serializer = FastModelSerializer(AnalysisResponse)
+
+# --- Portfolio Models ---
+class Campaign(BaseModel):
+    campaign_id: str
+    daily_budget: float = Field(ge=0)
+    risk_score: float = Field(ge=0, le=100)
+    decline_window_days: int = Field(ge=0)
+    min_budget: Optional[float] = Field(default=None, ge=0)
+    max_budget: Optional[float] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def _check_bounds(self):
+        if self.min_budget is not None and self.max_budget is not None and self.min_budget > self.max_budget:
+            raise ValueError("min_budget must not exceed max_budget")
+        return self
+
+class PortfolioRequest(BaseModel):
+    campaigns: List[Campaign] = Field(min_length=1)
+    total_budget: Optional[float] = Field(default=None, ge=0)
+    horizon_days: int = Field(default=30, ge=1)
+
+class CampaignPlan(BaseModel):
+    campaign_id: str
+    current_budget: float
+    recommended_budget: float
+    change: float
+    action: str
+
+class PortfolioResponse(BaseModel):
+    total_budget: float
+    unallocated_budget: float
+    expected_waste_before: float
+    expected_waste_after: float
+    expected_saved_value: float
+    horizon_days: int
+    plan: List[CampaignPlan]
+
+
+def _render_analysis(result: dict):
+    """Return the result as-is (validated by response_model) or as pre-serialized JSON bytes."""
+    if FAST_RESPONSE:
+        return Response(content=fast_analysis_serializer.dumps(result), media_type="application/json")
+    return result
+
+def _campaign_action(current, recommended):
+    if recommended <= 0 < current:
+        return "STOP"
+    if recommended > current:
+        return "INCREASE"
+    if recommended < current:
+        return "DECREASE"
+    return "HOLD"
+
+class SimilarRequest(BaseModel):
+    requestId: Optional[str] = None            # a stored analysis (response "requestId")
+    features: Optional[Dict[str, float]] = None  # or raw signals (missing features default to 0)
+    k: int = 10
+    exact: bool = False
+
+class Neighbor(BaseModel):
+    id: str
+    label: Optional[str] = None
+    distance: float
+    riskScore: Optional[float] = None
+    outcome: Optional[int] = None  # recorded outcome: 1 declined, 0 did not
+
+class SimilarResponse(BaseModel):
+    neighbors: List[Neighbor]
+    calibratedRisk: Optional[float] = None         # decline rate of neighbours with recorded outcomes
+    neighborPredictedRisk: Optional[float] = None  # mean of the neighbours' predicted risks
+    indexSize: int
+    tookMs: float
+
+class ModelActivationRequest(BaseModel):
+    version: Optional[str] = None  # None = LATEST
+
+class ModelSplitRequest(BaseModel):
+    version: Optional[str] = None
+    fraction: float = 0.0
 
 # --- Endpoints ---
 
 @app.get("/")
 def health_check():
-    return {"status": "active", "system": "TrendFall AI Decision Engine"}
+    return {"status": "active", "system": "TrendFall AI Decision Engine", "ready": warmup.ready}
+
+@app.get("/healthz")
+def liveness_check():
+    """Liveness: the process is up and serving. Never waits on model warm-up."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readiness_check():
+    """
+    Readiness: 200 once every required warm-up stage has succeeded (model, SHAP, NLP and the
+    pipeline probe at steady-state p50 latency), 503 while the worker is cold or a stage is
+    being retried. Optional stages (A/B split, similarity, API clients) only report their errors.
+    """
+    status = warmup.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
 
 @app.post("/analyze", response_model=AnalysisResponse)
-def analyze_endpoint(request: TrendRequest):
+async def analyze_endpoint(request: TrendRequest, response: Response, x_request_lane: Optional[str] = Header(None),
+                           x_tenant_id: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None),
+                           x_profile: Optional[str] = Header(None), x_admin_token: Optional[str] = Header(None)):
     """
     Main Analysis Endpoint.
     Accepts: {"topic": "YouTube URL or Keyword"}
-    Returns: Full Decision Justification JSON
+    Optional header X-Request-Lane: "interactive" (default) or "watchlist" (lower priority)
+    Optional header X-API-Key: identifies the brand team (quotas, cache namespace, usage metering);
+    without it the request is served as the shared "default" tenant
+    Optional header X-Profile: 1 with X-Admin-Token to profile this analysis (see /profiles; ID in X-Profile-ID)
+    Returns: Full Decision Justification JSON (429/503 with Retry-After when saturated)
     """
+    try:
+        tenant = tenant_registry.resolve(x_tenant_id, x_api_key)
+        profile_id = request_profiler.new_id() if request_profiler.should_profile(x_profile, x_admin_token) else None
+        # Tenant quotas first: a team over its share never takes a global slot or queue place
+        async with tenant_registry.admit(tenant), admission.admit(x_request_lane):
+            result = await run_in_threadpool(_run_analysis, request, tenant, profile_id)
+    except AdmissionRejected as e:
+        print(f"⛔ Request shed ({e.status_code}): {e.reason}")
+        raise HTTPException(status_code=e.status_code, detail=e.reason,
+                            headers={"Retry-After": str(e.retry_after)})
+    if profile_id is not None:
+        # Pre-serialized results bypass the injected response, so tag them directly
+        (result if isinstance(result, Response) else response).headers["X-Profile-ID"] = profile_id
+    return result
+
+def _run_analysis(request: TrendRequest, tenant: str = "default", profile_id: Optional[str] = None):
+    with tenant_registry.activate(tenant):
+        if profile_id is None:
+            return _analyze_for_tenant(request)
+        with request_profiler.profile(profile_id, request.topic, tenant):
+            return _analyze_for_tenant(request)
+
+def _analyze_for_tenant(request: TrendRequest):
     try:
         print(f"📥 Received Request: {request.topic}")
         print("🚀 Invoking trend_engine.analyze_trend_real...")
@@ -96,11 +267,206 @@ def analyze_endpoint(request: TrendRequest):
         if not result:
             raise HTTPException(status_code=404, detail="Analysis failed. No data could be retrieved.")
             
-        return result
+        return _render_analysis(result)
 
+    except AdmissionRejected:
+        raise
     except Exception as e:
         print(f"⚠️ CRITICAL BACKEND ERROR: {e}")
         # In a hackathon, never let the frontend crash. 
         # Trigger the fallback simulation if the real engine crashes.
-        from trend_engine import _get_simulation_fallback
-        return _get_simulation_fallback(request.topic)
\ No newline at end of file
+        from trend_engine import _cached_simulation
+        return _render_analysis(_cached_simulation(request.topic))
+
+@app.post("/portfolio/optimize", response_model=PortfolioResponse)
+def optimize_portfolio_endpoint(request: PortfolioRequest):
+    """
+    Portfolio Spend Reallocation.
+    Accepts: campaigns with daily budgets and predicted risk / decline windows
+    Returns: per-campaign budget plan that maximizes expected saved value under the total budget
+    """
+    campaigns = request.campaigns
+    
+    budget = np.fromiter((c.daily_budget for c in campaigns), dtype=np.float64, count=len(campaigns))
+    risk = np.fromiter((c.risk_score for c in campaigns), dtype=np.float64, count=len(campaigns))
+    days = np.fromiter((c.decline_window_days for c in campaigns), dtype=np.float64, count=len(campaigns))
+    lower = np.fromiter((c.min_budget or 0.0 for c in campaigns), dtype=np.float64, count=len(campaigns))
+    upper = np.fromiter(
+        (c.max_budget if c.max_budget is not None else c.daily_budget * 2 for c in campaigns),
+        dtype=np.float64, count=len(campaigns)
+    )
+    
+    try:
+        result = usp_engine.optimize_portfolio(
+            budget, risk, days,
+            total_budget=request.total_budget,
+            min_budget=lower,
+            max_budget=upper,
+            horizon_days=request.horizon_days
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    allocation = result.pop("allocation").tolist()
+    result.pop("waste_rate")
+    result["plan"] = [
+        {
+            "campaign_id": c.campaign_id,
+            "current_budget": c.daily_budget,
+            "recommended_budget": new_budget,
+            "change": round(new_budget - c.daily_budget, 2),
+            "action": _campaign_action(c.daily_budget, new_budget)
+        }
+        for c, new_budget in zip(campaigns, allocation)
+    ]
+    return result
+
+
+@app.post("/similar", response_model=SimilarResponse)
+def similar_trends_endpoint(request: SimilarRequest):
+    """
+    Trends Like This: k nearest stored trends by signal vector.
+    Accepts: {"requestId": "..."} or {"features": {...}}, optional k / exact
+    Returns: neighbours with their risk and outcome, the distance-weighted decline rate of
+    neighbours with recorded outcomes (calibratedRisk) and of their predicted risks
+    """
+    if not 1 <= request.k <= 1000:
+        raise HTTPException(status_code=422, detail="k must be between 1 and 1000.")
+    if request.requestId is not None:
+        values = feather.get_feature_array(request.requestId)
+        if values is None:
+            raise HTTPException(status_code=404, detail=f"Unknown requestId '{request.requestId}'.")
+    elif request.features is not None:
+        values = feature_schema.to_array({name: request.features.get(name, 0.0) for name in feature_schema.names})
+    else:
+        raise HTTPException(status_code=422, detail="Provide requestId or features.")
+
+    start = time.perf_counter()
+    # One extra neighbour so a stored query can drop itself
+    neighbors = similarity_index.search(similarity_index.embed_matrix(values)[0], request.k + 1, request.exact)
+    neighbors = [n for n in neighbors if n["id"] != request.requestId][:request.k]
+    took_ms = (time.perf_counter() - start) * 1000
+    return {
+        "neighbors": neighbors,
+        "calibratedRisk": calibrated_risk(neighbors),
+        "neighborPredictedRisk": neighbor_predicted_risk(neighbors),
+        "indexSize": len(similarity_index),
+        "tookMs": round(took_ms, 3),
+    }
+
+
+@app.get("/alerts")
+def early_decline_alerts(trend: Optional[str] = None, limit: int = 50):
+    """
+    Recent early-decline alerts (change points in sentiment / engagement / risk), newest first,
+    plus webhook delivery counters (lifecycle / cringe transitions and change points).
+    """
+    return {
+        "alerts": change_monitor.recent(limit, trend),
+        "monitor": change_monitor.status(),
+        "dispatcher": alert_dispatcher.status(),
+    }
+
+
+@app.get("/tenants")
+def tenants_status():
+    """Per-tenant quotas and usage (requests, CPU / wall time, external API calls and quota units)."""
+    status = tenant_registry.status()
+    caches = simulation_cache.namespace_stats()
+    for name, tenant in status["tenants"].items():
+        tenant["cache"] = caches.get(name, {"entries": 0, "bytes": 0})
+    return status
+
+
+@app.get("/cache")
+def cache_status():
+    """Simulation response cache of this worker and the cross-worker shared tier."""
+    return {
+        "simulation": simulation_cache.stats(),
+        "shared": shared_cache.stats(),
+    }
+
+
+def _require_admin(token: Optional[str]):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _require_profile_admin(token: Optional[str]):
+    if not request_profiler.enabled:
+        raise HTTPException(status_code=403,
+                            detail="Profile endpoints are disabled (PROFILE_ADMIN_TOKEN / ADMIN_TOKEN not set)")
+    if not request_profiler.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _profile_or_404(profile_id: str, x_admin_token: Optional[str]) -> Dict[str, Any]:
+    _require_profile_admin(x_admin_token)
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile for '{profile_id}'")
+    return profile
+
+
+@app.get("/profiles")
+def list_profiles(limit: int = Query(20, ge=1), x_admin_token: Optional[str] = Header(None)):
+    """Recent profiled analyses on this worker (per-stage breakdown, no stacks)."""
+    _require_profile_admin(x_admin_token)
+    return {"profiler": request_profiler.status(), "profiles": request_profiler.recent(limit)}
+
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """One profile by profile ID or requestId: stage timings, hottest frames and collapsed stacks."""
+    return _profile_or_404(profile_id, x_admin_token)
+
+
+@app.get("/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+def get_profile_collapsed(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed stacks ("frame;frame count" per line) for flamegraph.pl or speedscope."""
+    return request_profiler.collapsed(_profile_or_404(profile_id, x_admin_token))
+
+
+@app.get("/admission")
+def admission_status():
+    """Admission controller state: in-flight, queued per lane, admitted and shed counts."""
+    return admission.status()
+
+
+@app.get("/degradation")
+def degradation_status():
+    """Degradation policy: current load, tiers the next request would get and stage latencies."""
+    return degradation.status()
+
+
+@app.get("/models")
+def models_status():
+    """Model registry state: active version, A/B candidate and split."""
+    return model_registry.status()
+
+
+@app.post("/models/activate")
+def activate_model(request: ModelActivationRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Warm a model version in the background, then swap it in without a restart.
+    Published through the LATEST pointer, so every worker switches within MODEL_RELOAD_INTERVAL.
+    """
+    _require_admin(x_admin_token)
+    try:
+        model_registry.publish(request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return model_registry.status()
+
+
+@app.post("/models/split")
+def split_model_traffic(request: ModelSplitRequest, x_admin_token: Optional[str] = Header(None)):
+    """Route a fraction of traffic to a candidate version in every worker (fraction=0 clears the split)."""
+    _require_admin(x_admin_token)
+    try:
+        model_registry.publish_split(request.version, request.fraction)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return model_registry.status()
@@ -1,35 +1,172 @@
+import os
+import re
+import threading
+import time
+import uuid
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
+from feature_schema import feature_schema
+
+# pandas / scikit-learn / joblib are imported on first use: the model is trained or
+# loaded lazily (or by the startup warm-up), not at import time.
+
+# Versioned model artifacts written by retrain_model.py
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+LATEST_POINTER = "LATEST"
+# A/B split shared by every worker: "<version> <fraction>" (empty: no split)
+SPLIT_POINTER = "SPLIT"
+VERSION_RE = re.compile(r"^v[\w.-]{1,64}$")
+
+
+def read_pointer(name: str, model_dir: str = MODEL_DIR):
+    """Contents of a pointer file (LATEST, SPLIT), or None if absent."""
+    try:
+        with open(os.path.join(model_dir, name), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def write_pointer(name: str, value: str, model_dir: str = MODEL_DIR):
+    """Atomically replace a pointer file; every worker's registry watcher picks it up."""
+    os.makedirs(model_dir, exist_ok=True)
+    pointer = os.path.join(model_dir, name)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(value)
+    os.replace(pointer + ".tmp", pointer)
+
+
+def artifact_path(version: str, model_dir: str = MODEL_DIR) -> str:
+    if not VERSION_RE.match(version or ""):
+        raise FileNotFoundError(f"Invalid model version '{version}'")
+    return os.path.join(model_dir, f"trend_risk_{version}.joblib")
+
+
+def save_model_artifact(model, metadata: dict, model_dir: str = MODEL_DIR) -> str:
+    """
+    Write `model` as a new versioned artifact and atomically point LATEST at it.
+    Returns the version string (timestamp plus a random suffix, so two runs within
+    the same second never overwrite each other's artifact).
+    """
+    import joblib
+    os.makedirs(model_dir, exist_ok=True)
+    version = f"{time.strftime('v%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = artifact_path(version, model_dir)
+    tmp_path = path + ".tmp"
+    joblib.dump({"model": model, "metadata": dict(metadata, version=version)}, tmp_path)
+    os.replace(tmp_path, path)
+
+    write_pointer(LATEST_POINTER, version, model_dir)
+    return version
+
+
+def load_model_artifact(model_dir: str = MODEL_DIR, version: str = None):
+    """Load (model, metadata) for `version`, or the LATEST one. Returns (None, None) if absent."""
+    import joblib
+    if version is None:
+        version = read_pointer(LATEST_POINTER, model_dir)
+        if not version:
+            return None, None
+    artifact = joblib.load(artifact_path(version, model_dir))
+    return artifact["model"], artifact["metadata"]
+
+
+def score_model_batch(model, features: np.ndarray) -> np.ndarray:
+    """Risk scores (0-100) from any fitted classifier for a full-layout feature matrix."""
+    probs = model.predict_proba(features[:, feature_schema.model_index])[:, 1]
+    return np.round(probs * 100, 2)
+
 
 class TrendRiskClassifier:
     def __init__(self):
-        self.model = None
-        self._train_synthetic_model()
+        self._model = None
+        self._version = None
+        self._init_lock = threading.RLock()
+
+    def ensure_loaded(self):
+        """Load the LATEST artifact, or train the synthetic model, on first use."""
+        if self._model is None:
+            with self._init_lock:
+                if self._model is None:
+                    if not self.load_artifact():
+                        self._train_synthetic_model()
+        return self._model
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def model(self):
+        return self.ensure_loaded()
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+
+    @property
+    def version(self):
+        self.ensure_loaded()
+        return self._version
+
+    @version.setter
+    def version(self, value):
+        self._version = value
+
+    def load_artifact(self, version: str = None, model_dir: str = MODEL_DIR) -> bool:
+        """
+        Hot-swap to a retrained artifact (LATEST by default). The swap is a single
+        attribute assignment, so in-flight predictions finish on the old model.
+        """
+        try:
+            model, metadata = load_model_artifact(model_dir, version)
+        except Exception as e:
+            print(f"[WARN] Failed to load model artifact: {e}")
+            return False
+        if model is None:
+            return False
+        self.model = model
+        self.version = metadata["version"]
+        print(f"✅ Loaded retrained model {self.version} ({metadata.get('n_samples', '?')} samples)")
+        return True
+
+    def reload_if_updated(self, model_dir: str = MODEL_DIR) -> bool:
+        """Swap to the LATEST artifact if it differs from the loaded version."""
+        try:
+            with open(os.path.join(model_dir, LATEST_POINTER), "r", encoding="utf-8") as f:
+                latest = f.read().strip()
+        except OSError:
+            return False
+        if latest == self.version:
+            return False
+        return self.load_artifact(latest, model_dir)
 
     def _train_synthetic_model(self):
         """
         Trains a Proxy ML Model (Logistic Regression) on synthetic behavioral data.
         Now uses matched features from the Feather Feature Store.
         """
+        import pandas as pd
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.pipeline import Pipeline
+
         # 1. Generate Synthetic Data (Simulating Trend Behavior)
-        np.random.seed(42)
+        # Private seeded RNG: same data as np.random.seed(42), without touching global state
+        rng = np.random.RandomState(42)
         n_samples = 1500 # More samples for more features
         
         data = pd.DataFrame({
-            "engagement_velocity": np.random.uniform(-1, 1, n_samples),
-            "sentiment_score": np.random.uniform(-1, 1, n_samples),
-            "comment_fatigue": np.random.uniform(0, 1, n_samples),
-            "influencer_ratio": np.random.uniform(0, 1, n_samples),
-            "posting_change": np.random.uniform(-1, 1, n_samples),
-            "trend_age": np.random.uniform(1, 100, n_samples),
-            "engagement_per_view": np.random.uniform(0, 0.2, n_samples),
-            "interaction_quality": np.random.uniform(-1, 1, n_samples),
-            "fatigue_keyword_ratio": np.random.uniform(0, 1, n_samples),
-            "engagement_decay_rate": np.random.uniform(0, 0.5, n_samples),
-            "format_repetition_score": np.random.uniform(0, 1, n_samples)
+            "engagement_velocity": rng.uniform(-1, 1, n_samples),
+            "sentiment_score": rng.uniform(-1, 1, n_samples),
+            "comment_fatigue": rng.uniform(0, 1, n_samples),
+            "influencer_ratio": rng.uniform(0, 1, n_samples),
+            "posting_change": rng.uniform(-1, 1, n_samples),
+            "trend_age": rng.uniform(1, 100, n_samples),
+            "engagement_per_view": rng.uniform(0, 0.2, n_samples),
+            "interaction_quality": rng.uniform(-1, 1, n_samples),
+            "fatigue_keyword_ratio": rng.uniform(0, 1, n_samples),
+            "engagement_decay_rate": rng.uniform(0, 0.5, n_samples),
+            "format_repetition_score": rng.uniform(0, 1, n_samples)
         })
 
         # 2. Define Decline Logic (Ground Truth for the Proxy)
@@ -41,36 +178,30 @@ class TrendRiskClassifier:
             (data["interaction_quality"] < -0.4)
         ).astype(int)
 
-        X = data.drop("decline", axis=1)
-        y = data["decline"]
+        # Train on the contiguous schema-ordered array so inference can skip DataFrames
+        X = data[feature_schema.model_names].to_numpy(dtype=np.float64)
+        y = data["decline"].to_numpy()
 
         # 3. Create & Train Pipeline
-        self.model = Pipeline([
+        model = Pipeline([
             ("scaler", StandardScaler()),
             ("classifier", LogisticRegression(random_state=42))
         ])
         
-        self.model.fit(X, y)
+        model.fit(X, y)
+        self.model = model
+        self.version = "synthetic"
         print("✅ Proxy ML Model (LogisticRegression) re-trained with 11 features.")
 
     def predict_risk(self, signals: dict) -> dict:
         """
         Takes an expanded signal dict and returns risk score + metadata.
         """
-        # Ensure input order matches training
-        feature_order = [
-            "engagement_velocity", "sentiment_score", "comment_fatigue", 
-            "influencer_ratio", "posting_change", "trend_age",
-            "engagement_per_view", "interaction_quality", "fatigue_keyword_ratio",
-            "engagement_decay_rate", "format_repetition_score"
-        ]
-        
-        # Filter and order signals
-        input_data = {f: signals.get(f, 0.0) for f in feature_order}
-        input_df = pd.DataFrame([input_data], columns=feature_order)
+        # Schema vectorizer guarantees the training order
+        input_array = feature_schema.to_model_array(signals).reshape(1, -1)
         
         # Predict probability of decline (Class 1)
-        risk_prob = self.model.predict_proba(input_df)[0][1]
+        risk_prob = float(self.model.predict_proba(input_array)[0][1])
         risk_score = round(risk_prob * 100, 2)
         
         return {
@@ -80,6 +211,13 @@ class TrendRiskClassifier:
             "lifecycle_stage": self._map_lifecycle_stage(risk_score)
         }
 
+    def score_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Risk scores (0-100) for an (n, len(feature_schema)) full-layout feature matrix.
+        Used by the ensemble so every scorer shares one array.
+        """
+        return score_model_batch(self.model, features)
+
     def _map_risk_level(self, score):
         if score >= 85: return "CRITICAL"
         if score >= 70: return "HIGH"
@@ -0,0 +1,262 @@
+"""
+Model Registry for TrendFall AI
+Versioned, zero-downtime model hot-swap for each worker.
+
+- Every version bundles its classifier and its own SHAP explainer.
+- New versions are loaded and warmed (prediction + SHAP pass) in the background,
+  then swapped in with a single reference assignment.
+- Requests pin one version via select() and use it for every stage, so in-flight
+  requests finish on the version they started with.
+- An optional A/B split routes a stable fraction of inputs to a candidate version.
+- publish() / publish_split() write the LATEST / SPLIT pointers in the model
+  directory; every worker's watcher (MODEL_RELOAD_INTERVAL) applies them, so all
+  gunicorn workers converge on the same routing.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, NamedTuple, Optional
+
+from explainability import xai_layer
+from feature_schema import feature_schema
+from ml_model import (MODEL_DIR, LATEST_POINTER, SPLIT_POINTER, artifact_path, load_model_artifact,
+                      ml_classifier, read_pointer, score_model_batch, write_pointer)
+
+
+class ModelVersion:
+    """One immutable model version plus its lazily built (or pre-warmed) SHAP explainer."""
+
+    __slots__ = ("version", "model", "metadata", "_explainer", "_explainer_lock", "_linear", "warmed")
+
+    def __init__(self, version: str, model, metadata: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.model = model
+        self.metadata = metadata or {}
+        self._explainer = None
+        self._explainer_lock = threading.Lock()
+        self._linear = None
+        self.warmed = False
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._explainer_lock:
+                if self._explainer is None:
+                    try:
+                        self._explainer = xai_layer.build_shap_explainer(self.model)
+                    except Exception as e:
+                        print(f"[WARN] SHAP initialization failed for {self.version}: {e}")
+        return self._explainer
+
+    @property
+    def linear_attributor(self):
+        """Cheap attribution for the degraded XAI tier (None for non-linear models)."""
+        if self._linear is None:
+            try:
+                self._linear = xai_layer.build_linear_attributor(self.model) or False
+            except Exception as e:
+                print(f"[WARN] Linear attribution unavailable for {self.version}: {e}")
+                self._linear = False
+        return self._linear or None
+
+    def score_batch(self, features: np.ndarray) -> np.ndarray:
+        return score_model_batch(self.model, features)
+
+    def warm(self):
+        """Run a dummy prediction and SHAP pass so the first real request pays nothing."""
+        dummy = np.zeros((1, len(feature_schema)))
+        self.score_batch(dummy)
+        self.linear_attributor
+        if self.explainer is not None:
+            xai_layer.generate_shap_explanation({}, self.model, self.explainer)
+        self.warmed = True
+
+
+class _RoutingState(NamedTuple):
+    active: ModelVersion
+    candidate: Optional[ModelVersion]
+    candidate_fraction: float
+
+
+class ModelRegistry:
+    """Holds the routing state as one tuple so readers always see a consistent snapshot."""
+
+    def __init__(self, initial: Optional[ModelVersion] = None, model_dir: str = MODEL_DIR):
+        self.model_dir = model_dir
+        self._state: Optional[_RoutingState] = None
+        self._versions: Dict[str, ModelVersion] = {}
+        self._lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._watcher = None
+        if initial is not None:
+            self._state = _RoutingState(initial, None, 0.0)
+            self._versions[initial.version] = initial
+
+    def _routing_state(self) -> _RoutingState:
+        """Current state; seeded from ml_classifier (loading it if needed) on first use."""
+        state = self._state
+        if state is None:
+            initial = ModelVersion(ml_classifier.version, ml_classifier.model)
+            with self._lock:
+                if self._state is None:
+                    self._state = _RoutingState(initial, None, 0.0)
+                    self._versions[initial.version] = initial
+                state = self._state
+        return state
+
+    # --- Request path ---
+
+    def select(self, routing_key: str = "") -> ModelVersion:
+        """Pick the version for one request (stable per routing_key under an A/B split)."""
+        state = self._routing_state()
+        if state.candidate is None or state.candidate_fraction <= 0:
+            return state.active
+        digest = hashlib.blake2b(routing_key.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest, "little") / 2**64
+        return state.candidate if bucket < state.candidate_fraction else state.active
+
+    @property
+    def active(self) -> ModelVersion:
+        return self._routing_state().active
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._state is not None
+
+    # --- Control path ---
+
+    def load(self, version: Optional[str] = None) -> ModelVersion:
+        """Load (or reuse) a version from disk and warm it."""
+        if version is not None and version in self._versions:
+            mv = self._versions[version]
+        else:
+            model, metadata = load_model_artifact(self.model_dir, version)
+            if model is None:
+                raise FileNotFoundError(f"No model artifact found in '{self.model_dir}'")
+            mv = ModelVersion(metadata["version"], model, metadata)
+        if not mv.warmed:
+            mv.warm()
+        with self._lock:
+            self._versions[mv.version] = mv
+        return mv
+
+    def activate(self, version: Optional[str] = None, background: bool = True):
+        """Warm `version` (LATEST by default) and make it the active version."""
+        def _run():
+            try:
+                mv = self.load(version)
+                self._routing_state()
+                with self._lock:
+                    state = self._state
+                    candidate = None if state.candidate is mv else state.candidate
+                    self._state = _RoutingState(mv, candidate, state.candidate_fraction if candidate else 0.0)
+                    self._pending = None
+                    # Keep the previous active version for instant rollback, drop the rest
+                    keep = {mv.version, state.active.version}
+                    if candidate is not None:
+                        keep.add(candidate.version)
+                    self._versions = {k: v for k, v in self._versions.items() if k in keep}
+                # Keep the legacy singleton (simulations, default ensemble scorer) in step
+                ml_classifier.model, ml_classifier.version = mv.model, mv.version
+                print(f"✅ Model Registry: {mv.version} is now active")
+            except Exception as e:
+                with self._lock:
+                    self._pending = None
+                print(f"⚠️ Model Registry: activation of {version or 'LATEST'} failed: {e}")
+
+        with self._lock:
+            self._pending = version or LATEST_POINTER
+        if background:
+            threading.Thread(target=_run, name="model-activate", daemon=True).start()
+        else:
+            _run()
+
+    def set_split(self, version: Optional[str], fraction: float):
+        """Route `fraction` (0-1) of traffic to `version`; version=None or fraction=0 clears the split."""
+        fraction = min(max(float(fraction), 0.0), 1.0)
+        candidate = self.load(version) if version and fraction > 0 else None
+        self._routing_state()
+        with self._lock:
+            self._state = _RoutingState(self._state.active, candidate, fraction if candidate else 0.0)
+
+    def _check_exists(self, version: str):
+        if version not in self._versions and not os.path.exists(artifact_path(version, self.model_dir)):
+            raise FileNotFoundError(f"No artifact for model version '{version}'")
+
+    def publish(self, version: Optional[str] = None):
+        """Make `version` (LATEST by default) active in every worker: point LATEST at it, activate here."""
+        if version is not None:
+            self._check_exists(version)
+            write_pointer(LATEST_POINTER, version, self.model_dir)
+        self.activate(version, background=True)
+
+    def publish_split(self, version: Optional[str], fraction: float):
+        """set_split() here and in every other worker (through the SPLIT pointer)."""
+        if version and fraction > 0:
+            self._check_exists(version)
+        self.set_split(version, fraction)
+        state = self._routing_state()
+        value = f"{state.candidate.version} {state.candidate_fraction}" if state.candidate else ""
+        write_pointer(SPLIT_POINTER, value, self.model_dir)
+
+    def reload_if_updated(self) -> bool:
+        """Apply the LATEST / SPLIT pointers (in the foreground) where they differ from this worker's state."""
+        changed = False
+        latest = read_pointer(LATEST_POINTER, self.model_dir)
+        if latest and latest != self.active.version and not self._pending:
+            self.activate(latest, background=False)
+            changed = self.active.version == latest
+        split = read_pointer(SPLIT_POINTER, self.model_dir)
+        if split is not None:
+            try:
+                parts = split.split()
+                version, fraction = (parts[0], float(parts[1])) if len(parts) == 2 else (None, 0.0)
+                state = self._routing_state()
+                current = (state.candidate.version, state.candidate_fraction) if state.candidate else (None, 0.0)
+                if (version, fraction) != current:
+                    self.set_split(version, fraction)
+                    changed = True
+            except Exception as e:
+                print(f"⚠️ Model Registry: split {split!r} not applied: {e}")
+        return changed
+
+    def watch(self, interval: float = 30.0):
+        """Poll LATEST in a daemon thread and hot-swap when a new artifact appears."""
+        if self._watcher is not None:
+            return
+
+        def _poll():
+            while True:
+                time.sleep(interval)
+                # A bad pointer or artifact must not end the watcher: retry next interval
+                try:
+                    self.reload_if_updated()
+                except Exception as e:
+                    print(f"⚠️ Model Registry: reload failed: {e}")
+
+        self._watcher = threading.Thread(target=_poll, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def status(self) -> Dict[str, Any]:
+        state = self._routing_state()
+        return {
+            "active": state.active.version,
+            "candidate": state.candidate.version if state.candidate else None,
+            "candidate_fraction": state.candidate_fraction,
+            "pending": self._pending,
+            "loaded_versions": sorted(self._versions),
+            "shap_failures": xai_layer.shap_failures,
+        }
+
+
+# Global instance, seeded lazily with whatever ml_classifier loads on first use
+model_registry = ModelRegistry()
+
+# Every worker polls LATEST / SPLIT, so /models changes reach all of them (0 disables)
+if float(os.getenv("MODEL_RELOAD_INTERVAL", "15")) > 0:
+    model_registry.watch(float(os.getenv("MODEL_RELOAD_INTERVAL", "15")))
+# MODEL_AB_VERSION / MODEL_AB_FRACTION are applied by the startup warm-up ("ab_split" stage),
+# so importing this module never loads a candidate model or builds its explainer
@@ -0,0 +1,42 @@
+import sys
+import time
+
+from ml_model import ml_classifier
+from simulation_cache import SimulationCache
+from trend_engine import _simulation_entry, source_registry
+
+
+def _simulate(topic):
+    """Route like analyze_trend_real (same source registry) and build the server's cache entry."""
+    route = source_registry.route(topic)
+    kind, seed, compute, tier = _simulation_entry(route.source if route else None, topic)
+    result = compute()
+    if result["degradation"]["genai"] != tier:
+        # Gemini failed for this one: the server would not memoize it either
+        print(f"⚠️ Skipping '{topic}': GenAI {tier} tier unavailable")
+        return None
+    # Keys carry the model version: the server only serves the index while that model is active
+    return SimulationCache.make_key(kind, seed, ml_classifier.version), result
+
+
+def precompute(keyword_file, index_path):
+    """
+    Offline job: materialize simulated responses for every keyword/Instagram URL in
+    `keyword_file` (one per line) into an index the server loads via SIMULATION_INDEX.
+    """
+    with open(keyword_file, "r", encoding="utf-8") as f:
+        topics = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    print(f"Precomputing {len(topics)} simulated responses...")
+    start = time.perf_counter()
+    count = SimulationCache.write_index(
+        index_path, (entry for entry in map(_simulate, topics) if entry is not None)
+    )
+    print(f"✅ Wrote {count} responses ({ml_classifier.version}) to '{index_path}' in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python precompute_simulations.py <keywords.txt> [index_dir]")
+        sys.exit(1)
+    precompute(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else "simulation_index")
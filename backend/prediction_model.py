@@ -1,4 +1,6 @@
+import numpy as np
 from feather_client import feather
+from feature_schema import feature_schema
 
 class DeclineModel:
     """
@@ -17,49 +19,53 @@ class DeclineModel:
             "comment_sentiment_score": -15.0, # Higher sentiment reduces risk
             "interaction_quality": -20.0     # High quality interaction actively stabilizes
         }
+        # Compiled once: schema positions + weight vector for a single dot product
+        self._weight_index = np.array([feature_schema.index[f] for f in self.weights], dtype=np.intp)
+        self._weight_vector = np.array(list(self.weights.values()), dtype=np.float64)
+        self._views_idx = feature_schema.index["viewCount"]
+        self._likes_idx = feature_schema.index["likeCount"]
 
     def predict(self, request_id):
         """Input ONLY Feather-served features"""
-        features = feather.get_features(request_id)
-        if not features:
+        features = feather.get_feature_array(request_id)
+        if features is None:
             return {"declineRisk": 50, "timeWindow": "48h"}
 
+        risk_score = float(self.score_batch(features.reshape(1, -1))[0])
+        return {
+            "declineRisk": int(risk_score),
+            "timeWindow": self.time_window(risk_score)
+        }
+
+    def score_batch(self, features):
+        """
+        Risk scores (0-100, unrounded) for an (n, len(feature_schema)) full-layout matrix.
+        Same features Feather would serve, without the store round trip. The time window is
+        decided on this raw score; only the reported declineRisk is floored to whole points.
+        """
         # Custom logic for "Evergreen" legends (e.g. Despacito)
         # If views are massive and likes are massive, it's a stable pillar
-        views = features.get("viewCount", 0)
-        likes = features.get("likeCount", 0)
-        
-        # Weighted score (0-100)
-        risk_score = 50 # Base risk
+        views = features[:, self._views_idx]
+        likes = features[:, self._likes_idx]
         
-        # Evergreen damping
-        if views > 10000000 or likes > 500000:
-            risk_score = 15 # Even lower for confirmed legends
+        # Weighted score (0-100): base risk 50, even lower for confirmed legends
+        base = np.where((views > 10000000) | (likes > 500000), 15.0, 50.0)
         
-        for feature, weight in self.weights.items():
-            val = features.get(feature, 0)
-            # Normalize feature values to 0-1 for common ones
-            if feature == "trend_age":
-                val = min(1.0, val / 30)
-            elif feature == "comment_sentiment_score":
-                val = (val + 1) / 2 # -1..1 to 0..1
-            
-            risk_score += (val * weight)
-            
-        risk_score = max(0, min(100, risk_score))
+        # Normalize feature values to 0-1 (trend_age, sentiment) via the schema
+        normalized = feature_schema.normalize(features)
+        risk_score = base + normalized[:, self._weight_index] @ self._weight_vector
         
-        # Decide time window
+        return np.clip(risk_score, 0, 100)
+
+    @staticmethod
+    def time_window(risk_score):
+        """Decide time window"""
         if risk_score > 75:
-            time_window = "24h"
+            return "24h"
         elif risk_score > 40:
-            time_window = "48h"
+            return "48h"
         else:
-            time_window = "72h"
-
-        return {
-            "declineRisk": int(risk_score),
-            "timeWindow": time_window
-        }
+            return "72h"
 
 model = DeclineModel()
 
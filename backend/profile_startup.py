@@ -0,0 +1,74 @@
+"""
+Cold-start profile for the API worker.
+Runs `python -X importtime -c "import main"` in a fresh interpreter and reports
+total wall time plus the slowest imports, so startup regressions are easy to spot.
+
+    python profile_startup.py [--top 15] [--module main] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def profile_import(module: str = "main"):
+    """Import `module` in a fresh interpreter. Returns (wall_seconds, [(name, self_us, cumulative_us, depth)])."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return wall, rows
+
+
+def report(module: str = "main", top: int = 15) -> dict:
+    wall, rows = profile_import(module)
+    # Top-level third-party packages only (depth 1 = imported directly by our modules or main)
+    packages = {}
+    for name, _, cumulative, _depth in rows:
+        root = name.split(".")[0]
+        packages[root] = max(packages.get(root, 0), cumulative)
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "cold_start_seconds": round(wall, 3),
+        "import_seconds": round(max((r[2] for r in rows), default=0) / 1e6, 3),
+        "slowest_packages": [{"package": name, "cumulative_ms": round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report cold-start import time for the API worker.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON (for tracking over time)")
+    args = parser.parse_args()
+
+    result = report(args.module, args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Cold start ({args.module}): {result['cold_start_seconds']:.2f}s wall, "
+              f"{result['import_seconds']:.2f}s in imports")
+        for entry in result["slowest_packages"]:
+            print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['package']}")
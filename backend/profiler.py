@@ -0,0 +1,266 @@
+"""
+Request Profiler for TrendFall AI
+Opt-in sampling profiler for single analyses, to see whether a slow URL spends its
+time fetching comments, in TextBlob, SHAP or Gemini.
+
+A request is profiled when it carries "X-Profile: 1" together with the admin token
+(X-Admin-Token), or is drawn by PROFILE_SAMPLE_RATE. Profiles expose code paths and
+topics: without PROFILE_ADMIN_TOKEN (or ADMIN_TOKEN) the header is ignored and the
+profile endpoints are refused.
+While at least one profiled request is in flight, a sampler thread reads the request
+thread's stack every PROFILE_INTERVAL_MS (sys._current_frames) and counts collapsed
+stacks, rooted at the pipeline stage active at that moment. profile_stage() markers in the
+pipeline also time each stage. Without a profiled request the sampler thread sleeps
+and a stage marker costs one ContextVar lookup.
+
+Profiles are kept under the analysis requestId (or their own profile ID) and, with the
+shared cache tier enabled, are visible from every worker. Collapsed stacks
+("frame;frame;frame count" per line) load directly into flamegraph.pl or speedscope.
+"""
+
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from shared_cache import shared_cache
+
+ROOT_STAGE = "pipeline"  # samples taken outside any marked stage
+MAX_DEPTH = 128
+
+_active: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+_NO_STAGE = nullcontext()
+
+
+class ProfileSession:
+    """One profiled request: stage timings (marker side) and stack samples (sampler side)."""
+
+    def __init__(self, profile_id: str, topic: str, tenant: str):
+        self.id = profile_id
+        self.topic = topic
+        self.tenant = tenant
+        self.request_id: Optional[str] = None
+        self.thread_id = threading.get_ident()
+        self.stage = ROOT_STAGE
+        self.stage_ms: Dict[str, float] = {}
+        self.stage_calls: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.started_at = time.time()
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+
+    @contextmanager
+    def timed_stage(self, name: str):
+        previous, self.stage = self.stage, name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_ms[name] = self.stage_ms.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            self.stage_calls[name] += 1
+            self.stage = previous
+
+
+def profile_stage(name: str):
+    """Mark a pipeline stage: `with profile_stage("xai"): ...` (no-op unless the request is profiled)."""
+    session = _active.get()
+    return session.timed_stage(name) if session is not None else _NO_STAGE
+
+
+def tag_request(request_id: Optional[str]):
+    """Attach the analysis requestId to the current profile (if any), so it is stored under it."""
+    session = _active.get()
+    if session is not None and request_id:
+        session.request_id = request_id
+
+
+class RequestProfiler:
+    def __init__(self, sample_rate: float = 0.0, interval: float = 0.005, max_profiles: int = 100,
+                 ttl: float = 86400.0, admin_token: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.ttl = ttl
+        # Shared secret for the profile endpoints and the X-Profile header (None: both disabled)
+        self.admin_token = admin_token
+        self._sessions: Dict[str, ProfileSession] = {}
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}  # requestId -> profile ID
+        self._labels: Dict[Any, str] = {}   # code object -> "file:function"
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether profiles can be requested and read (an admin token is configured)."""
+        return self.admin_token is not None
+
+    def should_profile(self, header: Optional[str], token: Optional[str] = None) -> bool:
+        # The header is only honored from an admin; anyone else gets the server's sampling
+        if header is not None and self.authorized(token):
+            return header.strip().lower() in ("1", "true", "yes")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return self.enabled and token is not None and hmac.compare_digest(token, self.admin_token)
+
+    @staticmethod
+    def new_id() -> str:
+        return f"prof_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+    @contextmanager
+    def profile(self, profile_id: str, topic: str, tenant: str = "default"):
+        """Sample the calling thread for the duration of the block, then store the profile."""
+        session = ProfileSession(profile_id, topic, tenant)
+        token = _active.set(session)
+        cpu_start, wall_start = time.thread_time(), time.perf_counter()
+        self._register(session)
+        try:
+            yield session
+        finally:
+            self._unregister(session)
+            session.cpu_ms = (time.thread_time() - cpu_start) * 1000
+            session.wall_ms = (time.perf_counter() - wall_start) * 1000
+            _active.reset(token)
+            self._store(self._summarize(session))
+
+    # --- Sampler thread ---
+
+    def _register(self, session: ProfileSession):
+        with self._lock:
+            self._sessions[session.id] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+
+    def _unregister(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.pop(session.id, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            # Sample under the lock: once unregistered, a session gets no further samples
+            with self._lock:
+                if not self._sessions:
+                    self._wake.clear()  # idle until the next profiled request
+                    continue
+                frames = sys._current_frames()
+                for session in self._sessions.values():
+                    frame = frames.get(session.thread_id)
+                    if frame is not None:
+                        session.stacks[f"{session.stage};{self._collapse(frame)}"] += 1
+                frames = frame = None  # don't keep request frames alive between samples
+            time.sleep(self.interval)
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    # --- Storage ---
+
+    def _summarize(self, session: ProfileSession) -> Dict[str, Any]:
+        samples = sum(session.stacks.values())
+        stage_samples: Counter = Counter()
+        self_samples: Counter = Counter()
+        total_samples: Counter = Counter()
+        for stack, count in session.stacks.items():
+            frames = stack.split(";")
+            stage_samples[frames[0]] += count
+            self_samples[frames[-1]] += count
+            for frame in set(frames[1:]):
+                total_samples[frame] += count
+        stages = [
+            {
+                "stage": name,
+                "wallMs": round(session.stage_ms.get(name, 0.0), 2),
+                "calls": session.stage_calls.get(name, 0),
+                "samples": stage_samples.get(name, 0),
+            }
+            for name in list(session.stage_ms) + [ROOT_STAGE]
+        ]
+        stages[-1]["wallMs"] = round(max(session.wall_ms - sum(session.stage_ms.values()), 0.0), 2)
+        return {
+            "id": session.id,
+            "requestId": session.request_id,
+            "topic": session.topic,
+            "tenant": session.tenant,
+            "startedAt": round(session.started_at, 3),
+            "wallMs": round(session.wall_ms, 2),
+            "cpuMs": round(session.cpu_ms, 2),
+            "intervalMs": self.interval * 1000,
+            "samples": samples,
+            "stages": stages,
+            "topFrames": [
+                {"frame": frame, "self": count, "total": total_samples[frame]}
+                for frame, count in self_samples.most_common(15)
+            ],
+            "collapsed": dict(session.stacks),
+        }
+
+    def _store(self, profile: Dict[str, Any]):
+        with self._lock:
+            self._profiles[profile["id"]] = profile
+            if profile["requestId"]:
+                self._aliases[profile["requestId"]] = profile["id"]
+            while len(self._profiles) > self.max_profiles:
+                _, evicted = self._profiles.popitem(last=False)
+                self._aliases.pop(evicted["requestId"], None)
+        # Another worker may be asked for it
+        shared_cache.set_json("profiles", profile["id"], profile, ttl=self.ttl)
+        if profile["requestId"]:
+            shared_cache.set_json("profiles", profile["requestId"], profile, ttl=self.ttl)
+        print(f"🔬 Profile {profile['id']}: {profile['wallMs']:.0f} ms, {profile['samples']} samples")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Profile by profile ID or analysis requestId."""
+        with self._lock:
+            profile = self._profiles.get(self._aliases.get(key, key))
+        return profile if profile is not None else shared_cache.get_json("profiles", key)
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest `limit` (>= 1) profiles of this worker, without their stacks."""
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        with self._lock:
+            profiles = list(self._profiles.values())[-limit:][::-1]
+        return [{k: v for k, v in p.items() if k not in ("collapsed", "topFrames")} for p in profiles]
+
+    @staticmethod
+    def collapsed(profile: Dict[str, Any]) -> str:
+        """Brendan Gregg's collapsed format (flamegraph.pl, speedscope)."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(profile["collapsed"].items()))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "active": len(self._sessions),
+            "stored": len(self._profiles),
+        }
+
+
+# Global instance (PROFILE_SAMPLE_RATE: fraction of analyses profiled without the header)
+request_profiler = RequestProfiler(
+    sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+    interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000,
+    max_profiles=int(os.getenv("PROFILE_MAX_STORED", "100")),
+    admin_token=os.getenv("PROFILE_ADMIN_TOKEN") or os.getenv("ADMIN_TOKEN") or None,
+)
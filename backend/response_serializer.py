@@ -0,0 +1,102 @@
+"""
+Fast Response Serializer for TrendFall AI
+Compiles a pydantic response model into a projection plan once, then serializes
+trusted engine results straight to JSON bytes (orjson) without re-validating them.
+Output matches FastAPI's response_model rendering: only declared fields, in
+declaration order, with int/float coercion applied.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, get_args, get_origin
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: fall back to the stdlib encoder
+    orjson = None
+
+
+def _dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _passthrough(value):
+    return value
+
+
+def _to_int(value) -> int:
+    # int() would truncate 87.5 to 87; pydantic rejects floats with a fractional part
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"expected an integral number, got {value}")
+    return int(value)
+
+
+def _compile(annotation) -> Callable[[Any], Any]:
+    """Build a projector for a single field annotation."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _compile_model(annotation)
+    if annotation is int:
+        return _to_int
+    if annotation is float:
+        return float
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in (list, List) and args:
+        item = _compile(args[0])
+        if item is _passthrough:
+            return list
+        return lambda values: [item(v) for v in values]
+    if origin in (dict, Dict) and len(args) == 2:
+        value_fn = _compile(args[1])
+        if value_fn is _passthrough:
+            return dict
+        return lambda mapping: {k: value_fn(v) for k, v in mapping.items()}
+    if origin is not None and type(None) in args:
+        # Optional[X]
+        inner = _compile(next(a for a in args if a is not type(None)))
+        return lambda value: None if value is None else inner(value)
+    return _passthrough
+
+
+_MISSING = object()
+
+
+def _compile_model(model_cls) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    plan = [
+        (name, _compile(f.annotation), _MISSING if f.is_required() else f.get_default(call_default_factory=True))
+        for name, f in model_cls.model_fields.items()
+    ]
+
+    def project(data: Dict[str, Any]) -> Dict[str, Any]:
+        out = {}
+        for name, fn, default in plan:
+            if default is _MISSING:
+                out[name] = fn(data[name])
+            else:
+                value = data.get(name, default)
+                out[name] = value if value is default else fn(value)
+        return out
+
+    return project
+
+
+class FastModelSerializer:
+    """
+    Precomputed serializer for one response model.
+    Use only for results produced by our own engine (no validation is performed).
+    """
+
+    def __init__(self, model_cls):
+        self.model_cls = model_cls
+        self._project = _compile_model(model_cls)
+
+    def project(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Trim and coerce a result dict to the model's declared schema."""
+        return self._project(data)
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return _dumps(self._project(data))
@@ -0,0 +1,146 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from feature_schema import feature_schema
+from ml_model import MODEL_DIR, save_model_artifact
+
+LABEL_COLUMN = "decline"
+LOOKUP_BATCH = 900  # bound parameters per IN (...) query (SQLite's historic limit is 999)
+
+
+@contextmanager
+def outcome_index(outcomes_path, chunksize=50_000):
+    """
+    Stream the outcomes CSV (request_id, decline) into a temporary on-disk SQLite table,
+    so labels can be joined to every feature chunk without holding all outcomes in memory.
+    Later rows win for a repeated request_id. Yields a connection, or None without a path.
+    """
+    if not outcomes_path:
+        yield None
+        return
+    with tempfile.TemporaryDirectory(prefix="outcomes-") as tmp:
+        db = sqlite3.connect(os.path.join(tmp, "outcomes.db"))
+        try:
+            db.execute("CREATE TABLE outcomes (request_id TEXT PRIMARY KEY, label INTEGER NOT NULL) WITHOUT ROWID")
+            for chunk in pd.read_csv(outcomes_path, usecols=["request_id", LABEL_COLUMN],
+                                     dtype={"request_id": str}, chunksize=chunksize):
+                chunk = chunk.dropna()
+                db.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?)",
+                               zip(chunk["request_id"], chunk[LABEL_COLUMN].astype(int).tolist()))
+            db.commit()
+            yield db
+        finally:
+            db.close()
+
+
+def lookup_outcomes(db, request_ids):
+    """Label per request ID (NaN where no outcome is recorded), aligned with `request_ids`."""
+    keys = request_ids.astype(str)
+    labels = {}
+    unique = keys.unique().tolist()
+    for start in range(0, len(unique), LOOKUP_BATCH):
+        batch = unique[start:start + LOOKUP_BATCH]
+        labels.update(db.execute(
+            f"SELECT request_id, label FROM outcomes WHERE request_id IN ({','.join('?' * len(batch))})", batch
+        ).fetchall())
+    return keys.map(labels)
+
+
+def iter_training_chunks(features_path, outcomes=None, chunksize=50_000):
+    """
+    Stream (X, y) chunks from the Feather history CSV without loading it whole.
+    Labels come from a `decline` column in the history itself, or from an outcome_index
+    (`outcomes`) joined chunk by chunk. Unlabelled rows are skipped.
+    """
+    for chunk in pd.read_csv(features_path, chunksize=chunksize):
+        if outcomes is not None:
+            chunk[LABEL_COLUMN] = lookup_outcomes(outcomes, chunk["request_id"])
+        if LABEL_COLUMN not in chunk:
+            raise ValueError("No outcome labels: pass --outcomes or add a 'decline' column.")
+        chunk = chunk.dropna(subset=[LABEL_COLUMN])
+        if chunk.empty:
+            continue
+        for name in feature_schema.model_names:
+            if name not in chunk:
+                chunk[name] = 0.0
+        X = chunk[feature_schema.model_names].to_numpy(dtype=np.float64)
+        y = chunk[LABEL_COLUMN].to_numpy(dtype=np.int64)
+        yield X, y
+
+
+def retrain(features_path, outcomes_path=None, chunksize=50_000, epochs=3, model_dir=MODEL_DIR):
+    """
+    Out-of-core retraining: one pass to fit the scaler, then `epochs` passes of
+    SGD logistic regression via partial_fit. Memory is bounded by `chunksize`
+    (outcome labels are staged on disk first).
+    Writes a versioned artifact that running servers pick up via LATEST.
+    """
+    with outcome_index(outcomes_path, chunksize) as outcomes:
+        return _retrain(features_path, outcomes, chunksize, epochs, model_dir)
+
+
+def _retrain(features_path, outcomes, chunksize, epochs, model_dir):
+    start = time.perf_counter()
+
+    # Pass 1: feature scaling statistics
+    scaler = StandardScaler()
+    n_samples, n_positive = 0, 0
+    for X, y in iter_training_chunks(features_path, outcomes, chunksize):
+        scaler.partial_fit(X)
+        n_samples += len(y)
+        n_positive += int(y.sum())
+
+    if n_samples == 0:
+        print("❌ No labelled rows found. Nothing to train.")
+        return None
+    print(f"Pass 1: {n_samples} labelled rows ({n_positive} declines)")
+
+    # Pass 2..: incremental fitting, with progressive validation on the final epoch
+    classifier = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+    correct, seen = 0, 0
+    for epoch in range(epochs):
+        final_epoch = epoch == epochs - 1
+        for X, y in iter_training_chunks(features_path, outcomes, chunksize):
+            X_scaled = scaler.transform(X)
+            if final_epoch and hasattr(classifier, "coef_"):
+                # Score each chunk before learning from it (progressive validation)
+                correct += int((classifier.predict(X_scaled) == y).sum())
+                seen += len(y)
+            classifier.partial_fit(X_scaled, y, classes=np.array([0, 1]))
+        print(f"Epoch {epoch + 1}/{epochs} complete")
+
+    model = Pipeline([("scaler", scaler), ("classifier", classifier)])
+    metadata = {
+        "n_samples": n_samples,
+        "n_positive": n_positive,
+        "features": feature_schema.model_names,
+        "epochs": epochs,
+        "progressive_accuracy": round(correct / seen, 4) if seen else None,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": features_path,
+    }
+    version = save_model_artifact(model, metadata, model_dir)
+    print(f"✅ Model {version} written to '{model_dir}' in {time.perf_counter() - start:.1f}s "
+          f"(progressive accuracy: {metadata['progressive_accuracy']})")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the trend risk model from persisted Feather features.")
+    parser.add_argument("features", help="Feather history CSV (FEATHER_HISTORY_PATH)")
+    parser.add_argument("--outcomes", help="CSV with request_id, decline labels")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+    retrain(args.features, args.outcomes, args.chunksize, args.epochs, args.model_dir)
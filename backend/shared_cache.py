@@ -0,0 +1,262 @@
+"""
+Shared Cache for TrendFall AI
+Cross-process cache tier so every gunicorn worker on a host shares one warm cache
+(analysis results, GenAI summaries, Feather feature vectors) instead of four cold ones.
+
+Backed by SQLite in WAL mode on local disk (SHARED_CACHE_PATH; unset disables the
+tier and every call is a no-op):
+- readers never block writers; each thread of each worker has its own connection
+- values are bytes in (namespace, key) rows with an optional expiry
+- LRU eviction keeps the total under SHARED_CACHE_MAX_MB (access time is refreshed
+  at most every TOUCH_INTERVAL seconds, so hot reads don't turn into writes)
+- per-key leases (lock / get_or_compute) let one worker compute a missing entry
+  while the others wait for it, across processes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: fall back to the stdlib encoder
+    orjson = None
+
+TOUCH_INTERVAL = 30.0
+EVICT_BATCH = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,
+    expires REAL, accessed REAL NOT NULL, PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed);
+CREATE TABLE IF NOT EXISTS leases (
+    ns TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, expires REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('bytes', 0);
+"""
+
+
+def _to_builtin(value):
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class SharedCache:
+    def __init__(self, path: Optional[str], max_bytes: int = 256 * 1024 * 1024, lease_seconds: float = 30.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection().executescript(SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        # A forked worker must not reuse its parent's connection
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    # --- Bytes API ---
+
+    def get(self, ns: str, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT value, expires, accessed FROM entries WHERE ns = ? AND key = ?", (ns, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self.misses += 1
+            return None
+        if now - row[2] > TOUCH_INTERVAL:
+            try:
+                self._connection().execute(
+                    "UPDATE entries SET accessed = ? WHERE ns = ? AND key = ?", (now, ns, key)
+                )
+            except sqlite3.OperationalError:
+                pass  # busy: the LRU position can wait for the next read
+        self.hits += 1
+        return row[0]
+
+    def set(self, ns: str, key: str, value: bytes, ttl: Optional[float] = None):
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        now = time.time()
+        expires = now + ttl if ttl else None
+        try:
+            with self._transaction() as db:
+                old = db.execute("SELECT size FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    (ns, key, value, len(value), expires, now)
+                )
+                db.execute("UPDATE meta SET value = value + ? WHERE name = 'bytes'",
+                           (len(value) - (old[0] if old else 0),))
+                self._evict(db, now)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Shared cache write failed: {e}")
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        total = db.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Expired entries first, then least recently used, down to 90% of the budget
+        target = int(self.max_bytes * 0.9)
+        freed = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE expires <= ?", (now,)).fetchone()[0]
+        db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        total -= freed
+        while total > target:
+            victims = db.execute(
+                "SELECT ns, key, size FROM entries ORDER BY accessed LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not victims:
+                break
+            db.executemany("DELETE FROM entries WHERE ns = ? AND key = ?", [(v[0], v[1]) for v in victims])
+            total -= sum(v[2] for v in victims)
+            self.evictions += len(victims)
+        db.execute("UPDATE meta SET value = ? WHERE name = 'bytes'", (max(total, 0),))
+
+    def delete(self, ns: str, key: str):
+        if not self.enabled:
+            return
+        with self._transaction() as db:
+            old = db.execute("SELECT size FROM entries WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            if old:
+                db.execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+                db.execute("UPDATE meta SET value = value - ? WHERE name = 'bytes'", (old[0],))
+
+    # --- JSON API ---
+
+    def get_json(self, ns: str, key: str) -> Optional[Any]:
+        data = self.get(ns, key)
+        if data is None:
+            return None
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+
+    def set_json(self, ns: str, key: str, value: Any, ttl: Optional[float] = None):
+        if not self.enabled:
+            return
+        if orjson is not None:
+            data = orjson.dumps(value, default=_to_builtin)
+        else:
+            data = json.dumps(value, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+        self.set(ns, key, data, ttl)
+
+    # --- Per-key locking ---
+
+    @contextmanager
+    def lock(self, ns: str, key: str, timeout: float = 30.0):
+        """
+        Cross-process lease on (ns, key). Yields True when held, False if `timeout` expired
+        first (the caller then proceeds unlocked). A crashed holder's lease lapses after
+        lease_seconds.
+        """
+        if not self.enabled:
+            yield True
+            return
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        delay = 0.005
+        held = False
+        while True:
+            now = time.time()
+            try:
+                with self._transaction() as db:
+                    cursor = db.execute(
+                        "INSERT INTO leases VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (ns, key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                        "WHERE leases.expires <= ?",
+                        (ns, key, owner, now + self.lease_seconds, now)
+                    )
+                    held = cursor.rowcount == 1
+            except sqlite3.OperationalError:
+                held = False
+            if held or time.monotonic() >= deadline:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        try:
+            yield held
+        finally:
+            if held:
+                with self._transaction() as db:
+                    db.execute("DELETE FROM leases WHERE ns = ? AND key = ? AND owner = ?", (ns, key, owner))
+
+    def get_or_compute(self, ns: str, key: str, compute: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        JSON value for (ns, key); on a miss one worker computes it while the others wait.
+        Falsy results ([], 0, {}) are cached like any other; compute returns None for
+        "don't cache" (e.g. an API error).
+        """
+        if not self.enabled:
+            return compute()
+        cached = self.get_json(ns, key)
+        if cached is not None:
+            return cached
+        with self.lock(ns, key):
+            cached = self.get_json(ns, key)  # filled while we waited for the lease
+            if cached is not None:
+                return cached
+            value = compute()
+            if value is not None:
+                self.set_json(ns, key, value, ttl)
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        db = self._connection()
+        entries, = db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        total, = db.execute("SELECT value FROM meta WHERE name = 'bytes'").fetchone()
+        return {
+            "enabled": True,
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,          # this worker
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Global instance (one file shared by every worker on the host)
+shared_cache = SharedCache(
+    path=os.getenv("SHARED_CACHE_PATH") or None,
+    max_bytes=int(float(os.getenv("SHARED_CACHE_MAX_MB", "256")) * 1024 * 1024),
+)
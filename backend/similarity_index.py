@@ -0,0 +1,347 @@
+"""
+Similarity Index for TrendFall AI
+k-NN over stored trend signal vectors ("trends like this"), used to calibrate a
+new risk score against the recorded outcomes (declined or not) of similar
+historical trends.
+
+Vectors: the 11 model features scaled to 0..1 by each feature's range, plus
+optional extra dimensions (e.g. comment-embedding features), stored as float32.
+
+Index: exact blocked brute force while small; once `train_threshold` vectors are
+stored, an IVF layer (k-means coarse quantizer, NumPy only) restricts each query
+to the `nprobe` nearest lists. Inserts are incremental (amortized O(1) appends to
+the matrix and to the owning list); the quantizer is retrained whenever the index
+has grown 4x since the last training. Training runs in a background thread over the
+rows present when it started (stored rows never change); the new lists catch up on
+rows added meanwhile and are swapped in under the lock, so inserts and searches
+never wait for k-means.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from feature_schema import feature_schema
+
+
+class _GrowableArray:
+    """Append-only NumPy buffer with capacity doubling."""
+
+    def __init__(self, width: Optional[int] = None, dtype=np.float32, capacity: int = 1024):
+        shape = (capacity,) if width is None else (capacity, width)
+        self._data = np.empty(shape, dtype=dtype)
+        self.size = 0
+
+    def extend(self, rows: np.ndarray) -> int:
+        start, end = self.size, self.size + len(rows)
+        if end > len(self._data):
+            capacity = max(end, 2 * len(self._data))
+            grown = np.empty((capacity,) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[start:end] = rows
+        self.size = end
+        return start
+
+    @property
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+
+def _feature_scaling():
+    """Per model feature (lo, scale) mapping its range (norm_range if set) onto 0..1."""
+    lo = np.zeros(len(feature_schema.model_names))
+    scale = np.ones(len(feature_schema.model_names))
+    for i, name in enumerate(feature_schema.model_names):
+        spec = feature_schema.spec(name)
+        low, high = spec.norm_range or spec.value_range
+        if np.isfinite(low) and np.isfinite(high) and high > low:
+            lo[i], scale[i] = low, high - low
+    return lo, scale
+
+
+class SimilarityIndex:
+    def __init__(
+        self,
+        extra_dims: int = 0,
+        nprobe: int = 8,
+        max_lists: int = 1024,
+        train_threshold: int = 50_000,
+        block_size: int = 65_536,
+        extra_weight: float = 1.0,
+        background_training: bool = True
+    ):
+        self.model_dims = len(feature_schema.model_names)
+        self.extra_dims = extra_dims
+        self.dim = self.model_dims + extra_dims
+        self.nprobe = nprobe
+        self.max_lists = max_lists
+        self.train_threshold = train_threshold
+        self.block_size = block_size
+        self.extra_weight = extra_weight
+        self.background_training = background_training
+        self._lo, self._scale = _feature_scaling()
+
+        self._vectors = _GrowableArray(self.dim)
+        self._sq_norms = _GrowableArray()
+        self._risks = _GrowableArray()
+        self._outcomes = _GrowableArray()  # 1.0 declined, 0.0 did not, NaN unknown
+        self._ids: List[str] = []
+        self._labels: List[Optional[str]] = []
+
+        # IVF state (None until trained)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[_GrowableArray] = []
+        self._trained_at_size = 0
+        self._training: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._vectors.size
+
+    # --- Embedding ---
+
+    def embed_matrix(self, features: np.ndarray, extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n, len(feature_schema)) full-layout features -> (n, dim) float32 index vectors."""
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        model = (features[:, feature_schema.model_index] - self._lo) / self._scale
+        vectors = np.zeros((len(features), self.dim), dtype=np.float32)
+        vectors[:, :self.model_dims] = np.clip(model, 0.0, 1.0)
+        if extra is not None and self.extra_dims:
+            vectors[:, self.model_dims:] = np.atleast_2d(extra)[:, :self.extra_dims] * self.extra_weight
+        return vectors
+
+    def embed(self, signals, extra: Optional[np.ndarray] = None) -> np.ndarray:
+        """Signal dict / SignalVector -> (dim,) index vector."""
+        return self.embed_matrix(feature_schema.to_array(signals), extra)[0]
+
+    # --- Inserts ---
+
+    def add(self, ids: List[str], features: np.ndarray, risks=None, labels=None, extra=None, outcomes=None):
+        """Insert full-layout feature rows (risk / label / recorded outcome per row are optional)."""
+        vectors = self.embed_matrix(features, extra)
+        n = len(vectors)
+        risks = np.full(n, np.nan, dtype=np.float32) if risks is None else np.asarray(risks, dtype=np.float32)
+        outcomes = np.full(n, np.nan, dtype=np.float32) if outcomes is None else np.asarray(outcomes, dtype=np.float32)
+        with self._lock:
+            start = self._vectors.extend(vectors)
+            self._sq_norms.extend(np.einsum("ij,ij->i", vectors, vectors))
+            self._risks.extend(risks)
+            self._outcomes.extend(outcomes)
+            self._ids.extend(ids)
+            self._labels.extend(labels if labels is not None else [None] * n)
+            if self._centroids is not None:
+                self._assign(self._lists, self._centroids, start, vectors)
+            if (self._training is None and len(self) >= self.train_threshold
+                    and len(self) >= 4 * max(self._trained_at_size, 1)):
+                self._start_training()
+
+    def add_one(self, item_id: str, signals, risk: Optional[float] = None, label: Optional[str] = None, extra=None):
+        self.add([item_id], feature_schema.to_array(signals),
+                 risks=None if risk is None else [risk], labels=[label],
+                 extra=None if extra is None else np.atleast_2d(extra))
+
+    # --- Queries ---
+
+    def search(self, query: np.ndarray, k: int = 10, exact: bool = False) -> List[Dict[str, Any]]:
+        """k nearest stored vectors (Euclidean) to an embedded query vector."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            n = len(self)
+            if n == 0:
+                return []
+            k = min(k, n)
+            if exact or self._centroids is None:
+                candidates, distances = self._search_exact(query, k)
+            else:
+                candidates, distances = self._search_ivf(query, k)
+            risks = self._risks.view[candidates]
+            outcomes = self._outcomes.view[candidates]
+            return [
+                {
+                    "id": self._ids[i],
+                    "label": self._labels[i],
+                    "distance": round(float(np.sqrt(max(d, 0.0))), 6),
+                    "riskScore": None if np.isnan(r) else round(float(r), 2),
+                    "outcome": None if np.isnan(o) else int(o),
+                }
+                for i, d, r, o in zip(candidates.tolist(), distances.tolist(), risks.tolist(), outcomes.tolist())
+            ]
+
+    def _search_exact(self, query: np.ndarray, k: int):
+        """Blocked brute force: ||x||^2 - 2 x.q (+ ||q||^2), top-k merged across blocks."""
+        vectors, sq_norms = self._vectors.view, self._sq_norms.view
+        q_norm = float(query @ query)
+        best_idx = np.empty(0, dtype=np.intp)
+        best_dist = np.empty(0, dtype=np.float32)
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            dist = sq_norms[start:start + len(block)] - 2.0 * (block @ query) + q_norm
+            take = min(k, len(dist))
+            top = np.argpartition(dist, take - 1)[:take]
+            best_idx = np.concatenate([best_idx, top + start])
+            best_dist = np.concatenate([best_dist, dist[top]])
+            if len(best_idx) > k:
+                keep = np.argpartition(best_dist, k - 1)[:k]
+                best_idx, best_dist = best_idx[keep], best_dist[keep]
+        order = np.argsort(best_dist)
+        return best_idx[order], best_dist[order]
+
+    def _search_ivf(self, query: np.ndarray, k: int):
+        centroid_dist = ((self._centroids - query) ** 2).sum(axis=1)
+        nprobe = min(self.nprobe, len(self._centroids))
+        probe = np.argpartition(centroid_dist, nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self._lists[c].view for c in probe])
+        if len(candidates) < k:
+            return self._search_exact(query, k)
+        diff = self._vectors.view[candidates] - query
+        dist = np.einsum("ij,ij->i", diff, diff)
+        top = np.argpartition(dist, k - 1)[:k]
+        order = top[np.argsort(dist[top])]
+        return candidates[order], dist[order]
+
+    # --- IVF training ---
+
+    def _start_training(self):
+        """Called under the lock: train on the current rows, synchronously or in the background."""
+        snapshot = self._vectors.view  # rows [0, n) are never modified, only appended to
+        if not self.background_training:
+            self._install(*self._build_ivf(snapshot))
+            return
+        self._training = threading.Thread(target=self._train_in_background, args=(snapshot,),
+                                          name="similarity-ivf", daemon=True)
+        self._training.start()
+
+    def _train_in_background(self, snapshot: np.ndarray):
+        try:
+            centroids, lists = self._build_ivf(snapshot)
+            with self._lock:
+                self._install(centroids, lists)
+        except Exception as e:
+            print(f"[WARN] Similarity index: IVF training failed: {e}")
+        finally:
+            with self._lock:
+                self._training = None
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Block until a running background training finishes. Returns False on timeout."""
+        thread = self._training
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def _build_ivf(self, vectors: np.ndarray, iterations: int = 10, sample_size: int = 100_000):
+        """k-means centroids and inverted lists over `vectors` (no index state is touched)."""
+        n = len(vectors)
+        rng = np.random.default_rng(42)
+        sample = vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+        # Never more lists than sampled points (a small SIMILARITY_IVF_THRESHOLD)
+        nlist = int(min(self.max_lists, max(16, 4 * np.sqrt(n)), len(sample)))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        lists = [_GrowableArray(dtype=np.intp, capacity=max(16, 2 * n // nlist)) for _ in range(nlist)]
+        self._assign(lists, centroids, 0, vectors)
+        return centroids, lists
+
+    def _install(self, centroids: np.ndarray, lists: List[_GrowableArray]):
+        """Called under the lock: catch up on rows added during training, then swap the IVF in."""
+        trained = sum(l.size for l in lists)
+        if len(self) > trained:
+            self._assign(lists, centroids, trained, self._vectors.view[trained:])
+        self._centroids, self._lists = centroids, lists
+        self._trained_at_size = trained
+        print(f"[OK] Similarity index: IVF trained with {len(centroids)} lists over {trained} vectors")
+
+    def _assign(self, lists: List[_GrowableArray], centroids: np.ndarray, start: int, vectors: np.ndarray):
+        assignment = self._nearest_centroid(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.flatnonzero(np.diff(assignment[order])) + 1
+        for chunk in np.split(order, bounds):
+            lists[assignment[chunk[0]]].extend(chunk + start)
+
+    def _nearest_centroid(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        c_norms = np.einsum("ij,ij->i", centroids, centroids)
+        assignment = np.empty(len(vectors), dtype=np.intp)
+        for s in range(0, len(vectors), self.block_size):
+            block = vectors[s:s + self.block_size]
+            assignment[s:s + len(block)] = np.argmin(c_norms - 2.0 * (block @ centroids.T), axis=1)
+        return assignment
+
+    # --- Bulk load / status ---
+
+    def load_history(self, path: str, risk_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                     chunksize: int = 100_000, outcomes_path: Optional[str] = None) -> int:
+        """
+        Index a Feather history CSV chunk by chunk; `risk_fn` scores (n, F) feature rows.
+        Recorded outcomes come from a `decline` column in the history, or from an outcomes
+        CSV (request_id, decline) joined chunk by chunk as in retrain_model.py.
+        """
+        import pandas as pd
+        from retrain_model import LABEL_COLUMN, lookup_outcomes, outcome_index
+
+        loaded = 0
+        with outcome_index(outcomes_path, chunksize) as outcomes:
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                for name in feature_schema.names:
+                    if name not in chunk:
+                        chunk[name] = 0.0
+                if outcomes is not None:
+                    chunk[LABEL_COLUMN] = lookup_outcomes(outcomes, chunk["request_id"])
+                features = chunk[feature_schema.names].to_numpy(dtype=np.float64)
+                risks = risk_fn(features) if risk_fn is not None else None
+                labels = chunk[LABEL_COLUMN].to_numpy(dtype=np.float32) if LABEL_COLUMN in chunk else None
+                self.add(chunk["request_id"].astype(str).tolist(), features, risks=risks, outcomes=labels)
+                loaded += len(chunk)
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self),
+            "dim": self.dim,
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe,
+            "trained_at_size": self._trained_at_size,
+            "training": self._training is not None,
+            "with_outcome": int(np.count_nonzero(~np.isnan(self._outcomes.view))),
+        }
+
+
+def _weighted_mean(pairs) -> Optional[float]:
+    if not pairs:
+        return None
+    values = np.array([v for v, _ in pairs], dtype=np.float64)
+    weights = 1.0 / (np.array([d for _, d in pairs]) + 1e-3)
+    return float((values * weights).sum() / weights.sum())
+
+
+def calibrated_risk(neighbors: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Inverse-distance weighted decline rate (0-100) of the neighbours with a recorded
+    outcome: how often trends like this one actually declined. None without outcomes.
+    """
+    rate = _weighted_mean([(n["outcome"], n["distance"]) for n in neighbors if n.get("outcome") is not None])
+    return None if rate is None else round(100 * rate, 2)
+
+
+def neighbor_predicted_risk(neighbors: List[Dict[str, Any]]) -> Optional[float]:
+    """Inverse-distance weighted mean of the neighbours' predicted risks (the model's own view)."""
+    mean = _weighted_mean([(n["riskScore"], n["distance"]) for n in neighbors if n["riskScore"] is not None])
+    return None if mean is None else round(mean, 2)
+
+
+# Global instance
+similarity_index = SimilarityIndex(
+    extra_dims=int(os.getenv("SIMILARITY_EXTRA_DIMS", "0")),
+    nprobe=int(os.getenv("SIMILARITY_NPROBE", "8")),
+    train_threshold=int(os.getenv("SIMILARITY_IVF_THRESHOLD", "50000")),
+)
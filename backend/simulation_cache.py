@@ -0,0 +1,240 @@
+"""
+Simulation Cache for TrendFall AI
+Keyword and Instagram responses are fully deterministic from their seed, so they
+are served from an in-process LRU memo, backed by an optional precomputed on-disk
+index (built offline by precompute_simulations.py).
+
+The memo is partitioned into namespaces (one per tenant), each an LRU with its own
+byte budget; the precomputed index is read-only and shared by every namespace.
+Responses embed the classifier's prediction, so every key carries the model version
+(version_fn): activating a new model stops serving the previous model's entries, which
+then age out of the LRU. An index built for another version simply never hits. Their
+executive summary is Gemini or template text, so callers also put the GenAI tier in
+the kind (trend_engine._simulation_entry).
+With a shared cache tier (shared_cache.py) enabled, responses are also shared
+between worker processes, and a miss is computed by one worker while the others wait.
+
+On-disk layout (directory):
+- index.json:     {"<version>:<kind>:<seed>": [offset, length], ...}
+- responses.bin:  concatenated JSON documents, read through mmap
+"""
+
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from shared_cache import SharedCache, shared_cache
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: fall back to the stdlib encoder
+    orjson = None
+
+INDEX_FILE = "index.json"
+BLOB_FILE = "responses.bin"
+
+
+def _to_builtin(value):
+    """Convert stray NumPy scalars (e.g. np.float64 risk scores) for the JSON encoder."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_to_builtin)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_to_builtin).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class SimulationCache:
+    """
+    LRU memo of encoded simulation responses with a read-only mmap'd index behind it.
+    Entries are stored as JSON bytes so every hit returns a fresh dict the caller may mutate.
+    """
+
+    def __init__(self, max_entries: int = 4096, index_path: Optional[str] = None,
+                 namespace_fn: Callable[[], str] = lambda: "default",
+                 budget_fn: Optional[Callable[[str], int]] = None,
+                 shared: Optional[SharedCache] = None,
+                 version_fn: Callable[[], Optional[str]] = lambda: None):
+        self.max_entries = max_entries
+        # namespace_fn picks the memo partition for the calling request; budget_fn its byte budget
+        self.namespace_fn = namespace_fn
+        self.budget_fn = budget_fn
+        # version_fn names the model the responses are computed with (part of every key)
+        self.version_fn = version_fn
+        # Cross-worker tier behind the memo and the index (None or disabled: per-process only)
+        self.shared = shared if shared is not None and shared.enabled else None
+        self._memos: Dict[str, "OrderedDict[str, bytes]"] = {}
+        self._memo_bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._blob: Optional[mmap.mmap] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        if index_path:
+            self.load_index(index_path)
+
+    @staticmethod
+    def make_key(kind: str, seed: str, version: Optional[str] = None) -> str:
+        return f"{version}:{kind}:{seed}" if version else f"{kind}:{seed}"
+
+    def _key(self, kind: str, seed: str) -> str:
+        return self.make_key(kind, seed, self.version_fn())
+
+    def load_index(self, index_path: str):
+        """Attach a precomputed index directory. Missing or unreadable indexes are ignored."""
+        try:
+            with open(os.path.join(index_path, INDEX_FILE), "r", encoding="utf-8") as f:
+                index = {k: (v[0], v[1]) for k, v in json.load(f).items()}
+            with open(os.path.join(index_path, BLOB_FILE), "rb") as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if index else None
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Simulation index not loaded from '{index_path}': {e}")
+            return
+        self._index, self._blob = index, blob
+        print(f"[OK] Simulation index loaded: {len(index)} precomputed responses")
+
+    def get(self, kind: str, seed: str) -> Optional[Dict[str, Any]]:
+        return self._get(self.namespace_fn(), self._key(kind, seed))
+
+    def _get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            memo = self._memos.get(namespace)
+            encoded = memo.get(key) if memo is not None else None
+            if encoded is not None:
+                memo.move_to_end(key)
+                self.hits += 1
+                return _loads(encoded)
+
+        location = self._index.get(key)
+        if location is not None:
+            offset, length = location
+            encoded = self._blob[offset:offset + length]
+            self._remember(namespace, key, encoded)
+            with self._lock:
+                self.disk_hits += 1
+            return _loads(encoded)
+        return self._get_shared(namespace, key)
+
+    def _get_shared(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        if self.shared is None:
+            return None
+        encoded = self.shared.get(self._shared_ns(namespace), key)
+        if encoded is None:
+            return None
+        self._remember(namespace, key, encoded)
+        with self._lock:
+            self.shared_hits += 1
+        return _loads(encoded)
+
+    @staticmethod
+    def _shared_ns(namespace: str) -> str:
+        return f"simulation:{namespace}"
+
+    def put(self, kind: str, seed: str, result: Dict[str, Any]):
+        self._put(self.namespace_fn(), self._key(kind, seed), result)
+
+    def _put(self, namespace: str, key: str, result: Dict[str, Any]):
+        encoded = _dumps(result)
+        self._remember(namespace, key, encoded)
+        if self.shared is not None:
+            self.shared.set(self._shared_ns(namespace), key, encoded)
+
+    def get_or_compute(self, kind: str, seed: str, compute: Callable[[], Dict[str, Any]],
+                       cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """`cacheable` vetoes storing a computed result (it is still returned), e.g. a degraded one."""
+        # Key fixed up front: a model swap mid-compute must not file this result under the new version
+        namespace, key = self.namespace_fn(), self._key(kind, seed)
+        cached = self._get(namespace, key)
+        if cached is not None:
+            return cached
+        if self.shared is None:
+            return self._compute(namespace, key, compute, cacheable)
+        # One worker computes the response; the others pick it up from the shared tier
+        with self.shared.lock(self._shared_ns(namespace), key):
+            cached = self._get_shared(namespace, key)
+            if cached is not None:
+                return cached
+            return self._compute(namespace, key, compute, cacheable)
+
+    def _compute(self, namespace: str, key: str, compute: Callable[[], Dict[str, Any]],
+                 cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        with self._lock:
+            self.misses += 1
+        result = compute()
+        if result and (cacheable is None or cacheable(result)):
+            self._put(namespace, key, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memo_entries": sum(len(memo) for memo in self._memos.values()),
+                "index_entries": len(self._index),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+            }
+
+    def namespace_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                namespace: {"entries": len(memo), "bytes": self._memo_bytes[namespace]}
+                for namespace, memo in self._memos.items()
+            }
+
+    def _remember(self, namespace: str, key: str, encoded: bytes):
+        budget = self.budget_fn(namespace) if self.budget_fn is not None else None
+        if budget is not None and len(encoded) > budget:
+            return
+        with self._lock:
+            memo = self._memos.setdefault(namespace, OrderedDict())
+            size = self._memo_bytes.get(namespace, 0)
+            previous = memo.pop(key, None)
+            if previous is not None:
+                size -= len(previous)
+            memo[key] = encoded
+            size += len(encoded)
+            # Evict this namespace's least recently used entries only
+            while len(memo) > self.max_entries or (budget is not None and size > budget):
+                _, evicted = memo.popitem(last=False)
+                size -= len(evicted)
+            self._memo_bytes[namespace] = size
+
+    @staticmethod
+    def write_index(index_path: str, entries: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Materialize (key, response) pairs into an index directory. Returns the entry count."""
+        os.makedirs(index_path, exist_ok=True)
+        index = {}
+        offset = 0
+        with open(os.path.join(index_path, BLOB_FILE), "wb") as blob:
+            for key, result in entries:
+                encoded = _dumps(result)
+                blob.write(encoded)
+                index[key] = [offset, len(encoded)]
+                offset += len(encoded)
+        with open(os.path.join(index_path, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        return len(index)
+
+
+# Global instance (SIMULATION_INDEX points at a directory built by precompute_simulations.py)
+simulation_cache = SimulationCache(
+    max_entries=int(os.getenv("SIMULATION_CACHE_SIZE", "4096")),
+    index_path=os.getenv("SIMULATION_INDEX") or None,
+    shared=shared_cache,
+)
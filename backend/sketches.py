@@ -0,0 +1,168 @@
+"""
+Streaming Sketches for TrendFall AI
+Bounded-memory term statistics over comment streams of any length:
+
+- CountMinSketch: frequency estimate for any term (never under-counts,
+  over-counts by at most ~e/width of the total with high probability).
+- HeavyHitters: Space-Saving / Misra-Gries top-k summary, in its mergeable form
+  so a whole chunk of counts is folded in at once.
+- TermSketch: per-comment n-gram document frequencies over the whole stream and
+  over complaint comments, ranked by how much more often complaints use a term.
+
+Comments are consumed in chunks; only one chunk's distinct n-grams are ever
+held in memory, so 100k+ comment streams never materialize their tokens.
+"""
+
+import heapq
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his i if in into is it
+its just me my no not of on or our out she so than that the their them then there these they this to too up
+us was we were what when which who why will with would you your im i'm it's that's dont don't u ur
+""".split())
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 4096, depth: int = 4, seed: int = 42):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        rng = np.random.default_rng(seed)
+        # Per-row multiply-shift hash parameters (odd multipliers)
+        self._mult = rng.integers(1, 2**63, size=(depth, 1), dtype=np.uint64) | np.uint64(1)
+        self._add = rng.integers(0, 2**63, size=(depth, 1), dtype=np.uint64)
+        self.total = 0
+
+    def _columns(self, terms: Sequence[str]) -> np.ndarray:
+        hashes = np.fromiter((hash(t) for t in terms), dtype=np.int64, count=len(terms)).view(np.uint64)
+        return ((hashes * self._mult + self._add) >> np.uint64(32)) % np.uint64(self.width)
+
+    def update(self, counts: Dict[str, int]):
+        """Add a batch of term counts."""
+        if not counts:
+            return
+        terms = list(counts)
+        values = np.fromiter(counts.values(), dtype=np.int64, count=len(terms))
+        columns = self._columns(terms).astype(np.intp)
+        for row in range(self.depth):
+            np.add.at(self.table[row], columns[row], values)
+        self.total += int(values.sum())
+
+    def estimate(self, terms: Sequence[str]) -> np.ndarray:
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(terms).astype(np.intp)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class HeavyHitters:
+    """Top-k summary of at most `capacity` counters (Space-Saving / Misra-Gries, mergeable form)."""
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.counters: Dict[str, int] = {}
+
+    def update(self, counts: Dict[str, int]):
+        merged = Counter(self.counters)
+        merged.update(counts)
+        if len(merged) > self.capacity:
+            # Subtract the (capacity+1)-th largest count and drop what falls to zero
+            cut = heapq.nlargest(self.capacity + 1, merged.values())[-1]
+            merged = {term: c - cut for term, c in merged.items() if c > cut}
+        self.counters = dict(merged)
+
+    def candidates(self, k: Optional[int] = None) -> List[str]:
+        ranked = sorted(self.counters, key=self.counters.get, reverse=True)
+        return ranked if k is None else ranked[:k]
+
+
+class TermSketch:
+    """
+    n-gram statistics over a comment stream. Counts are per comment (a term repeated
+    within one comment counts once), so they read as "comments mentioning the term".
+    """
+
+    def __init__(self, ngram_range=(1, 2), capacity: int = 256, width: int = 4096, depth: int = 4):
+        self.ngram_range = ngram_range
+        self.all_terms = CountMinSketch(width, depth)
+        self.complaint_terms = CountMinSketch(width, depth, seed=43)
+        self.top = HeavyHitters(capacity)
+        self.top_complaints = HeavyHitters(capacity)
+        self.comments = 0
+        self.complaints = 0
+
+    def ngrams(self, text: str) -> set:
+        tokens = TOKEN_RE.findall(text.lower())
+        grams = set()
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = tokens[i:i + n]
+                # Phrases must start and end on a content word ("too loud" -> "loud")
+                if gram[0] in STOPWORDS or gram[-1] in STOPWORDS:
+                    continue
+                grams.add(" ".join(gram))
+        return grams
+
+    def update(self, comments: Iterable[str], is_complaint, chunk_size: int = 2000):
+        """Stream comments through the sketches, `chunk_size` comments at a time."""
+        chunk_all: Counter = Counter()
+        chunk_complaints: Counter = Counter()
+        pending = 0
+        for comment in comments:
+            grams = self.ngrams(comment)
+            chunk_all.update(grams)
+            self.comments += 1
+            if is_complaint(comment):
+                chunk_complaints.update(grams)
+                self.complaints += 1
+            pending += 1
+            if pending >= chunk_size:
+                self._flush(chunk_all, chunk_complaints)
+                chunk_all, chunk_complaints, pending = Counter(), Counter(), 0
+        self._flush(chunk_all, chunk_complaints)
+
+    def _flush(self, chunk_all: Counter, chunk_complaints: Counter):
+        self.all_terms.update(chunk_all)
+        self.top.update(chunk_all)
+        self.complaint_terms.update(chunk_complaints)
+        self.top_complaints.update(chunk_complaints)
+
+    def top_terms(self, k: int = 10, min_count: int = 2) -> List[Dict[str, Any]]:
+        terms = self.top.candidates()
+        counts = self.all_terms.estimate(terms)
+        ranked = sorted(zip(terms, counts.tolist()), key=lambda tc: tc[1], reverse=True)
+        return [
+            {"term": term, "count": count, "share": round(count / self.comments, 4)}
+            for term, count in ranked[:k] if count >= min_count
+        ]
+
+    def emerging_complaints(self, k: int = 5, min_count: int = 2, min_lift: float = 1.5,
+                            exclude: frozenset = frozenset()) -> List[Dict[str, Any]]:
+        """
+        Terms over-represented in complaint comments: lift = complaint share / overall share.
+        Terms made only of `exclude` words (e.g. the cues that flag a complaint) are skipped.
+        Complaint counts come from the complaint sketch, so they are upper bounds.
+        """
+        if not self.complaints:
+            return []
+        terms = self.top_complaints.candidates()
+        complaint_counts = self.complaint_terms.estimate(terms)
+        overall_counts = np.maximum(self.all_terms.estimate(terms), complaint_counts)
+        results = []
+        for term, c_count, o_count in zip(terms, complaint_counts.tolist(), overall_counts.tolist()):
+            if c_count < min_count or all(t in exclude or t in STOPWORDS for t in term.split()):
+                continue
+            share = c_count / self.complaints
+            lift = share / (o_count / self.comments)
+            if lift >= min_lift or self.complaints == self.comments:
+                results.append({"term": term, "count": c_count, "share": round(share, 4), "lift": round(lift, 2)})
+        results.sort(key=lambda r: (r["count"] * r["lift"], r["count"]), reverse=True)
+        return results[:k]
@@ -0,0 +1,135 @@
+"""
+Snapshot Store for TrendFall AI
+Keeps the view / like / comment counts seen on every poll of a video and turns
+them into real rates for the FeatureEngine:
+
+- engagement_velocity:   fast vs slow EWMA of the engagement rate (likes + comments
+                         per hour), -1 (decelerating) .. 1 (accelerating)
+- engagement_decay_rate: how far the current engagement rate has fallen from its peak, 0..1
+- time_since_peak:       hours since the engagement-rate peak (capped at 24)
+- posting_change:        fast vs slow EWMA of the comment rate, -1 .. 1
+
+Each poll is an O(1) update of a few scalars per video (time-decayed EWMAs with
+alpha = 1 - exp(-dt / tau), a running peak), so cost does not grow with history.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class _VideoState:
+    __slots__ = ("at", "views", "likes", "comments", "samples",
+                 "fast_e", "slow_e", "fast_c", "slow_c", "fast_v", "peak_e", "peak_at")
+
+    def __init__(self, at: float, views: int, likes: int, comments: int):
+        self.at, self.views, self.likes, self.comments = at, views, likes, comments
+        self.samples = 0  # velocity samples (snapshots - 1)
+        self.fast_e = self.slow_e = self.fast_c = self.slow_c = self.fast_v = 0.0
+        self.peak_e = 0.0
+        self.peak_at = at
+
+
+def _relative_change(fast: float, slow: float) -> float:
+    scale = max(fast, slow)
+    return 0.0 if scale <= 0 else max(-1.0, min(1.0, (fast - slow) / scale))
+
+
+class SnapshotStore:
+    def __init__(
+        self,
+        fast_tau_hours: float = 6.0,
+        slow_tau_hours: float = 48.0,
+        min_interval_seconds: float = 60.0,
+        max_videos: int = 100_000
+    ):
+        self.fast_tau = fast_tau_hours
+        self.slow_tau = slow_tau_hours
+        self.min_interval = min_interval_seconds
+        self.max_videos = max_videos
+        self._videos: "OrderedDict[str, _VideoState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._videos)
+
+    def record(self, video_key: str, metadata: dict, at: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Fold one poll of a video's stats into its rolling state and return its dynamics
+        (None until two polls at least `min_interval_seconds` apart have been seen).
+        """
+        if "viewCount" not in metadata:
+            return None
+        at = time.time() if at is None else at
+        views = int(metadata.get("viewCount") or 0)
+        likes = int(metadata.get("likeCount") or 0)
+        comments = int(metadata.get("commentCount") or 0)
+
+        with self._lock:
+            state = self._videos.get(video_key)
+            if state is None:
+                self._videos[video_key] = _VideoState(at, views, likes, comments)
+                if len(self._videos) > self.max_videos:
+                    self._videos.popitem(last=False)
+                return None
+            self._videos.move_to_end(video_key)
+            if at - state.at >= self.min_interval:
+                self._update(state, at, views, likes, comments)
+            return self._dynamics(state, at)
+
+    def dynamics(self, video_key: str, at: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """Current dynamics of a video without recording a poll."""
+        with self._lock:
+            state = self._videos.get(video_key)
+            return None if state is None else self._dynamics(state, time.time() if at is None else at)
+
+    def _update(self, state: _VideoState, at: float, views: int, likes: int, comments: int):
+        dt = (at - state.at) / 3600.0
+        # Counts can dip (spam removal, API lag): treat as no growth rather than negative rates
+        view_rate = max(0, views - state.views) / dt
+        engagement_rate = max(0, (likes + comments) - (state.likes + state.comments)) / dt
+        comment_rate = max(0, comments - state.comments) / dt
+
+        if state.samples == 0:
+            state.fast_e = state.slow_e = engagement_rate
+            state.fast_c = state.slow_c = comment_rate
+            state.fast_v = view_rate
+        else:
+            a_fast = 1.0 - math.exp(-dt / self.fast_tau)
+            a_slow = 1.0 - math.exp(-dt / self.slow_tau)
+            state.fast_e += a_fast * (engagement_rate - state.fast_e)
+            state.slow_e += a_slow * (engagement_rate - state.slow_e)
+            state.fast_c += a_fast * (comment_rate - state.fast_c)
+            state.slow_c += a_slow * (comment_rate - state.slow_c)
+            state.fast_v += a_fast * (view_rate - state.fast_v)
+        if state.fast_e >= state.peak_e:
+            state.peak_e, state.peak_at = state.fast_e, at
+
+        state.at, state.views, state.likes, state.comments = at, views, likes, comments
+        state.samples += 1
+
+    @staticmethod
+    def _dynamics(state: _VideoState, at: float) -> Optional[Dict[str, float]]:
+        if state.samples == 0:
+            return None
+        decay = 1.0 - state.fast_e / state.peak_e if state.peak_e > 0 else 0.0
+        return {
+            "engagement_velocity": round(_relative_change(state.fast_e, state.slow_e), 4),
+            "engagement_decay_rate": round(max(0.0, min(1.0, decay)), 4),
+            "time_since_peak": round(min(24.0, max(0.0, at - state.peak_at) / 3600.0), 2),
+            "posting_change": round(_relative_change(state.fast_c, state.slow_c), 4),
+            "views_per_hour": round(state.fast_v, 1),
+            "snapshots": state.samples + 1,
+        }
+
+
+# Global instance (per worker; every fetched video is a poll)
+snapshot_store = SnapshotStore(
+    fast_tau_hours=float(os.getenv("SNAPSHOT_FAST_TAU_HOURS", "6")),
+    slow_tau_hours=float(os.getenv("SNAPSHOT_SLOW_TAU_HOURS", "48")),
+    min_interval_seconds=float(os.getenv("SNAPSHOT_MIN_INTERVAL", "60")),
+    max_videos=int(os.getenv("SNAPSHOT_MAX_VIDEOS", "100000")),
+)
@@ -0,0 +1,293 @@
+"""
+Source Adapters for TrendFall AI
+Pluggable ingestion: each adapter declares the URL patterns it owns, whether it
+can fetch in batches, its rate limit, and returns normalized SourceItems
+(metadata + comment stream) that the FeatureEngine consumes.
+
+- The router compiles every adapter's patterns into one regex, so routing a plain
+  keyword (no source matches) is a single scan no matter how many sources are
+  registered. Adapters are tried in registration (priority) order: when a lower-
+  priority pattern matches first in the text, only the higher-priority patterns
+  are re-checked.
+- The registry dispatches a mixed batch of inputs: grouped per adapter, chunked
+  to each adapter's batch size, and fetched in parallel.
+- An adapter over its rate limit waits at most SOURCE_THROTTLE_TIMEOUT seconds for
+  tokens, then the fetch fails (RateLimitExceeded) and the engine falls back.
+
+Adding a source:
+
+    class TikTokAdapter(SourceAdapter):
+        name = "tiktok"
+        patterns = (r"tiktok\\.com/@[\\w.]+/video/(?P<id>\\d+)",)
+        rate_limit = 5.0
+
+        def fetch_one(self, key):
+            ...
+            return SourceItem(self.name, key, metadata, comments)
+
+    source_registry.register(TikTokAdapter())
+"""
+
+import contextvars
+import os
+from abc import ABC, abstractmethod
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+ID_GROUP = "(?P<id>"
+THROTTLE_TIMEOUT = float(os.getenv("SOURCE_THROTTLE_TIMEOUT", "10"))
+
+
+class RateLimitExceeded(Exception):
+    """An adapter could not get rate-limit tokens within its throttle timeout."""
+
+
+class SourceItem(NamedTuple):
+    source: str
+    key: str
+    metadata: Dict[str, Any]   # title, viewCount, likeCount, commentCount, publishedAt
+    comments: List[str]
+
+
+class Route(NamedTuple):
+    source: str
+    key: Optional[str]  # None: the input belongs to this source but carries no fetchable ID
+
+
+class RateLimiter:
+    """Token bucket: `rate` calls per second with bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        tokens = min(tokens, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class SourceAdapter(ABC):
+    """Base adapter. Implement fetch_one; also override fetch_batch when the source has a batch API."""
+
+    name = "base"
+    input_type = "url"              # inputType reported in the analysis response
+    patterns: Sequence[str] = ()    # regexes; an `(?P<id>...)` group captures the fetch key
+    supports_batch = False
+    max_batch = 1
+    rate_limit: Optional[float] = None  # API calls per second (None: unlimited)
+    rate_burst: Optional[int] = None
+    throttle_timeout = THROTTLE_TIMEOUT  # seconds to wait for rate-limit tokens before failing
+
+    def __init__(self):
+        self._limiter = RateLimiter(self.rate_limit, self.rate_burst) if self.rate_limit else None
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def throttle(self, calls: int = 1):
+        """Wait for rate-limit tokens; raise RateLimitExceeded rather than block past throttle_timeout."""
+        if self._limiter is not None and not self._limiter.acquire(calls, timeout=self.throttle_timeout):
+            raise RateLimitExceeded(f"{self.name}: no API quota for {calls} call(s) within {self.throttle_timeout:.0f}s")
+
+    def fetch_batch(self, keys: List[str]) -> Dict[str, SourceItem]:
+        """Fetch several keys. Missing keys are simply absent from the result."""
+        items = {}
+        for key in keys:
+            self.throttle()
+            item = self.fetch_one(key)
+            if item is not None:
+                items[key] = item
+        return items
+
+    @abstractmethod
+    def fetch_one(self, key: str) -> Optional[SourceItem]:
+        """Fetch one key (None: not found)."""
+
+
+class YouTubeAdapter(SourceAdapter):
+    name = "youtube"
+    patterns = (
+        # youtube.com watch/embed/shorts/live/v URLs and youtu.be short links
+        r'(?:youtube\.com\/(?:[^\/]+\/.+\/|(?:v|e(?:mbed)?|shorts|live)\/|.*[?&]v=)|youtu\.be\/)(?P<id>[^"&?\/\s]{11})',
+        # Recognized host without a video ID (served by the simulation)
+        r'youtube\.com|youtu\.be',
+    )
+    supports_batch = True
+    max_batch = 50  # videos.list limit
+
+    def __init__(self, client, rate_limit: float = 10.0):
+        self.rate_limit = rate_limit
+        self.rate_burst = max(int(rate_limit * 2), self.max_batch + 1)
+        super().__init__()
+        self.client = client
+
+    @property
+    def available(self) -> bool:
+        return self.client.youtube is not None
+
+    def fetch_one(self, key: str) -> Optional[SourceItem]:
+        return self.fetch_batch([key]).get(key)
+
+    def fetch_batch(self, keys: List[str]) -> Dict[str, SourceItem]:
+        # One videos.list call plus one commentThreads call per video
+        self.throttle(1 + len(keys))
+        fetched = self.client.fetch_videos_by_id(keys) if self.available else {}
+        # Unavailable stats are analysed as empty metadata (historical single-video behaviour)
+        return {
+            key: SourceItem(self.name, key, *fetched.get(key, ({}, [])))
+            for key in keys
+        }
+
+
+class InstagramAdapter(SourceAdapter):
+    """Routes Instagram posts/reels. No public stats API is wired up yet, so nothing is fetched
+    and the engine serves the deterministic Instagram simulation."""
+
+    name = "instagram"
+    input_type = "instagram"
+    patterns = (r'instagram\.com\/(?:(?:p|reels?|tv)\/(?P<id>[\w-]+))?',)
+
+    @property
+    def available(self) -> bool:
+        return False
+
+    def fetch_one(self, key: str) -> Optional[SourceItem]:
+        return None
+
+    def fetch_batch(self, keys: List[str]) -> Dict[str, SourceItem]:
+        return {}
+
+
+class SourceRegistry:
+    def __init__(self, max_workers: int = 8):
+        self._adapters: Dict[str, SourceAdapter] = {}
+        self._router: Optional[re.Pattern] = None
+        self._groups: Dict[str, tuple] = {}
+        self._ordered: List[tuple] = []
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def register(self, adapter: SourceAdapter):
+        """Add (or replace, keeping its priority) an adapter and recompile the router. Earlier adapters win."""
+        with self._lock:
+            adapters = dict(self._adapters)
+            adapters[adapter.name] = adapter
+            self._router, self._groups, self._ordered = self._compile(adapters.values())
+            self._adapters = adapters
+
+    def adapter(self, name: str) -> SourceAdapter:
+        return self._adapters[name]
+
+    @property
+    def source_names(self) -> List[str]:
+        return list(self._adapters)
+
+    @staticmethod
+    def _compile(adapters):
+        parts, groups, ordered = [], {}, []
+        for i, adapter in enumerate(adapters):
+            for j, pattern in enumerate(adapter.patterns):
+                group = f"s{i}_{j}"
+                id_group = f"{group}_id" if ID_GROUP in pattern else None
+                if id_group:
+                    pattern = pattern.replace(ID_GROUP, f"(?P<{id_group}>", 1)
+                part = f"(?P<{group}>{pattern})"
+                parts.append(part)
+                groups[group] = (adapter.name, id_group, len(ordered))
+                # Each pattern alone too, in priority order (for the re-check in route)
+                ordered.append((re.compile(part, re.IGNORECASE), adapter.name, id_group))
+        router = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        return router, groups, ordered
+
+    def route(self, text: str) -> Optional[Route]:
+        """Which source owns `text` (None: plain keyword / unknown)."""
+        router, groups, ordered = self._router, self._groups, self._ordered
+        if router is None or not text:
+            return None
+        match = router.search(text)
+        if match is None:
+            return None
+        # The outer per-pattern group closes last, so lastgroup names the matching pattern.
+        # search() returns the leftmost match, so a higher-priority pattern may still match
+        # further right: re-check only those, in priority order
+        source, id_group, rank = groups[match.lastgroup]
+        for pattern, candidate, candidate_id in ordered[:rank]:
+            earlier = pattern.search(text)
+            if earlier is not None:
+                match, source, id_group = earlier, candidate, candidate_id
+                break
+        return Route(source, match.group(id_group) if id_group else None)
+
+    def fetch(self, routes: List[Route]) -> List[Optional[SourceItem]]:
+        """Fetch a mixed batch of routes: grouped per adapter, chunked, run in parallel. Input order is kept."""
+        by_source: Dict[str, List[str]] = {}
+        for route in routes:
+            if route is not None and route.key is not None and route.source in self._adapters:
+                keys = by_source.setdefault(route.source, [])
+                if route.key not in keys:
+                    keys.append(route.key)
+
+        jobs = []
+        for source, keys in by_source.items():
+            adapter = self._adapters[source]
+            size = adapter.max_batch if adapter.supports_batch else 1
+            for start in range(0, len(keys), size):
+                jobs.append((source, adapter, keys[start:start + size]))
+
+        results: Dict[tuple, SourceItem] = {}
+        if len(jobs) == 1:
+            # Common single-input case: no hop through the pool
+            source, adapter, keys = jobs[0]
+            results.update(((source, k), item) for k, item in adapter.fetch_batch(keys).items())
+        elif jobs:
+            # Jobs run in a copy of the caller's context (per-tenant API metering)
+            futures = [
+                (source, self._get_executor().submit(contextvars.copy_context().run, adapter.fetch_batch, keys))
+                for source, adapter, keys in jobs
+            ]
+            for source, future in futures:
+                try:
+                    results.update(((source, k), item) for k, item in future.result().items())
+                except Exception as e:
+                    print(f"⚠️ Source fetch failed ({source}): {e}")
+
+        return [
+            results.get((route.source, route.key)) if route is not None else None
+            for route in routes
+        ]
+
+    def fetch_keys(self, source: str, keys: List[str]) -> List[SourceItem]:
+        """Fetch known keys from one source (e.g. search results); missing ones are skipped."""
+        items = self.fetch([Route(source, key) for key in keys])
+        return [item for item in items if item is not None]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="sources")
+        return self._executor
+
+
+# Global instance (adapters are registered by trend_engine, which owns the API clients)
+source_registry = SourceRegistry(max_workers=int(os.getenv("SOURCE_FETCH_WORKERS", "8")))
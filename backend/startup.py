@@ -0,0 +1,226 @@
+"""
+Startup Warm-up for TrendFall AI
+Heavy subsystems (model training/loading, SHAP, TextBlob/NLTK, API clients) are
+imported and built lazily on first use. The warm-up task runs them right after
+startup, so the worker answers liveness immediately and reports ready only once
+the expensive first calls have been paid for.
+
+Stages: model -> nlp -> explainer -> ab_split -> similarity -> clients -> pipeline. ab_split
+loads and warms the env-configured A/B candidate (MODEL_AB_VERSION). The similarity
+stage indexes the Feather history (FEATHER_HISTORY_PATH) for /similar. The pipeline stage replays
+a dry-run probe through every analysis stage until its p50 latency stops moving
+(steady state), so a ready worker serves its first real request at warm speed.
+
+Readiness requires every required stage (model, nlp, explainer, pipeline) to have
+succeeded, including a pipeline probe that actually reached steady state; failed
+required stages are retried every WARMUP_RETRY_SECONDS until they pass. Optional
+stages (ab_split, similarity, clients) report their errors without holding readiness back:
+the engine falls back to simulations / templates when an external API is down.
+The probe shares each model version's explainer with live requests; SHAP calls on
+it are serialized (explainability.SerializedExplainer), so they can overlap safely.
+"""
+
+import os
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ensemble import ensemble
+from feather_client import feather
+from feature_engine import ft_engine
+from genai_explainer import genai_explainer
+from ml_model import ml_classifier
+from model_registry import model_registry
+from similarity_index import similarity_index
+from trend_engine import run_warmup_probe, yt_client
+
+
+class WarmupTask:
+    """Ordered warm-up stages run once, with per-stage timings and errors."""
+
+    def __init__(self, retry_seconds: float = 5.0):
+        self.retry_seconds = retry_seconds
+        self._stages: List[Tuple[str, Callable[[], Any], bool]] = []
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.details: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, fn: Callable[[], Any], required: bool = True):
+        self._stages.append((name, fn, required))
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def start(self, background: bool = True):
+        """Run the stages once (in a daemon thread by default). Later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None or self.ready:
+                return
+            self.started_at = time.perf_counter()
+            if background:
+                self._thread = threading.Thread(target=self.run, name="startup-warmup", daemon=True)
+                self._thread.start()
+                return
+        self.run()
+
+    def run(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        pending = list(self._stages)
+        while True:
+            failed = []
+            for name, fn, required in pending:
+                if not self._run_stage(name, fn) and required:
+                    failed.append((name, fn, required))
+            if not failed:
+                break
+            # Stay unready (503) and retry only the required stages that failed
+            print(f"[WARN] Warm-up not ready, retrying {[name for name, _, _ in failed]} "
+                  f"in {self.retry_seconds:.0f}s")
+            time.sleep(self.retry_seconds)
+            pending = failed
+        self.finished_at = time.perf_counter()
+        self._done.set()
+        print(f"[OK] Warm-up complete in {self.finished_at - self.started_at:.2f}s: {self.timings}")
+
+    def _run_stage(self, name: str, fn: Callable[[], Any]) -> bool:
+        stage_start = time.perf_counter()
+        ok = True
+        try:
+            result = fn()
+            if isinstance(result, dict):
+                self.details[name] = result
+            self.errors.pop(name, None)
+        except Exception as e:
+            ok = False
+            self.errors[name] = str(e)
+            print(f"[WARN] Warm-up stage '{name}' failed: {e}")
+        self.timings[name] = round(time.perf_counter() - stage_start, 3)
+        return ok
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.perf_counter()) - self.started_at, 3)
+        return {
+            "ready": self.ready,
+            "started": self.started_at is not None,
+            "elapsed_seconds": elapsed,
+            "stages": [name for name, _, _ in self._stages],
+            "optional_stages": [name for name, _, required in self._stages if not required],
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+            "details": dict(self.details),
+        }
+
+
+def measure_steady_state(probe: Callable[[], Any], window: int = 3, tolerance: float = 0.25,
+                         max_runs: int = 20) -> Dict[str, Any]:
+    """
+    Call `probe` until the p50 latency of the last `window` calls is within `tolerance`
+    of the window before it (the first, cold call is excluded), or `max_runs` is hit.
+    """
+    latencies: List[float] = []
+    steady = False
+    while len(latencies) < max_runs:
+        start = time.perf_counter()
+        probe()
+        latencies.append((time.perf_counter() - start) * 1000)
+        if len(latencies) > 2 * window:
+            recent = statistics.median(latencies[-window:])
+            previous = statistics.median(latencies[-2 * window:-window])
+            if abs(recent - previous) <= tolerance * previous:
+                steady = True
+                break
+    warm = latencies[1:] or latencies
+    return {
+        "first_call_ms": round(latencies[0], 1),
+        "p50_ms": round(statistics.median(warm), 1),
+        "p50_recent_ms": round(statistics.median(latencies[-window:]), 1),
+        "runs": len(latencies),
+        "steady": steady,
+    }
+
+
+def _warm_model():
+    ml_classifier.ensure_loaded()
+    model_registry.active
+
+
+def _warm_nlp():
+    # First TextBlob call imports nltk and loads the sentiment lexicon
+    ft_engine.compute_signals({"viewCount": 1000, "likeCount": 10}, ["warm up"])
+
+
+def _warm_explainer():
+    model_registry.active.warm()
+
+
+def _apply_ab_split():
+    version = os.getenv("MODEL_AB_VERSION")
+    if not version:
+        return {"configured": False}
+    model_registry.set_split(version, float(os.getenv("MODEL_AB_FRACTION", "0.1")))
+    status = model_registry.status()
+    return {"candidate": status["candidate"], "fraction": status["candidate_fraction"]}
+
+
+def _load_similarity_index():
+    # Score historical vectors with the current ensemble so neighbours carry a risk, and
+    # attach recorded outcomes (SIMILARITY_OUTCOMES: request_id, decline CSV) for calibration
+    if not feather.history_path or not os.path.exists(feather.history_path):
+        return {"vectors": len(similarity_index), "history": None}
+    loaded = similarity_index.load_history(
+        feather.history_path,
+        risk_fn=lambda features: ensemble.score_batch(features)["risk_score"],
+        outcomes_path=os.getenv("SIMILARITY_OUTCOMES") or None,
+    )
+    return {"history": feather.history_path, "loaded": loaded, **similarity_index.stats()}
+
+
+def _check_clients():
+    # One authenticated round trip per API (YouTube: 1 quota unit, Gemini: model metadata, free)
+    status = {}
+    for name, ping in (("youtube", yt_client.ping), ("gemini", genai_explainer.ping)):
+        try:
+            ping()
+            status[name] = "ok"
+        except Exception as e:
+            status[name] = f"unavailable: {e}"
+    if any(value != "ok" for value in status.values()):
+        raise RuntimeError(f"external APIs degraded (engine will fall back): {status}")
+    return status
+
+
+def _warm_pipeline():
+    result = measure_steady_state(
+        run_warmup_probe,
+        window=int(os.getenv("WARMUP_WINDOW", "3")),
+        tolerance=float(os.getenv("WARMUP_TOLERANCE", "0.25")),
+        max_runs=int(os.getenv("WARMUP_MAX_RUNS", "20")),
+    )
+    if not result["steady"]:
+        raise RuntimeError(f"probe latency did not settle within {result['runs']} runs "
+                           f"(p50 {result['p50_recent_ms']} ms)")
+    return result
+
+
+# Global instance
+warmup = WarmupTask(retry_seconds=float(os.getenv("WARMUP_RETRY_SECONDS", "5")))
+warmup.add_stage("model", _warm_model)
+warmup.add_stage("nlp", _warm_nlp)
+warmup.add_stage("explainer", _warm_explainer)
+warmup.add_stage("ab_split", _apply_ab_split, required=False)
+warmup.add_stage("similarity", _load_similarity_index, required=False)
+warmup.add_stage("clients", _check_clients, required=False)
+warmup.add_stage("pipeline", _warm_pipeline)
@@ -0,0 +1,236 @@
+"""
+Tenant Isolation for TrendFall AI
+One backend serves several brand teams; each request is attributed to a tenant
+and held to that tenant's quotas before it may queue for a global admission slot.
+The tenant comes from the request's X-API-Key (keys are configured per tenant);
+requests without a key are served as the shared "default" tenant. A client-chosen
+X-Tenant-ID is only trusted with TENANT_STRICT=0 (single-team / trusted-proxy setups),
+since otherwise a client could rotate IDs around its quota or spend another team's.
+
+- max_concurrent: analyses in flight for the tenant (429 beyond it; 0: unlimited)
+- rate_limit / rate_burst: token bucket on requests per second (429 when empty; 0: unlimited)
+- cache_bytes: memory budget of the tenant's namespace in the response caches
+
+Anonymous traffic (the "default" tenant) is NOT throttled unless configured: the
+TENANT_* quotas apply to keyed tenants only, so enabling tenants does not start
+rejecting clients that never sent a key. Limit it explicitly, e.g.
+TENANTS='{"default": {"max_concurrent": 8, "rate_limit": 5}}'.
+
+Usage is metered per tenant: requests, rejections, CPU and wall time of the
+analysis, and external API calls / quota units (YouTube Data API, Gemini).
+
+Quotas default from TENANT_* env vars; TENANTS holds per-tenant overrides and keys
+as JSON, e.g. {"brand-a": {"api_key": "...", "max_concurrent": 8, "rate_limit": 5}}.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from admission import AdmissionRejected
+from sources import RateLimiter
+
+DEFAULT_TENANT = "default"
+TENANT_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# YouTube Data API quota cost per method (everything else costs 1)
+YOUTUBE_UNITS = {"youtube.search.list": 100}
+
+_current_tenant: ContextVar[str] = ContextVar("tenant", default=DEFAULT_TENANT)
+
+
+def current_tenant() -> str:
+    """Tenant of the request being served on this thread / task."""
+    return _current_tenant.get()
+
+
+class TenantSpec(NamedTuple):
+    name: str
+    max_concurrent: int
+    rate_limit: float      # requests per second
+    rate_burst: int
+    cache_bytes: int       # per-namespace cache budget
+
+
+class TenantUsage:
+    def __init__(self):
+        self.requests = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.api_calls: Counter = Counter()
+        self.api_units: Counter = Counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "api_calls": dict(self.api_calls),
+            "api_units": dict(self.api_units),
+        }
+
+
+class TenantRegistry:
+    def __init__(self, default: TenantSpec, overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+                 strict: bool = True, max_tenants: int = 1000, api_keys: Optional[Dict[str, str]] = None):
+        self.default = default
+        self.strict = strict
+        self.max_tenants = max_tenants
+        self._specs: Dict[str, TenantSpec] = {}
+        for name, values in (overrides or {}).items():
+            self._specs[name] = default._replace(name=name, **values)
+        self._specs.setdefault(DEFAULT_TENANT, default)
+        # sha256(api key) -> tenant; raw keys are never kept
+        self._keys: Dict[str, str] = {_key_digest(key): name for key, name in (api_keys or {}).items()}
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._usage: Dict[str, TenantUsage] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, tenant_id: Optional[str], api_key: Optional[str] = None) -> str:
+        """
+        Tenant of a request. X-API-Key decides (403 if unknown, or if X-Tenant-ID names a
+        different tenant); no key: the default tenant. Only with strict=False is a bare
+        X-Tenant-ID trusted.
+        """
+        if api_key:
+            name = self._keys.get(_key_digest(api_key))
+            if name is None:
+                raise AdmissionRejected(403, "Invalid API key")
+            if tenant_id and tenant_id != name:
+                raise AdmissionRejected(403, f"API key does not belong to tenant '{tenant_id[:64]}'")
+            return name
+        if not tenant_id or tenant_id == DEFAULT_TENANT:
+            return DEFAULT_TENANT
+        if self.strict:
+            raise AdmissionRejected(403, "X-Tenant-ID requires the tenant's X-API-Key")
+        if not TENANT_ID_RE.match(tenant_id):
+            raise AdmissionRejected(403, f"Unknown tenant '{tenant_id[:64]}'")
+        if tenant_id not in self._specs and tenant_id not in self._usage and len(self._usage) >= self.max_tenants:
+            return DEFAULT_TENANT  # bound per-tenant state; overflow shares the default quotas
+        return tenant_id
+
+    def spec(self, name: str) -> TenantSpec:
+        spec = self._specs.get(name)
+        return spec if spec is not None else self.default._replace(name=name)
+
+    def cache_budget(self, name: str) -> int:
+        return self.spec(name).cache_bytes
+
+    def usage(self, name: str) -> TenantUsage:
+        usage = self._usage.get(name)
+        if usage is None:
+            with self._lock:
+                usage = self._usage.setdefault(name, TenantUsage())
+        return usage
+
+    def _limiter(self, spec: TenantSpec) -> RateLimiter:
+        limiter = self._limiters.get(spec.name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(spec.name, RateLimiter(spec.rate_limit, spec.rate_burst))
+        return limiter
+
+    @asynccontextmanager
+    async def admit(self, name: str):
+        """Enforce the tenant's rate and concurrency quotas (event loop side, never waits)."""
+        spec, usage = self.spec(name), self.usage(name)
+        if spec.rate_limit > 0 and not self._limiter(spec).acquire(timeout=0):
+            usage.rejected += 1
+            raise AdmissionRejected(429, f"Tenant '{name}' rate limit exceeded",
+                                    max(1, math.ceil(1 / spec.rate_limit)))
+        if spec.max_concurrent > 0 and usage.in_flight >= spec.max_concurrent:
+            usage.rejected += 1
+            raise AdmissionRejected(429, f"Tenant '{name}' has {spec.max_concurrent} analyses in flight", 1)
+        usage.in_flight += 1
+        try:
+            yield spec
+        finally:
+            usage.in_flight -= 1
+
+    @contextmanager
+    def activate(self, name: str):
+        """Run the block as `name` (caches, API metering) and meter its CPU / wall time."""
+        token = _current_tenant.set(name)
+        cpu_start, wall_start = time.thread_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            cpu, wall = time.thread_time() - cpu_start, time.perf_counter() - wall_start
+            _current_tenant.reset(token)
+            usage = self.usage(name)
+            with self._lock:
+                usage.requests += 1
+                usage.cpu_seconds += cpu
+                usage.wall_seconds += wall
+
+    def record_api_call(self, service: str, method: Optional[str] = None, units: Optional[int] = None):
+        """Charge an external API call to the current tenant."""
+        if units is None:
+            units = YOUTUBE_UNITS.get(method, 1) if service == "youtube" else 1
+        usage = self.usage(current_tenant())
+        with self._lock:
+            usage.api_calls[service] += 1
+            usage.api_units[service] += units
+
+    def status(self) -> Dict[str, Any]:
+        names = sorted(set(self._specs) | set(self._usage))
+        return {
+            "strict": self.strict,
+            "tenants": {
+                name: {"quota": self.spec(name)._asdict(), "usage": self.usage(name).to_dict()}
+                for name in names
+            },
+        }
+
+
+def _key_digest(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _load_overrides(spec: Optional[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """TENANTS JSON -> (quota overrides per tenant, {api_key: tenant})."""
+    if not spec:
+        return {}, {}
+    try:
+        overrides = json.loads(spec)
+        quotas = {
+            name: {k: v for k, v in dict(values).items() if k in TenantSpec._fields and k != "name"}
+            for name, values in overrides.items()
+        }
+        keys = {str(values["api_key"]): name for name, values in overrides.items() if values.get("api_key")}
+        return quotas, keys
+    except (ValueError, AttributeError, TypeError):
+        print("[WARN] Ignoring invalid TENANTS config")
+        return {}, {}
+
+
+_overrides, _api_keys = _load_overrides(os.getenv("TENANTS"))
+# Anonymous requests were unthrottled before tenants existed: no default-tenant quotas unless TENANTS sets them
+_overrides[DEFAULT_TENANT] = {"max_concurrent": 0, "rate_limit": 0.0, **_overrides.get(DEFAULT_TENANT, {})}
+
+
+# Global instance
+tenant_registry = TenantRegistry(
+    default=TenantSpec(
+        name=DEFAULT_TENANT,
+        max_concurrent=int(os.getenv("TENANT_MAX_CONCURRENT", "8")),
+        rate_limit=float(os.getenv("TENANT_RATE_LIMIT", "5")),
+        rate_burst=int(os.getenv("TENANT_RATE_BURST", "20")),
+        cache_bytes=int(os.getenv("TENANT_CACHE_BYTES", str(16 * 1024 * 1024))),
+    ),
+    overrides=_overrides,
+    strict=os.getenv("TENANT_STRICT", "1") == "1",
+    api_keys=_api_keys,
+)
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import AdmissionController, AdmissionRejected, Lane, StageLimiter
+
+
+def _controller(max_concurrent=1, queue=1, wait=0.05):
+    return AdmissionController(max_concurrent, [
+        Lane("interactive", 0, queue, wait),
+        Lane("watchlist", 1, queue, wait),
+    ])
+
+
+async def _hold(controller, lane, release: asyncio.Event, order=None):
+    async with controller.admit(lane):
+        if order is not None:
+            order.append(lane)
+        await release.wait()
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = _controller(queue=0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "interactive", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("interactive"):
+                pass
+        release.set()
+        await holder
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+    assert controller.rejected == {429: 1, 503: 0}
+    assert controller.status()["in_flight"] == 0
+
+
+def test_queued_request_times_out_with_503():
+    async def scenario():
+        controller = _controller(wait=0.02)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "interactive", release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit("interactive"):
+                pass
+        assert controller.status()["queued"]["interactive"] == 0
+        release.set()
+        await holder
+        return controller, rejected.value
+
+    controller, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert controller.rejected[503] == 1
+    assert controller.status()["in_flight"] == 0
+
+
+def test_freed_slot_goes_to_the_higher_priority_lane():
+    async def scenario():
+        controller = _controller(wait=1.0)
+        order = []
+        first = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, "interactive", first))
+        await asyncio.sleep(0)
+        release = asyncio.Event()
+        release.set()
+        watchlist = asyncio.create_task(_hold(controller, "watchlist", release, order))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(_hold(controller, "interactive", release, order))
+        await asyncio.sleep(0)
+        first.set()
+        await asyncio.gather(holder, watchlist, interactive)
+        return controller, order
+
+    controller, order = asyncio.run(scenario())
+    assert order == ["interactive", "watchlist"]
+    assert controller.admitted == 3 and controller.status()["in_flight"] == 0
+
+
+def test_stage_limiter_rejects_with_503_when_saturated():
+    limiter = StageLimiter({"cpu": 1}, timeout=0.01)
+    entered, release = threading.Event(), threading.Event()
+
+    def hold():
+        with limiter.limit("cpu"):
+            entered.set()
+            release.wait()
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    entered.wait()
+    try:
+        with pytest.raises(AdmissionRejected) as rejected:
+            with limiter.limit("cpu"):
+                pass
+        with limiter.limit("unlimited"):
+            pass
+    finally:
+        release.set()
+        worker.join()
+    assert rejected.value.status_code == 503
+    with limiter.limit("cpu"):
+        pass
+
+
+def test_analyze_sheds_with_retry_after(monkeypatch):
+    monkeypatch.setattr(main, "admission", _controller(max_concurrent=0, queue=0))
+    response = TestClient(main.app).post("/analyze", json={"topic": "fidget spinners"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
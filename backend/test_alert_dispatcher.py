@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from alert_dispatcher import AlertDispatcher
+from alert_sink import AlertSink
+
+
+@pytest.fixture
+def sink():
+    sink = AlertSink(("127.0.0.1", 0))
+    thread = threading.Thread(target=sink.serve_forever, daemon=True)
+    thread.start()
+    yield sink
+    sink.shutdown()
+    sink.server_close()
+
+
+def _dispatcher(sink, **kwargs):
+    kwargs = {"batch_window": 0.05, "backoff": 0.01, **kwargs}
+    return AlertDispatcher([f"http://127.0.0.1:{sink.server_address[1]}/alerts"], **kwargs)
+
+
+def _event(i, trend="t"):
+    return {"type": "lifecycle_change", "trend": trend, "from": "Peak", "to": f"stage{i}"}
+
+
+def _wait_idle(dispatcher, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while dispatcher.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert dispatcher.pending() == 0
+
+
+def _received(sink):
+    return [alert["to"] for batch in sink.batches for alert in batch["alerts"]]
+
+
+def test_alerts_are_batched(sink):
+    dispatcher = _dispatcher(sink, batch_size=4, batch_window=0.5)
+    for i in range(10):
+        assert dispatcher.emit(_event(i))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    assert sorted(_received(sink)) == sorted(f"stage{i}" for i in range(10))
+    assert [len(batch["alerts"]) for batch in sink.batches] == [4, 4, 2]
+
+
+def test_503_is_retried_after_the_servers_delay(sink):
+    sink.fail_first, sink.retry_after = 2, "0.2"
+    dispatcher = _dispatcher(sink)
+    start = time.monotonic()
+    dispatcher.emit(_event(0))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    stats = dispatcher.status()["endpoints"]
+    assert list(stats.values())[0]["retries"] == 2 and _received(sink) == ["stage0"]
+    assert time.monotonic() - start >= 0.4  # Retry-After honoured twice, not the 10 ms backoff
+
+
+def test_retry_after_is_capped(sink):
+    sink.fail_first, sink.retry_after = 1, "3600"
+    dispatcher = _dispatcher(sink, max_backoff=0.1)
+    start = time.monotonic()
+    dispatcher.emit(_event(0))
+    _wait_idle(dispatcher, timeout=5.0)
+    dispatcher.stop()
+    assert _received(sink) == ["stage0"] and time.monotonic() - start < 2.0
+
+
+def test_duplicates_are_sent_once(sink):
+    dispatcher = _dispatcher(sink)
+    assert dispatcher.emit(_event(0))
+    assert not dispatcher.emit(_event(0))
+    assert dispatcher.emit(_event(0, trend="other"))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    assert len(_received(sink)) == 2 and dispatcher.deduped == 1
+
+
+def test_in_flight_batches_per_endpoint_are_capped(sink):
+    sink.slow = 0.2
+    dispatcher = _dispatcher(sink, batch_size=1, concurrency=2)
+    for i in range(6):
+        dispatcher.emit(_event(i))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    assert len(sink.batches) == 6 and sink.max_concurrent == 2
+
+
+def test_emit_does_not_block_on_a_full_queue(sink):
+    sink.slow = 0.3
+    dispatcher = _dispatcher(sink, batch_size=1, concurrency=1, max_queue=1)
+    start = time.monotonic()
+    for i in range(20):
+        dispatcher.emit(_event(i))
+    assert time.monotonic() - start < 0.25  # less than one delivery
+    _wait_idle(dispatcher)
+    stats = list(dispatcher.status()["endpoints"].values())[0]
+    delivered = set(_received(sink))
+    assert stats["dropped"] == 20 - len(delivered) > 0
+
+    # Dropped alerts were never sent, so they are not deduplicated when raised again
+    sink.slow = 0
+    dropped = next(i for i in range(20) if f"stage{i}" not in delivered)
+    sent = next(i for i in range(20) if f"stage{i}" in delivered)
+    assert dispatcher.emit(_event(dropped))
+    assert not dispatcher.emit(_event(sent))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    assert f"stage{dropped}" in _received(sink)
+
+
+def test_each_post_thread_has_its_own_session(sink):
+    sink.slow = 0.1
+    dispatcher = _dispatcher(sink, batch_size=1, concurrency=3)
+    sessions = set()
+    post = dispatcher._post
+
+    def record(url, payload):
+        sessions.add((threading.get_ident(), id(dispatcher._local.session)))
+        return post(url, payload)
+
+    dispatcher._post = record
+    for i in range(9):
+        dispatcher.emit(_event(i))
+    _wait_idle(dispatcher)
+    dispatcher.stop()
+    threads = {ident for ident, _ in sessions}
+    assert len({session for _, session in sessions}) == len(threads) > 1
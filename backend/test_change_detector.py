@@ -0,0 +1,84 @@
+import numpy as np
+
+from change_detector import ChangeMonitor, SeriesSpec
+
+SERIES = [SeriesSpec("sentiment", -1, 0.05), SeriesSpec("risk", 1, 2.0)]
+
+
+def _feed(monitor, key, series, values, start=0):
+    alerts = []
+    for t, value in enumerate(values, start=start):
+        alerts += monitor.update(key, {series: float(value)}, at=float(t))
+    return alerts
+
+
+def test_stable_series_rarely_alerts():
+    # CUSUM trades detection delay against false alarms: with k=0.5, h=5 the in-control
+    # run length is in the thousands of samples (vs. a few samples to catch a 2-sigma drop)
+    monitor = ChangeMonitor(SERIES)
+    rng = np.random.default_rng(0)
+    alarms = sum(len(_feed(monitor, f"stable{i}", "sentiment", rng.normal(0.4, 0.05, 500))) for i in range(20))
+    assert 20 * 500 / max(alarms, 1) > 500
+
+
+def test_moderate_decline_is_caught_within_a_few_samples():
+    monitor = ChangeMonitor(SERIES)
+    rng = np.random.default_rng(4)
+    delays = []
+    for i in range(20):
+        values = np.concatenate([rng.normal(0.4, 0.05, 50), rng.normal(0.3, 0.05, 30)])
+        alerts = [a for a in _feed(monitor, f"trend{i}", "sentiment", values) if a["detected_at"] >= 50]
+        assert alerts, f"decline in trend{i} missed"
+        delays.append(alerts[0]["detected_at"] - 50)
+    assert np.mean(delays) <= 5 and max(delays) <= 10
+
+
+def test_step_decline_is_detected_quickly_with_its_start():
+    monitor = ChangeMonitor(SERIES)
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(0.4, 0.05, 50), rng.normal(0.1, 0.05, 50)])
+    alerts = _feed(monitor, "trend", "sentiment", values)
+    assert len(alerts) == 1  # the baseline is re-learned after an alert
+    alert = alerts[0]
+    assert alert["series"] == "sentiment" and alert["trend"] == "trend"
+    assert 50 <= alert["detected_at"] <= 55
+    assert 48 <= alert["decline_started_at"] <= 50
+    assert alert["baseline"] > alert["value"]
+
+
+def test_only_the_decline_direction_alerts():
+    monitor = ChangeMonitor(SERIES)
+    rng = np.random.default_rng(2)
+    # Sentiment improving and risk falling are not declines
+    assert _feed(monitor, "up", "sentiment", np.concatenate([rng.normal(0.0, 0.05, 30), rng.normal(0.6, 0.05, 30)])) == []
+    assert _feed(monitor, "up", "risk", np.concatenate([rng.normal(80, 2, 30), rng.normal(40, 2, 30)])) == []
+    assert len(_feed(monitor, "down", "risk", np.concatenate([rng.normal(40, 2, 30), rng.normal(80, 2, 30)]))) == 1
+
+
+def test_slow_drift_is_absorbed_by_the_baseline():
+    monitor = ChangeMonitor(SERIES)
+    drift = np.linspace(0.4, 0.3, 400) + np.random.default_rng(3).normal(0, 0.03, 400)
+    assert _feed(monitor, "drift", "sentiment", drift) == []
+
+
+def test_flat_baseline_uses_the_spread_floor():
+    monitor = ChangeMonitor(SERIES)
+    # A perfectly flat baseline has zero variance: a tiny wobble must not alert
+    assert _feed(monitor, "flat", "risk", [50.0] * 10 + [51.0] * 20) == []
+
+
+def test_listeners_get_alerts_and_failures_are_contained():
+    monitor = ChangeMonitor(SERIES, min_samples=5)
+    received = []
+    monitor.subscribe(lambda alert: 1 / 0)
+    monitor.subscribe(received.append)
+    alerts = _feed(monitor, "trend", "risk", [40, 41, 39, 40, 40] + [90] * 5)
+    assert alerts and received == alerts
+    assert monitor.recent(trend_key="trend") == alerts[::-1]
+
+
+def test_trend_state_is_bounded():
+    monitor = ChangeMonitor(SERIES, max_trends=3)
+    for i in range(10):
+        monitor.update(f"t{i}", {"risk": 50.0}, at=0.0)
+    assert monitor.status()["trends"] == 3
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+import genai_explainer as genai_module
+from genai_explainer import GenAIExplainer
+from youtube_client import YouTubeClient
+
+
+def _first_access_from(n, get):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def run(i):
+        barrier.wait()
+        results[i] = get()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow_factory(calls):
+    def build(*args, **kwargs):
+        calls.append(1)
+        time.sleep(0.05)  # wide window for a check-then-set race
+        return object()
+    return build
+
+
+def test_youtube_service_is_built_once(monkeypatch):
+    discovery = pytest.importorskip("googleapiclient.discovery")
+    calls = []
+    monkeypatch.setattr(discovery, "build", _slow_factory(calls))
+    monkeypatch.setenv("YOUTUBE_API_KEY", "test-key")
+    client = YouTubeClient()
+    services = _first_access_from(8, lambda: client.youtube)
+    assert len(calls) == 1
+    assert all(service is services[0] is not None for service in services)
+
+
+def test_gemini_model_is_configured_once(monkeypatch):
+    genai = pytest.importorskip("google.generativeai")
+    calls = []
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: None)
+    monkeypatch.setattr(genai, "GenerativeModel", _slow_factory(calls))
+    monkeypatch.setattr(genai_module, "load_dotenv", lambda **kwargs: None)
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key-123456")
+    explainer = GenAIExplainer()
+    models = _first_access_from(8, lambda: explainer.model)
+    # Nobody sees a half-configured explainer (None while another thread is still configuring)
+    assert len(calls) == 1
+    assert all(model is models[0] is not None for model in models)
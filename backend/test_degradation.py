@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+import pytest
+
+from degradation import DegradationPolicy, StagePolicy
+from feature_schema import feature_schema
+from genai_explainer import GenAIExplainer
+from ml_model import ml_classifier
+
+STAGES = [
+    StagePolicy("xai", ("shap", "linear", "rule-based"), 500.0),
+    StagePolicy("genai", ("gemini", "cached", "template"), 2500.0),
+]
+
+
+def _policy(load=0.0, **kwargs):
+    current = {"load": load}
+    policy = DegradationPolicy(STAGES, load_fn=lambda: current["load"], **kwargs)
+    return policy, current
+
+
+@pytest.mark.parametrize("load, xai, genai", [
+    (0.5, "shap", "gemini"),
+    (0.75, "linear", "cached"),
+    (0.9, "linear", "cached"),
+    (1.0, "rule-based", "template"),
+    (3.0, "rule-based", "template"),
+])
+def test_tiers_step_down_with_load(load, xai, genai):
+    policy, _ = _policy(load)
+    assert policy.select() == {"xai": xai, "genai": genai}
+
+
+def test_slow_full_tier_steps_only_that_stage_down():
+    policy, _ = _policy()
+    policy.record("xai", "shap", 600.0)      # over budget
+    assert policy.select() == {"xai": "linear", "genai": "gemini"}
+    for _ in range(10):
+        policy.record("xai", "shap", 1500.0)  # EWMA over twice the budget
+    assert policy.select()["xai"] == "rule-based"
+    # Degraded runs are fast by construction and must not mask the full tier's latency
+    policy.record("xai", "linear", 1.0)
+    assert policy.select()["xai"] == "rule-based"
+
+
+def test_load_and_latency_take_the_worse_level():
+    policy, current = _policy(0.8)
+    policy.record("genai", "gemini", 6000.0)
+    assert policy.select() == {"xai": "linear", "genai": "template"}
+    current["load"] = 0.0
+    assert policy.select() == {"xai": "shap", "genai": "template"}
+
+
+def test_stale_latency_is_probed_again():
+    policy, _ = _policy(recovery_seconds=0.05)
+    policy.record("xai", "shap", 5000.0)
+    assert policy.select()["xai"] == "rule-based"
+    time.sleep(0.1)
+    assert policy.select()["xai"] == "shap"
+
+
+def test_disabled_policy_always_serves_full_tiers():
+    policy, _ = _policy(5.0, enabled=False)
+    policy.record("xai", "shap", 5000.0)
+    assert policy.select() == policy.full_tiers() == {"xai": "shap", "genai": "gemini"}
+
+
+def test_genai_tiers_fall_back_gemini_cached_template(monkeypatch):
+    class Gemini:
+        class Response:
+            text = "Live summary."
+
+        def generate_content(self, prompt):
+            return self.Response()
+
+    explainer = GenAIExplainer()
+    explainer.model = Gemini()
+    drivers = [{"label": "Audience Fatigue", "contribution": 0.4}]
+    args = (82.0, drivers, "Decay", False)
+    # Nothing cached yet: the cached tier serves the template
+    assert explainer.generate_summary_for_tier(*args, tier="cached")[1] == "template"
+    assert explainer.generate_summary_for_tier(*args, tier="gemini") == ("Live summary.", "gemini")
+    # Same risk band / stage / drivers: reused without a call
+    assert explainer.generate_summary_for_tier(84.0, drivers, "Decay", False, tier="cached") == ("Live summary.", "cached")
+    summary, tier = explainer.generate_summary_for_tier(*args, tier="template")
+    assert tier == "template" and summary != "Live summary."
+
+
+def test_linear_attribution_agrees_with_shap():
+    pytest.importorskip("shap")
+    from explainability import ExplainabilityLayer
+
+    layer = ExplainabilityLayer()
+    model = ml_classifier.model
+    explainer = layer.build_shap_explainer(model)
+    attribute = layer.build_linear_attributor(model)
+    assert attribute is not None
+
+    rng = np.random.default_rng(0)
+    n = len(feature_schema.model_names)
+    X = rng.uniform(-1, 1, (20, n))
+    linear = attribute(X)
+    exact = np.vstack([explainer.shap_values(X[i:i + 1])[0] for i in range(len(X))])
+
+    # Same direction wherever SHAP attributes a material share of the prediction
+    material = np.abs(exact) > 0.01
+    assert material.sum() > 20
+    assert (np.sign(linear[material]) == np.sign(exact[material])).mean() >= 0.95
+    # Both decompose the same prediction f(x) - base value; the bases differ (sigmoid of the
+    # mean background logit vs the mean background prediction), so the sums differ by a constant
+    f = model.predict_proba(X)[:, 1]
+    assert np.ptp(f - linear.sum(axis=1)) < 1e-9
+    assert f - exact.sum(axis=1) == pytest.approx(np.full(len(X), explainer.expected_value), abs=1e-6)
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("shap")
+
+from explainability import ExplainabilityLayer, SerializedExplainer
+from feature_schema import feature_schema
+from ml_model import ml_classifier
+
+
+def _signals(n):
+    rng = np.random.default_rng(0)
+    return [{name: float(v) for name, v in zip(feature_schema.model_names, rng.uniform(-1, 1, len(feature_schema.model_names)))}
+            for _ in range(n)]
+
+
+def _run_threads(target, n):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def run(i):
+        barrier.wait()
+        results[i] = target(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_shared_explainer_is_safe_under_concurrent_requests():
+    layer = ExplainabilityLayer()
+    explainer = layer.build_shap_explainer(ml_classifier.model)
+    assert isinstance(explainer, SerializedExplainer)
+    signals = _signals(8)
+
+    concurrent = _run_threads(
+        lambda i: layer.generate_shap_explanation(signals[i], ml_classifier.model, explainer), len(signals)
+    )
+
+    assert layer.shap_failures == 0
+    assert all(drivers for drivers in concurrent)
+    # Same attributions as one-at-a-time calls (KernelExplainer is deterministic for one row)
+    for drivers, signal in zip(concurrent, signals):
+        serial = layer.generate_shap_explanation(signal, ml_classifier.model, explainer)
+        assert [d["feature"] for d in drivers] == [d["feature"] for d in serial]
+        assert [d["shap_value"] for d in drivers] == pytest.approx([d["shap_value"] for d in serial], abs=1e-3)
+
+
+def test_calls_through_the_wrapper_never_overlap():
+    active, overlaps = [0], []
+
+    class Probe:
+        expected_value = 0.5
+
+        def shap_values(self, X, **kwargs):
+            active[0] += 1
+            overlaps.append(active[0])
+            threading.Event().wait(0.01)
+            active[0] -= 1
+            return np.zeros_like(X)
+
+    explainer = SerializedExplainer(Probe())
+    _run_threads(lambda i: explainer.shap_values(np.zeros((1, 3))), 8)
+    assert max(overlaps) == 1
+    assert explainer.expected_value == 0.5  # other attributes pass through
+
+
+def test_failures_fall_back_to_rules_and_are_counted():
+    class Broken:
+        def shap_values(self, X, **kwargs):
+            raise IndexError("index 2046 is out of bounds")
+
+    layer = ExplainabilityLayer()
+    signals = {"sentiment_score": -0.6, "comment_fatigue": 0.8}
+    justification = layer.generate_decision_justification(
+        signals, 90.0, ml_classifier.model, SerializedExplainer(Broken())
+    )
+    assert layer.shap_failures == 1
+    assert justification["explanation_method"] == "rule-based"
+    assert justification["primary_driver"] == layer.business_map["sentiment_score"]
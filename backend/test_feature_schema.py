@@ -0,0 +1,65 @@
+import numpy as np
+
+from feature_schema import SignalVector, feature_schema
+
+
+def _signals(seed=0):
+    rng = np.random.default_rng(seed)
+    return {name: float(v) for name, v in zip(feature_schema.names, rng.uniform(-1, 1, len(feature_schema)))}
+
+
+def test_dict_array_round_trip():
+    signals = _signals()
+    values = feature_schema.to_array(signals)
+    assert values.dtype == np.float64 and values.flags.c_contiguous
+    assert feature_schema.to_dict(values) == signals
+
+
+def test_model_array_follows_training_order():
+    signals = _signals(1)
+    model = feature_schema.to_model_array(signals)
+    assert model.tolist() == [signals[name] for name in feature_schema.model_names]
+    assert feature_schema.to_dict(model, feature_schema.model_names) == {
+        name: signals[name] for name in feature_schema.model_names
+    }
+
+
+def test_missing_features_default_to_zero():
+    values = feature_schema.to_array({"sentiment_score": -0.5})
+    assert values[feature_schema.index["sentiment_score"]] == -0.5
+    assert np.count_nonzero(values) == 1
+
+
+def test_signal_vector_round_trip():
+    signals = _signals(2)
+    vector = SignalVector.from_dict(signals)
+    assert vector.to_dict() == signals
+    assert dict(vector.items()) == signals
+    assert vector.sentiment_score == signals["sentiment_score"]
+    assert np.array_equal(vector.model_array(), feature_schema.to_model_array(signals))
+    assert np.array_equal(feature_schema.to_model_array(vector), feature_schema.to_model_array(signals))
+
+
+def test_stacked_rows_round_trip_without_copy():
+    rows = [_signals(seed) for seed in range(4)]
+    matrix = np.stack([feature_schema.to_array(row) for row in rows])
+    vectors = SignalVector.rows(matrix)
+    assert SignalVector.stack(vectors) is matrix
+    assert [v.to_dict() for v in vectors] == rows
+    assert np.array_equal(feature_schema.to_model_matrix(vectors), feature_schema.to_model_matrix(rows))
+
+
+def test_stack_copies_rows_of_a_wider_or_non_contiguous_matrix():
+    n = len(feature_schema)
+    wide = np.random.default_rng(0).uniform(-1, 1, (4, n + 3))
+    for matrix in (wide[:, :n], np.asfortranarray(wide[:, :n])):
+        stacked = SignalVector.stack(SignalVector.rows(matrix))
+        assert stacked.shape == (4, n) and stacked.flags.c_contiguous
+        assert np.array_equal(stacked, matrix)
+
+
+def test_normalize_clips_ranged_features_only():
+    values = np.full(len(feature_schema), 1e6)
+    normalized = feature_schema.normalize(values)
+    assert np.all(normalized[feature_schema.normalized_mask] == 1.0)
+    assert np.all(normalized[~feature_schema.normalized_mask] == 1e6)
@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from ml_model import SPLIT_POINTER, ml_classifier, save_model_artifact, write_pointer
+from model_registry import ModelRegistry
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    save_model_artifact(ml_classifier.model, {"n_samples": 1}, str(tmp_path))
+    return str(tmp_path)
+
+
+def test_split_pointer_propagates_between_workers(model_dir):
+    a, b = ModelRegistry(model_dir=model_dir), ModelRegistry(model_dir=model_dir)
+    candidate = save_model_artifact(ml_classifier.model, {"n_samples": 2}, model_dir)
+    a.publish_split(candidate, 0.25)
+    assert b.reload_if_updated()
+    assert (b.status()["candidate"], b.status()["candidate_fraction"]) == (candidate, 0.25)
+    a.publish_split(None, 0)
+    assert b.reload_if_updated() and b.status()["candidate"] is None
+
+
+@pytest.mark.parametrize("pointer", ["v1 not-a-number", "vMissing 0.5", "../../etc 0.5"])
+def test_malformed_split_pointer_is_reported_not_raised(model_dir, pointer):
+    registry = ModelRegistry(model_dir=model_dir)
+    registry.reload_if_updated()  # settle LATEST first
+    write_pointer(SPLIT_POINTER, pointer, model_dir)
+    assert registry.reload_if_updated() is False
+    assert registry.status()["candidate"] is None
+
+
+def test_watcher_survives_a_failing_poll(model_dir, monkeypatch):
+    registry = ModelRegistry(model_dir=model_dir)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("corrupt artifact")
+        return False
+
+    monkeypatch.setattr(registry, "reload_if_updated", flaky)
+    registry.watch(interval=0.01)
+    deadline = time.monotonic() + 5
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(calls) >= 3 and registry._watcher.is_alive()
+
+
+def test_env_split_is_applied_by_warmup_not_at_import(model_dir):
+    candidate = save_model_artifact(ml_classifier.model, {"n_samples": 3}, model_dir)
+    env = dict(os.environ, MODEL_DIR=model_dir, MODEL_AB_VERSION=candidate, MODEL_AB_FRACTION="0.2",
+               MODEL_RELOAD_INTERVAL="0")
+    script = (
+        "from model_registry import model_registry\n"
+        "from ml_model import ml_classifier\n"
+        "print(model_registry.is_loaded, ml_classifier.is_loaded)\n"
+        "import startup\n"
+        "print(startup._apply_ab_split())\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, timeout=120).stdout.splitlines()
+    assert out[0] == "False False"
+    assert out[-1] == str({"candidate": candidate, "fraction": 0.2})
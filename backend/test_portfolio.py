@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from usp_engine import usp_engine
+
+client = TestClient(app)
+
+
+def test_spend_moves_to_lowest_waste_campaigns():
+    # "a" declines in 2 days at 90% risk, "b" is stable: all of a's spend moves to b (up to 2x)
+    result = usp_engine.optimize_portfolio([1000, 1000], [90, 10], [2, 60])
+    assert result["allocation"].tolist() == [0.0, 2000.0]
+    assert result["waste_rate"][1] == 0.0
+    assert result["expected_waste_after"] == 0.0
+    assert result["expected_saved_value"] == result["expected_waste_before"] > 0
+
+
+def test_budget_is_conserved_within_bounds():
+    rng = np.random.default_rng(7)
+    budget = rng.uniform(100, 5000, 50)
+    lower = budget * 0.2
+    upper = budget * 1.5
+    result = usp_engine.optimize_portfolio(
+        budget, rng.uniform(0, 100, 50), rng.integers(0, 60, 50), min_budget=lower, max_budget=upper
+    )
+    allocation = result["allocation"]
+    assert allocation.sum() == pytest.approx(budget.sum(), abs=0.01 * len(budget))
+    assert np.all(allocation >= np.round(lower, 2) - 0.01) and np.all(allocation <= np.round(upper, 2) + 0.01)
+    assert result["expected_waste_after"] <= result["expected_waste_before"]
+
+
+def test_budget_beyond_capacity_is_reported_unallocated():
+    result = usp_engine.optimize_portfolio([100, 100], [50, 50], [5, 5], total_budget=1000)
+    assert result["allocation"].tolist() == [200.0, 200.0]
+    assert result["unallocated_budget"] == 600.0
+
+
+def test_equal_waste_keeps_input_order():
+    result = usp_engine.optimize_portfolio([100, 100, 100], [0, 0, 0], [30, 30, 30], total_budget=250)
+    assert result["allocation"].tolist() == [200.0, 50.0, 0.0]
+
+
+def test_zero_total_budget_gives_the_floors():
+    result = usp_engine.optimize_portfolio([100, 100], [50, 80], [5, 5], total_budget=0)
+    assert result["allocation"].tolist() == [0.0, 0.0]
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"horizon_days": 0}, "horizon_days"),
+    ({"risk_score": [50, 101]}, "Risk scores"),
+    ({"daily_budget": [-1, 100]}, "negative"),
+    ({"total_budget": -5}, "negative"),
+    ({"min_budget": [150, 150], "total_budget": 200}, "exceed"),
+])
+def test_invalid_inputs_raise(kwargs, message):
+    args = {"daily_budget": [100, 100], "risk_score": [50, 50], "decline_window_days": [5, 5]}
+    args.update(kwargs)
+    with pytest.raises(ValueError, match=message):
+        usp_engine.optimize_portfolio(**args)
+
+
+def _campaign(campaign_id, **overrides):
+    campaign = {"campaign_id": campaign_id, "daily_budget": 1000, "risk_score": 50, "decline_window_days": 10}
+    campaign.update(overrides)
+    return campaign
+
+
+def test_endpoint_returns_plan():
+    response = client.post("/portfolio/optimize", json={"campaigns": [
+        _campaign("a", risk_score=90, decline_window_days=2),
+        _campaign("b", risk_score=10, decline_window_days=60),
+    ]})
+    assert response.status_code == 200
+    actions = {row["campaign_id"]: row["action"] for row in response.json()["plan"]}
+    assert actions == {"a": "STOP", "b": "INCREASE"}
+
+
+@pytest.mark.parametrize("body", [
+    {"campaigns": []},
+    {"campaigns": [_campaign("a")], "horizon_days": 0},
+    {"campaigns": [_campaign("a", risk_score=101)]},
+    {"campaigns": [_campaign("a", risk_score=-1)]},
+    {"campaigns": [_campaign("a", daily_budget=-10)]},
+    {"campaigns": [_campaign("a", min_budget=500, max_budget=100)]},
+    {"campaigns": [_campaign("a")], "total_budget": -1},
+    {"campaigns": [_campaign("a", min_budget=900), _campaign("b", min_budget=900)], "total_budget": 1000},
+])
+def test_endpoint_rejects_invalid_input(body):
+    assert client.post("/portfolio/optimize", json=body).status_code == 422
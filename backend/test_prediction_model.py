@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from feature_schema import feature_schema
+from prediction_model import model
+
+
+def _features(fatigue):
+    # Sentiment -1 normalizes to 0, so risk = 50 + 40 * fatigue_keyword_ratio
+    features = np.zeros((1, len(feature_schema)))
+    features[0, feature_schema.index["comment_sentiment_score"]] = -1.0
+    features[0, feature_schema.index["fatigue_keyword_ratio"]] = fatigue
+    return features
+
+
+@pytest.mark.parametrize("fatigue, window", [
+    (0.6375, "24h"),   # 75.5: above 75 even though it floors to 75
+    (0.625, "48h"),    # exactly 75
+    (-0.2375, "48h"),  # 40.5: above 40 even though it floors to 40
+    (-0.25, "72h"),    # exactly 40
+])
+def test_time_window_uses_the_unfloored_score(fatigue, window):
+    score = float(model.score_batch(_features(fatigue))[0])
+    assert model.time_window(score) == window
+
+
+def test_predict_floors_only_the_reported_risk(monkeypatch):
+    from feather_client import feather
+
+    monkeypatch.setattr(feather, "get_feature_array", lambda request_id: _features(0.6375)[0])
+    assert model.predict("req") == {"declineRisk": 75, "timeWindow": "24h"}
+
+
+def test_scores_are_clipped_not_rounded():
+    scores = model.score_batch(np.vstack([_features(0.6375), _features(5.0), _features(-5.0)]))
+    assert scores.tolist() == pytest.approx([75.5, 100.0, 0.0])
@@ -0,0 +1,100 @@
+import re
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from profiler import ROOT_STAGE, RequestProfiler, profile_stage, tag_request
+
+TOKEN = "s3cret"
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _profile(profiler, profile_id="prof_1", request_id=None):
+    with profiler.profile(profile_id, "topic"):
+        tag_request(request_id)
+        with profile_stage("fetch"):
+            time.sleep(0.03)
+        with profile_stage("xai"):
+            _busy(0.1)
+    return profiler.get(profile_id)
+
+
+@pytest.mark.parametrize("admin_token, header, token, expected", [
+    (None, "1", None, False),       # no token configured: the header is ignored
+    (None, "1", "anything", False),
+    (TOKEN, "1", None, False),      # header without the admin token
+    (TOKEN, "1", "wrong", False),
+    (TOKEN, "1", TOKEN, True),
+    (TOKEN, "yes", TOKEN, True),
+    (TOKEN, "0", TOKEN, False),
+    (TOKEN, None, TOKEN, False),
+])
+def test_should_profile_requires_the_admin_token(admin_token, header, token, expected):
+    assert RequestProfiler(admin_token=admin_token).should_profile(header, token) is expected
+
+
+def test_sampling_applies_without_the_header():
+    assert RequestProfiler(sample_rate=1.0).should_profile(None)
+    assert RequestProfiler(sample_rate=1.0).should_profile("0", "not-the-token")
+
+
+def test_stage_markers_time_each_stage():
+    profile = _profile(RequestProfiler(interval=0.001))
+    stages = {s["stage"]: s for s in profile["stages"]}
+    assert list(stages) == ["fetch", "xai", ROOT_STAGE]
+    assert stages["fetch"]["wallMs"] >= 30 and stages["fetch"]["calls"] == 1
+    assert stages["xai"]["wallMs"] >= 100
+    assert profile["wallMs"] == pytest.approx(sum(s["wallMs"] for s in stages.values()), abs=0.1)
+
+
+def test_stage_markers_are_no_ops_outside_a_profile():
+    with profile_stage("fetch"):
+        tag_request("req_x")
+
+
+def test_collapsed_stacks_are_rooted_at_the_stage():
+    profiler = RequestProfiler(interval=0.001)
+    profile = _profile(profiler)
+    text = profiler.collapsed(profile)
+    lines = text.splitlines()
+    assert profile["samples"] > 10 and text.endswith("\n")
+    # "stage;file:function;... count": the count follows the last space (frames may contain spaces)
+    assert all(re.fullmatch(r"[\w-]+(;[^;]+:[^;]+)+ \d+", line) for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profile["samples"]
+    busy = [line for line in lines if line.rsplit(" ", 1)[0].endswith("test_profiler.py:_busy")]
+    assert busy and all(line.startswith("xai;") for line in busy)
+
+
+def test_profiles_are_found_by_request_id():
+    profiler = RequestProfiler(max_profiles=2)
+    profile = _profile(profiler, "prof_1", request_id="req_1")
+    assert profile["requestId"] == "req_1" and profiler.get("req_1") is profile
+    _profile(profiler, "prof_2")
+    _profile(profiler, "prof_3")
+    assert profiler.get("prof_1") is None and profiler.get("req_1") is None  # evicted with its alias
+
+
+def test_recent_requires_a_positive_limit():
+    profiler = RequestProfiler()
+    for i in range(3):
+        _profile(profiler, f"prof_{i}")
+    assert [p["id"] for p in profiler.recent(2)] == ["prof_2", "prof_1"]
+    assert "collapsed" not in profiler.recent(1)[0]
+    for limit in (0, -1):
+        with pytest.raises(ValueError):
+            profiler.recent(limit)
+
+
+def test_profiles_endpoint_validates_limit(monkeypatch):
+    monkeypatch.setattr(main, "request_profiler", RequestProfiler(admin_token=TOKEN))
+    client = TestClient(main.app)
+    assert client.get("/profiles", params={"limit": 0}, headers={"X-Admin-Token": TOKEN}).status_code == 422
+    assert client.get("/profiles", params={"limit": 1}, headers={"X-Admin-Token": TOKEN}).status_code == 200
+    assert client.get("/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
@@ -0,0 +1,65 @@
+import copy
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from main import AnalysisResponse, fast_analysis_serializer
+from trend_engine import _get_instagram_simulation, _get_simulation_fallback
+
+
+def _fastapi_bytes(result):
+    """What FastAPI sends for `result` through response_model=AnalysisResponse."""
+    app = FastAPI()
+
+    @app.get("/", response_model=AnalysisResponse)
+    def endpoint():
+        return copy.deepcopy(result)
+
+    return TestClient(app).get("/").content
+
+
+def _coerced(result):
+    """Engine result with values pydantic coerces: int floats, float ints, extra keys."""
+    result = copy.deepcopy(result)
+    result["confidence"] = 1
+    result["declineRisk"] = 87.0
+    result["featureBreakdown"] = {k: int(round(v)) for k, v in result["featureBreakdown"].items()}
+    result["insight"]["decline_drivers"][0]["value"] = 30.0
+    result["insight"]["internal_only"] = "dropped"
+    result["debug"] = {"not": "declared"}
+    result["detectedTrend"] = "Café ☕ trend"
+    return result
+
+
+@pytest.mark.parametrize("make", [
+    lambda: _get_simulation_fallback("fidget spinners"),
+    lambda: _get_instagram_simulation("https://www.instagram.com/reel/Cx1abc/"),
+    lambda: _coerced(_get_simulation_fallback("sourdough")),
+])
+def test_fast_serializer_matches_fastapi_bytes(make):
+    result = make()
+    assert fast_analysis_serializer.dumps(result) == _fastapi_bytes(result)
+
+
+def test_optional_fields_default_to_null():
+    result = _get_simulation_fallback("vinyl")
+    for name in ("modelVersion", "requestId", "commentTerms", "alerts", "degradation"):
+        result.pop(name, None)
+    assert fast_analysis_serializer.dumps(result) == _fastapi_bytes(result)
+
+
+def test_missing_required_field_raises():
+    result = _get_simulation_fallback("vinyl")
+    del result["insight"]
+    with pytest.raises(KeyError):
+        fast_analysis_serializer.dumps(result)
+
+
+def test_fractional_int_field_raises_like_pydantic():
+    result = _get_simulation_fallback("vinyl")
+    result["declineRisk"] = 87.5
+    with pytest.raises(ValueError):
+        AnalysisResponse.model_validate(result)
+    with pytest.raises(ValueError):
+        fast_analysis_serializer.dumps(result)
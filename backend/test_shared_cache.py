@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from shared_cache import SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache.db"), max_bytes=1024 * 1024, lease_seconds=5.0)
+
+
+def test_disabled_tier_is_a_no_op():
+    cache = SharedCache(None)
+    cache.set("ns", "k", b"v")
+    assert cache.get("ns", "k") is None
+    assert cache.get_or_compute("ns", "k", lambda: 42) == 42
+    with cache.lock("ns", "k") as held:
+        assert held
+    assert cache.stats() == {"enabled": False}
+
+
+def test_values_ttl_and_delete(cache):
+    cache.set_json("ns", "a", {"x": [1, 2]})
+    cache.set("ns", "short", b"v", ttl=0.05)
+    assert cache.get_json("ns", "a") == {"x": [1, 2]}
+    assert cache.get("ns", "short") == b"v"
+    time.sleep(0.1)
+    assert cache.get("ns", "short") is None
+    cache.delete("ns", "a")
+    assert cache.get("ns", "a") is None
+
+
+def test_eviction_keeps_the_byte_budget(tmp_path):
+    cache = SharedCache(str(tmp_path / "small.db"), max_bytes=10_000)
+    for i in range(50):
+        cache.set("ns", str(i), bytes(1000))
+    stats = cache.stats()
+    assert stats["bytes"] <= 10_000 and stats["evictions"] > 0
+    assert cache.get("ns", "49") is not None
+
+
+def test_lease_is_exclusive_and_times_out(cache):
+    with cache.lock("ns", "k") as held:
+        assert held
+        with cache.lock("ns", "k", timeout=0.05) as second:
+            assert not second  # caller proceeds unlocked after the timeout
+        with cache.lock("ns", "other", timeout=0.05) as other:
+            assert other
+    with cache.lock("ns", "k", timeout=0.05) as again:
+        assert again
+
+
+def test_expired_lease_of_a_crashed_holder_is_taken_over(tmp_path):
+    cache = SharedCache(str(tmp_path / "lease.db"), lease_seconds=0.1)
+    lease = cache.lock("ns", "k")
+    assert lease.__enter__()  # never released, as if the worker died
+    start = time.monotonic()
+    with cache.lock("ns", "k", timeout=2.0) as held:
+        assert held
+    assert time.monotonic() - start < 1.0
+
+
+def test_get_or_compute_runs_once_across_threads(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"ids": ["a", "b"]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("yt", "q", compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"ids": ["a", "b"]}] * 8
+
+
+@pytest.mark.parametrize("value", [[], 0, {}, ""])
+def test_falsy_results_are_cached(cache, value):
+    calls = []
+    compute = lambda: calls.append(1) or value
+    assert cache.get_or_compute("ns", "k", compute) == value
+    assert cache.get_or_compute("ns", "k", compute) == value
+    assert len(calls) == 1
+
+
+def test_none_results_are_not_cached(cache):
+    calls = []
+    compute = lambda: calls.append(1)
+    cache.get_or_compute("ns", "k", compute)
+    cache.get_or_compute("ns", "k", compute)
+    assert len(calls) == 2
+
+
+def _worker(path, marker, queue):
+    cache = SharedCache(path, lease_seconds=5.0)
+
+    def compute():
+        with open(marker, "a") as f:
+            f.write("x")
+        time.sleep(0.2)
+        return ["v1", "v2"]
+
+    queue.put(cache.get_or_compute("proc", "key", compute))
+
+
+def test_get_or_compute_runs_once_across_processes(tmp_path):
+    path, marker = str(tmp_path / "procs.db"), tmp_path / "computes"
+    SharedCache(path)  # create the schema before the workers race
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=_worker, args=(path, str(marker), queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    results = [queue.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    assert marker.read_text() == "x"
+    assert results == [["v1", "v2"]] * 4
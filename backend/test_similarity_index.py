@@ -0,0 +1,124 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from bench_similarity import build_index, measure, random_features
+from feature_schema import feature_schema
+from similarity_index import SimilarityIndex, calibrated_risk, neighbor_predicted_risk
+
+
+def _ids(n, prefix="r"):
+    return [f"{prefix}{i}" for i in range(n)]
+
+
+def test_exact_search_matches_brute_force():
+    index = SimilarityIndex(block_size=1000)  # several blocks, merged top-k
+    features = random_features(5000)
+    index.add(_ids(5000), features)
+    vectors = index.embed_matrix(features)
+    query = index.embed_matrix(random_features(1, seed=3))[0]
+    expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:10]
+    assert [n["id"] for n in index.search(query, 10)] == [f"r{i}" for i in expected]
+
+
+def test_ivf_recall_against_exact():
+    index = build_index(60_000, train_threshold=20_000)
+    assert index.stats()["ivf_lists"] > 0
+    queries = index.embed_matrix(random_features(100, seed=7))
+    _, _, _, recall = measure(index, queries)
+    assert recall >= 0.9
+
+
+def test_incremental_inserts_are_searchable_after_training():
+    index = build_index(20_000, train_threshold=10_000)
+    lists_before = index.stats()["ivf_lists"]
+    assert lists_before > 0
+    features = random_features(50, seed=11)
+    for i, row in enumerate(features):
+        index.add_one(f"new{i}", feature_schema.to_dict(row), risk=50.0)
+    assert index.stats()["trained_at_size"] == 20_000  # appended, not retrained
+    for i, vector in enumerate(index.embed_matrix(features)):
+        assert index.search(vector, 1)[0]["distance"] == 0.0
+        assert any(n["id"] == f"new{i}" for n in index.search(vector, 5))
+
+
+def test_small_threshold_clamps_the_number_of_lists():
+    index = SimilarityIndex(train_threshold=5, background_training=False)
+    index.add(_ids(5), random_features(5))
+    assert 0 < index.stats()["ivf_lists"] <= 5
+    assert len(index.search(index.embed_matrix(random_features(1, seed=2))[0], 3)) == 3
+
+
+def test_training_runs_in_the_background():
+    index = SimilarityIndex(train_threshold=100_000)
+    features = random_features(100_000)
+    index.add(_ids(100_000), features)
+    # add() returned before k-means finished: inserts and searches keep working meanwhile
+    for i in range(100):
+        index.add_one(f"late{i}", feature_schema.to_dict(features[i]))
+    start = time.perf_counter()
+    assert len(index.search(index.embed_matrix(features[:1])[0], 10)) == 10
+    assert (time.perf_counter() - start) < 1.0
+    assert index.wait_for_training(timeout=60)
+    stats = index.stats()
+    assert stats["ivf_lists"] > 0 and not stats["training"]
+    # Rows added during training were caught up into the new lists
+    assert sum(l.size for l in index._lists) == len(index) == 100_100
+
+
+def test_concurrent_inserts_during_training_are_all_indexed():
+    index = SimilarityIndex(train_threshold=30_000)
+    index.add(_ids(30_000), random_features(30_000))
+    extra = random_features(2000, seed=5)
+
+    def insert(offset):
+        for i in range(offset, len(extra), 4):
+            index.add([f"t{i}"], extra[i:i + 1])
+
+    threads = [threading.Thread(target=insert, args=(o,)) for o in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert index.wait_for_training(timeout=60)
+    indexed = np.sort(np.concatenate([l.view for l in index._lists]))
+    assert np.array_equal(indexed, np.arange(len(index)))
+
+
+def test_calibration_uses_recorded_outcomes_not_predictions():
+    neighbors = [
+        {"riskScore": 90.0, "distance": 0.0, "outcome": 0},
+        {"riskScore": 90.0, "distance": 0.0, "outcome": 0},
+        {"riskScore": 10.0, "distance": 0.0, "outcome": 1},
+        {"riskScore": 50.0, "distance": 0.0, "outcome": None},
+    ]
+    assert calibrated_risk(neighbors) == pytest.approx(33.33, abs=0.01)
+    assert neighbor_predicted_risk(neighbors) == 60.0
+    assert calibrated_risk([{"riskScore": 80.0, "distance": 0.1, "outcome": None}]) is None
+
+
+def test_outcomes_are_loaded_from_history(tmp_path):
+    import pandas as pd
+
+    features = random_features(10)
+    history = pd.DataFrame(features, columns=feature_schema.names)
+    history.insert(0, "request_id", _ids(10))
+    history.to_csv(tmp_path / "history.csv", index=False)
+    pd.DataFrame({"request_id": _ids(5), "decline": [1, 0, 1, 0, 1]}).to_csv(tmp_path / "outcomes.csv", index=False)
+
+    index = SimilarityIndex()
+    assert index.load_history(str(tmp_path / "history.csv"), outcomes_path=str(tmp_path / "outcomes.csv")) == 10
+    assert index.stats()["with_outcome"] == 5
+    neighbor = index.search(index.embed_matrix(features[:1])[0], 1)[0]
+    assert neighbor["id"] == "r0" and neighbor["outcome"] == 1
+
+
+def test_query_latency_over_one_million_vectors():
+    # The documented budget: < 10 ms per query at 1M vectors (IVF, nprobe 8)
+    index = build_index(1_000_000, batch=1_000_000)
+    queries = index.embed_matrix(random_features(50, seed=7))
+    p50, p99, _, recall = measure(index, queries)
+    assert p50 < 10.0
+    assert recall >= 0.9
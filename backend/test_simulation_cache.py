@@ -0,0 +1,55 @@
+import pytest
+
+import trend_engine
+from genai_explainer import genai_explainer
+from precompute_simulations import precompute
+from simulation_cache import SimulationCache
+
+YOUTUBE_WITH_INSTAGRAM_TEXT = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&ref=instagram.com"
+
+
+class _FailingGemini:
+    def generate_content(self, prompt):
+        raise RuntimeError("quota exceeded")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = SimulationCache(version_fn=lambda: "v1")
+    monkeypatch.setattr(trend_engine, "simulation_cache", cache)
+    monkeypatch.setattr(genai_explainer, "model", None)
+    return cache
+
+
+def test_precompute_routes_like_the_server(cache, tmp_path):
+    topics = ["fidget spinners", "https://www.instagram.com/reel/Cx1abc/", YOUTUBE_WITH_INSTAGRAM_TEXT]
+    (tmp_path / "topics.txt").write_text("\n".join(topics), encoding="utf-8")
+    precompute(str(tmp_path / "topics.txt"), str(tmp_path / "index"))
+    cache.load_index(str(tmp_path / "index"))
+    cache.version_fn = lambda: trend_engine.ml_classifier.version
+
+    for topic in topics:
+        route = trend_engine.source_registry.route(topic)
+        served = trend_engine._simulate_source(route.source if route else None, topic)
+        assert served["degradation"]["genai"] == "template"
+    # A YouTube URL that merely mentions instagram.com is a keyword simulation on the server
+    assert trend_engine.source_registry.route(YOUTUBE_WITH_INSTAGRAM_TEXT).source == "youtube"
+    assert cache.stats()["disk_hits"] == 3 and cache.stats()["misses"] == 0
+
+
+def test_memo_is_keyed_by_genai_tier(cache, monkeypatch):
+    template = trend_engine._cached_simulation("vinyl")
+    assert cache.get("keyword/template", "vinyl") == template
+
+    # With Gemini configured the template entry is not served; a failed call is not memoized
+    monkeypatch.setattr(genai_explainer, "model", _FailingGemini())
+    degraded = trend_engine._cached_simulation("vinyl")
+    assert degraded["degradation"]["genai"] == "template"
+    assert cache.get("keyword/gemini", "vinyl") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_instagram_variants_share_an_entry(cache):
+    first = trend_engine._simulate_source("instagram", "https://www.instagram.com/reel/Cx1abc/")
+    second = trend_engine._simulate_source("instagram", "https://instagram.com/reel/Cx1abc/?igsh=1")
+    assert first == second and cache.stats()["hits"] == 1
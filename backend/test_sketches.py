@@ -0,0 +1,71 @@
+import math
+from collections import Counter
+
+import numpy as np
+
+from sketches import CountMinSketch, HeavyHitters, TermSketch
+
+
+def _zipf_stream(n_terms=5000, n_events=200_000, batches=20, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, n_terms + 1) ** 1.1
+    draws = rng.choice(n_terms, size=n_events, p=weights / weights.sum())
+    return [Counter(f"term{i}" for i in chunk) for chunk in np.array_split(draws, batches)]
+
+
+def test_count_min_never_undercounts_and_respects_its_error_bound():
+    batches = _zipf_stream()
+    truth = sum(batches, Counter())
+    sketch = CountMinSketch(width=2048, depth=4)
+    for batch in batches:
+        sketch.update(batch)
+    assert sketch.total == sum(truth.values())
+
+    terms = list(truth)
+    estimates = sketch.estimate(terms)
+    exact = np.array([truth[t] for t in terms])
+    assert np.all(estimates >= exact)
+    # Overestimate <= e/width * N with probability >= 1 - e^-depth per term
+    bound = math.e / sketch.width * sketch.total
+    violations = np.mean(estimates - exact > bound)
+    assert violations <= math.exp(-sketch.depth)
+
+
+def test_count_min_unseen_terms_are_bounded_too():
+    sketch = CountMinSketch(width=1024, depth=4)
+    for batch in _zipf_stream(n_events=50_000, batches=5):
+        sketch.update(batch)
+    unseen = sketch.estimate([f"never{i}" for i in range(1000)])
+    assert np.mean(unseen > math.e / sketch.width * sketch.total) <= math.exp(-sketch.depth)
+
+
+def test_heavy_hitters_error_bound_and_guaranteed_members():
+    capacity = 64
+    batches = _zipf_stream()
+    truth = sum(batches, Counter())
+    n = sum(truth.values())
+    summary = HeavyHitters(capacity)
+    for batch in batches:
+        summary.update(batch)
+
+    assert len(summary.counters) <= capacity
+    slack = n / (capacity + 1)
+    for term, count in summary.counters.items():
+        # Misra-Gries counters are lower bounds, short by at most N / (capacity + 1)
+        assert truth[term] - slack <= count <= truth[term]
+    # Every term above the slack is guaranteed to be kept
+    for term, count in truth.items():
+        if count > slack:
+            assert term in summary.counters
+    top = [term for term, _ in truth.most_common(5)]
+    assert summary.candidates(5) == top
+
+
+def test_term_sketch_ranks_complaint_terms():
+    comments = ["love this song", "great vibes love it"] * 200 + ["so boring and repetitive", "boring again"] * 50
+    sketch = TermSketch()
+    sketch.update(comments, lambda comment: "boring" in comment, chunk_size=64)
+    assert sketch.comments == 500 and sketch.complaints == 100
+    assert sketch.top_terms(1)[0]["term"] == "love"
+    complaints = [entry["term"] for entry in sketch.emerging_complaints()]
+    assert "boring" in complaints and "love" not in complaints
@@ -0,0 +1,83 @@
+import math
+
+import pytest
+
+from feature_engine import ft_engine
+from feature_schema import feature_schema
+from snapshot_store import SnapshotStore
+
+HOUR = 3600.0
+
+
+def _poll(store, at_hours, likes, comments=0, views=None, key="yt:abc"):
+    views = likes * 100 if views is None else views
+    return store.record(key, {"viewCount": views, "likeCount": likes, "commentCount": comments}, at=at_hours * HOUR)
+
+
+def test_dynamics_need_two_polls_at_least_a_minute_apart():
+    store = SnapshotStore(min_interval_seconds=60)
+    assert store.record("yt:abc", {"title": "no stats"}, at=0) is None
+    assert _poll(store, 0, 100) is None
+    # 30 s later: too close to measure a rate, and the first poll stays the baseline
+    assert store.record("yt:abc", {"viewCount": 20_000, "likeCount": 200}, at=30) is None
+    dynamics = store.record("yt:abc", {"viewCount": 20_000, "likeCount": 200}, at=60)
+    assert dynamics is not None and dynamics["snapshots"] == 2
+    assert dynamics["views_per_hour"] == pytest.approx(10_000 / (60 / HOUR), rel=1e-3)
+
+
+def test_ewma_updates_fast_and_slow_rates():
+    store = SnapshotStore(fast_tau_hours=6, slow_tau_hours=48)
+    _poll(store, 0, 0, 0)
+    first = _poll(store, 1, 100, 10)       # 110 engagements/h: both EWMAs start there
+    assert first["engagement_velocity"] == 0.0 and first["posting_change"] == 0.0
+    second = _poll(store, 2, 400, 50)      # 340/h engagement, 40/h comments
+
+    a_fast, a_slow = 1 - math.exp(-1 / 6), 1 - math.exp(-1 / 48)
+    fast_e, slow_e = 110 + a_fast * 230, 110 + a_slow * 230
+    fast_c, slow_c = 10 + a_fast * 30, 10 + a_slow * 30
+    assert second["engagement_velocity"] == pytest.approx((fast_e - slow_e) / fast_e, abs=1e-4)
+    assert second["posting_change"] == pytest.approx((fast_c - slow_c) / fast_c, abs=1e-4)
+    assert second["engagement_decay_rate"] == 0.0 and second["time_since_peak"] == 0.0
+
+
+def test_decay_and_time_since_peak_after_engagement_falls():
+    store = SnapshotStore()
+    _poll(store, 0, 0)
+    _poll(store, 1, 1000)                  # peak: 1000/h
+    _poll(store, 2, 1010)                  # 10/h
+    dynamics = _poll(store, 5, 1020)       # ~3/h, three hours later
+    assert dynamics["engagement_velocity"] < 0
+    assert 0 < dynamics["engagement_decay_rate"] < 1
+    assert dynamics["time_since_peak"] == 4.0  # peak set at the 1 h poll
+
+
+def test_count_dips_are_no_growth_not_negative_rates():
+    store = SnapshotStore()
+    _poll(store, 0, 500, views=50_000)
+    dynamics = _poll(store, 1, 400, views=40_000)
+    assert dynamics["views_per_hour"] == 0.0 and dynamics["engagement_velocity"] == 0.0
+
+
+def test_least_recently_polled_videos_are_evicted():
+    store = SnapshotStore(max_videos=2)
+    for key in ("a", "b", "c"):
+        _poll(store, 0, 10, key=key)
+    assert len(store) == 2 and store.dynamics("a") is None
+
+
+def test_measured_dynamics_override_the_heuristics():
+    metadata = {"viewCount": 50_000, "likeCount": 2_000, "commentCount": 100, "publishedAt": "2020-01-01T00:00:00Z"}
+    heuristic = feature_schema.to_dict(ft_engine.compute_signals(metadata, []).values)
+    dynamics = {"engagement_velocity": -0.42, "engagement_decay_rate": 0.37, "time_since_peak": 5.5,
+                "posting_change": 0.12, "views_per_hour": 100.0, "snapshots": 3}
+    measured = feature_schema.to_dict(ft_engine.compute_signals(metadata, [], dynamics=dynamics).values)
+    # Old video: the heuristics say "decayed, 24 h past peak" regardless of what is happening now
+    assert heuristic["engagement_decay_rate"] == 0.2 and heuristic["time_since_peak"] == 24.0
+    assert measured["engagement_velocity"] == -0.42
+    assert measured["engagement_decay_rate"] == 0.37
+    assert measured["time_since_peak"] == 5.5
+    assert measured["posting_change"] == 0.12
+    # Everything else is unchanged
+    unchanged = set(feature_schema.names) - {"engagement_velocity", "engagement_decay_rate",
+                                             "time_since_peak", "posting_change"}
+    assert {k: measured[k] for k in unchanged} == {k: heuristic[k] for k in unchanged}
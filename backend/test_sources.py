@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from sources import RateLimiter, RateLimitExceeded, Route, SourceAdapter, SourceItem, SourceRegistry
+
+
+class _Adapter(SourceAdapter):
+    def __init__(self, name, *patterns, **attrs):
+        self.name, self.patterns = name, patterns
+        for attr, value in attrs.items():
+            setattr(self, attr, value)
+        super().__init__()
+        self.calls = []
+
+    def fetch_one(self, key):
+        self.calls.append([key])
+        return SourceItem(self.name, key, {"title": key}, [])
+
+
+class _BatchAdapter(_Adapter):
+    supports_batch = True
+    max_batch = 2
+
+    def fetch_batch(self, keys):
+        self.calls.append(list(keys))
+        return {key: SourceItem(self.name, key, {"title": key}, []) for key in keys}
+
+
+def _registry(*adapters):
+    registry = SourceRegistry(max_workers=2)
+    for adapter in adapters:
+        registry.register(adapter)
+    return registry
+
+
+def test_higher_priority_source_wins_even_when_it_matches_later():
+    registry = _registry(
+        _Adapter("video", r"video\.example/(?P<id>\d+)"),
+        _Adapter("social", r"social\.example(?:/(?P<id>\w+))?"),
+    )
+    # social matches leftmost, but video was registered first
+    assert registry.route("social.example/abc shared video.example/42") == Route("video", "42")
+    assert registry.route("see social.example/abc") == Route("social", "abc")
+    assert registry.route("social.example") == Route("social", None)
+    assert registry.route("plain keyword") is None
+
+
+def test_replacing_an_adapter_keeps_its_priority():
+    registry = _registry(_Adapter("a", r"host/(?P<id>\d+)"), _Adapter("b", r"host/(?P<id>\w+)"))
+    registry.register(_Adapter("a", r"host/(?P<id>\d+)"))
+    assert registry.source_names == ["a", "b"]
+    assert registry.route("host/123") == Route("a", "123")
+
+
+def test_fetch_groups_chunks_and_keeps_order():
+    single, batch = _Adapter("one", r"one/(?P<id>\w+)"), _BatchAdapter("many", r"many/(?P<id>\w+)")
+    registry = _registry(single, batch)
+    routes = [registry.route(t) for t in ("many/a", "one/x", "many/b", "many/a", "many/c", "kw")]
+    items = registry.fetch(routes)
+    assert [item.key if item else None for item in items] == ["a", "x", "b", "a", "c", None]
+    assert sorted(batch.calls) == [["a", "b"], ["c"]] and single.calls == [["x"]]
+
+
+def test_adapters_must_implement_fetch_one():
+    class Incomplete(SourceAdapter):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_rate_limiter_allows_a_burst_then_paces():
+    limiter = RateLimiter(rate=20, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        assert limiter.acquire()
+    assert time.monotonic() - start < 0.05
+    assert limiter.acquire()  # one token refills in 50 ms
+    assert 0.03 < time.monotonic() - start < 0.5
+
+
+def test_rate_limiter_times_out_instead_of_blocking():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.acquire()
+    start = time.monotonic()
+    assert limiter.acquire(timeout=0.1) is False
+    assert time.monotonic() - start < 0.1
+    assert limiter.acquire(100, timeout=2.0)  # larger than the bucket: clamped to its capacity
+
+
+def test_throttled_fetch_fails_after_the_timeout():
+    adapter = _Adapter("slow", r"slow/(?P<id>\w+)", rate_limit=0.5, rate_burst=1, throttle_timeout=0.1)
+    registry = _registry(adapter)
+    assert registry.fetch([Route("slow", "a")])[0].key == "a"
+    start = time.monotonic()
+    with pytest.raises(RateLimitExceeded):
+        registry.fetch([Route("slow", "b")])
+    assert time.monotonic() - start < 0.5 and adapter.calls == [["a"]]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import AdmissionRejected
+from tenants import DEFAULT_TENANT, TenantRegistry, TenantSpec, _load_overrides
+
+SPEC = TenantSpec(name=DEFAULT_TENANT, max_concurrent=2, rate_limit=0, rate_burst=1, cache_bytes=1024)
+KEYS = {"key-acme": "acme", "key-globex": "globex"}
+
+
+def _registry(strict=True, **spec):
+    return TenantRegistry(SPEC._replace(**spec), overrides={"acme": {"max_concurrent": 1}},
+                          strict=strict, api_keys=KEYS)
+
+
+@pytest.mark.parametrize("tenant_id, api_key, expected", [
+    (None, None, DEFAULT_TENANT),
+    (DEFAULT_TENANT, None, DEFAULT_TENANT),
+    (None, "key-acme", "acme"),
+    ("acme", "key-acme", "acme"),
+])
+def test_resolve_accepts(tenant_id, api_key, expected):
+    assert _registry().resolve(tenant_id, api_key) == expected
+
+
+@pytest.mark.parametrize("tenant_id, api_key", [
+    (None, "not-a-key"),          # unknown key
+    ("globex", "key-acme"),       # key of another tenant
+    ("acme", None),               # strict: a bare header proves nothing
+])
+def test_resolve_rejects_with_403(tenant_id, api_key):
+    with pytest.raises(AdmissionRejected) as rejected:
+        _registry().resolve(tenant_id, api_key)
+    assert rejected.value.status_code == 403
+
+
+def test_non_strict_trusts_valid_tenant_ids_only():
+    registry = _registry(strict=False)
+    assert registry.resolve("acme") == "acme"
+    with pytest.raises(AdmissionRejected):
+        registry.resolve("../etc/passwd")
+
+
+def test_concurrency_quota_rejects_with_429():
+    async def scenario():
+        registry = _registry()
+        async with registry.admit("acme"):
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with registry.admit("acme"):
+                    pass
+            # Other tenants keep their own quota
+            async with registry.admit("globex"):
+                pass
+        async with registry.admit("acme"):
+            pass
+        return registry, rejected.value
+
+    registry, rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert registry.usage("acme").rejected == 1 and registry.usage("acme").in_flight == 0
+
+
+def test_rate_quota_rejects_with_429():
+    async def scenario():
+        registry = _registry(rate_limit=0.001, rate_burst=1)
+        async with registry.admit("globex"):
+            pass
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with registry.admit("globex"):
+                pass
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429 and rejected.retry_after >= 1
+
+
+def test_tenants_config_keys():
+    quotas, keys = _load_overrides('{"acme": {"api_key": "k1", "max_concurrent": 3, "bogus": 1}, "b": {}}')
+    assert quotas == {"acme": {"max_concurrent": 3}, "b": {}}
+    assert keys == {"k1": "acme"}
+    assert _load_overrides("not json") == ({}, {})
+
+
+@pytest.mark.parametrize("headers", [
+    {"X-Tenant-ID": "acme"},
+    {"X-API-Key": "wrong"},
+    {"X-Tenant-ID": "globex", "X-API-Key": "key-acme"},
+])
+def test_analyze_rejects_unauthenticated_tenants(monkeypatch, headers):
+    monkeypatch.setattr(main, "tenant_registry", _registry())
+    response = TestClient(main.app).post("/analyze", json={"topic": "fidget spinners"}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_zero_quotas_mean_unlimited():
+    async def scenario():
+        registry = _registry(max_concurrent=0, rate_limit=0)
+        async with registry.admit(DEFAULT_TENANT):
+            async with registry.admit(DEFAULT_TENANT):
+                async with registry.admit(DEFAULT_TENANT):
+                    return registry.usage(DEFAULT_TENANT).in_flight
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_anonymous_traffic_is_unthrottled_unless_configured():
+    from tenants import tenant_registry
+
+    spec = tenant_registry.spec(DEFAULT_TENANT)
+    assert spec.max_concurrent == 0 and spec.rate_limit == 0
+    # Keyed / named tenants still get the TENANT_* quotas
+    assert tenant_registry.spec("brand-a").max_concurrent > 0
@@ -0,0 +1,54 @@
+import hashlib
+import time
+
+import numpy as np
+import pytest
+
+from usp_engine import ROI_PERCENTILES, USPEngine, _simulate_savings_distribution, risk_concentration
+
+engine = USPEngine()
+
+
+def test_monte_carlo_uses_100k_draws_in_milliseconds():
+    _simulate_savings_distribution.cache_clear()
+    timings = []
+    for i in range(5):
+        start = time.perf_counter()
+        result = engine.simulate_roi_uncertainty(40.0 + 7 * i, 4)
+        timings.append((time.perf_counter() - start) * 1000)
+    assert result["draws"] == 100_000
+    assert sorted(timings)[2] < 50.0  # uncached; ~15 ms on a laptop
+    start = time.perf_counter()
+    assert engine.simulate_roi_uncertainty(40.0 + 7 * 4, 4) == result
+    assert (time.perf_counter() - start) * 1000 < 1.0  # cached
+
+
+def test_in_place_sampling_matches_the_reference_draws():
+    _simulate_savings_distribution.cache_clear()
+    result = dict(_simulate_savings_distribution(70.0, 8.0, 4.0, 25000.0, 10_000, 0.35, 0.2))
+    # Reference: the straightforward formulation with the same seed
+    key = b"70.0|8.0|4.0|25000.0|10000"
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha256(key).digest()[:8], "little"))
+    c = risk_concentration(70.0, 8.0)
+    risk = rng.beta(0.7 * c, 0.3 * c, 10_000)
+    days = np.maximum(1.0, 4.0 * rng.lognormal(0.0, 0.35, 10_000))
+    cost = 25000.0 * rng.lognormal(0.0, 0.2, 10_000)
+    expected = np.percentile(cost * days * risk, ROI_PERCENTILES)
+    assert [result[f"p{q}"] for q in ROI_PERCENTILES] == pytest.approx(expected, abs=0.01)
+
+
+def test_risk_uncertainty_is_the_weighted_sample_spread():
+    # Equal weights: the sample std (ddof=1), not the population std of two values
+    assert USPEngine.risk_uncertainty({"a": 40.0, "b": 60.0}) == pytest.approx(14.14, abs=0.01)
+    # Ensemble weights 0.4 / 0.6: sqrt(sum w (x - m)^2 / (1 - 0.52))
+    weighted = USPEngine.risk_uncertainty({"a": 40.0, "b": 60.0}, {"a": 0.4, "b": 0.6})
+    assert weighted == pytest.approx(np.sqrt(0.4 * 12 ** 2 + 0.6 * 8 ** 2) / np.sqrt(0.48), abs=0.01)
+    assert USPEngine.risk_uncertainty({"a": 40.0}) is None
+    assert USPEngine.risk_uncertainty({"a": 40.0, "b": 60.0}, {"a": 1.0, "b": 0.0}) is None
+
+
+def test_risk_sd_floor_applies_when_scorers_agree():
+    agreeing = engine.simulate_roi_uncertainty(60.0, 4, risk_sd=USPEngine.risk_uncertainty({"a": 60.0, "b": 60.0}))
+    assert agreeing["risk_sd"] == engine.mc_min_risk_sd
+    wide = engine.simulate_roi_uncertainty(60.0, 4, risk_sd=20.0)
+    assert wide["p95"] - wide["p5"] > agreeing["p95"] - agreeing["p5"]
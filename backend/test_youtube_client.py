@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from feature_engine import ft_engine
+from feature_schema import feature_schema
+from youtube_client import VIDEOS_PER_BATCH, YouTubeClient
+
+
+class _Request:
+    def __init__(self, method_id, run):
+        self.methodId = method_id
+        self._run = run
+
+    def execute(self, http=None):
+        return self._run()
+
+
+class FakeYouTube:
+    """Just enough of the googleapiclient service for search / videos / commentThreads."""
+
+    def __init__(self, n_videos=200, delay=0.0):
+        self.calls = Counter()
+        self.batch_sizes = []
+        self.delay = delay
+        self.views = {f"vid{i:08d}": 1000 * (i + 1) for i in range(n_videos)}
+        self._lock = threading.Lock()
+
+    def _resource(self, name, handler):
+        fake = self
+
+        class Resource:
+            def list(self, **params):
+                def run():
+                    with fake._lock:
+                        fake.calls[name] += 1
+                    time.sleep(fake.delay)
+                    return handler(**params)
+                return _Request(f"youtube.{name}.list", run)
+
+        return Resource()
+
+    def search(self):
+        return self._resource("search", lambda q, maxResults, **_: {
+            "items": [{"id": {"videoId": vid}} for vid in list(self.views)[:maxResults]]
+        })
+
+    def videos(self):
+        def handler(id, **_):
+            ids = id.split(",")
+            self.batch_sizes.append(len(ids))
+            return {"items": [
+                {"id": vid, "snippet": {"title": vid}, "statistics": {"viewCount": self.views[vid], "likeCount": 10}}
+                for vid in ids if vid in self.views
+            ]}
+        return self._resource("videos", handler)
+
+    def commentThreads(self):
+        return self._resource("commentThreads", lambda videoId, **_: {"items": [
+            {"snippet": {"topLevelComment": {"snippet": {"textDisplay": f"comment on {videoId}"}}}}
+        ]})
+
+
+def _client(fake, **kwargs):
+    client = YouTubeClient(**kwargs)
+    client.youtube = fake
+    return client
+
+
+def test_search_is_cached_per_keyword_until_the_ttl():
+    fake = FakeYouTube()
+    client = _client(fake, search_ttl=0.1)
+    first = client.search_video_ids("Fidget Spinners", 5)
+    assert client.search_video_ids("  fidget spinners ", 5) == first
+    assert client.search_video_ids("fidget spinners", 10) != first  # different result size: own entry
+    assert fake.calls["search"] == 2
+    time.sleep(0.15)
+    client.search_video_ids("fidget spinners", 5)
+    assert fake.calls["search"] == 3
+
+
+def test_concurrent_misses_share_one_search():
+    fake = FakeYouTube(delay=0.1)
+    client = _client(fake)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def search():
+        barrier.wait()
+        results.append(client.search_video_ids("sourdough", 5))
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fake.calls["search"] == 1
+    assert len(results) == 8 and all(r == results[0] and len(r) == 5 for r in results)
+
+
+def test_videos_are_fetched_in_batches_of_50():
+    fake = FakeYouTube()
+    client = _client(fake)
+    ids = list(fake.views)[:120] + ["missing0001"]
+    fetched = client.fetch_videos_by_id(ids)
+    assert fake.batch_sizes == [VIDEOS_PER_BATCH, VIDEOS_PER_BATCH, 21]
+    assert list(fetched) == ids[:120]  # unavailable IDs are skipped, order kept
+    assert fake.calls["commentThreads"] == 120
+    stats, comments = fetched["vid00000007"]
+    assert stats["viewCount"] == 8000 and comments == ["comment on vid00000007"]
+
+
+def test_topic_signals_are_log_view_weighted():
+    videos = [
+        ({"viewCount": 10_000_000, "likeCount": 900_000, "commentCount": 5000}, ["love it", "amazing"]),
+        ({"viewCount": 1_000, "likeCount": 2, "commentCount": 10}, ["boring", "so over this", "dead trend"]),
+    ]
+    rows = np.vstack([feature_schema.to_array(ft_engine.compute_signals(m, c)) for m, c in videos])
+    topic = feature_schema.to_array(ft_engine.compute_topic_signals(videos))
+    weights = np.log1p([10_000_000, 1_000])
+    assert topic == pytest.approx(np.average(rows, axis=0, weights=weights), abs=1e-6)
+    # The large video counts more, but the small one is not drowned out
+    sentiment = feature_schema.index["sentiment_score"]
+    assert rows[1, sentiment] < rows[:, sentiment].mean() < topic[sentiment] < rows[0, sentiment]
+
+
+def test_topic_signals_without_views_are_a_plain_mean():
+    videos = [({}, ["great"]), ({}, ["awful"])]
+    rows = np.vstack([feature_schema.to_array(ft_engine.compute_signals(m, c)) for m, c in videos])
+    topic = feature_schema.to_array(ft_engine.compute_topic_signals(videos))
+    assert topic == pytest.approx(rows.mean(axis=0), abs=1e-6)
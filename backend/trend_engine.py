@@ -1,6 +1,7 @@
 import os
+import time
+import uuid
 from dotenv import load_dotenv
-import pandas as pd
 import random
 
 # Import our modular components
@@ -12,18 +13,43 @@ from genai_explainer import genai_explainer
 from usp_engine import usp_engine
 from feather_client import feather
 from prediction_model import model as decline_model
+from ensemble import ensemble
+from model_registry import model_registry
+from simulation_cache import simulation_cache
+from admission import stage_limiter
+from degradation import degradation
+from sources import InstagramAdapter, YouTubeAdapter, source_registry
+from similarity_index import similarity_index
+from snapshot_store import snapshot_store
+from change_detector import change_monitor
+from alert_dispatcher import alert_dispatcher
+from tenants import current_tenant, tenant_registry
+from profiler import profile_stage, tag_request
 
 load_dotenv()
 
 # Initialize the YouTube Client
-yt_client = YouTubeClient()
+yt_client = YouTubeClient(search_ttl=float(os.getenv("YOUTUBE_SEARCH_TTL", "900")))
+# Keyword analysis: top N search results are fetched and aggregated into one signal vector
+KEYWORD_VIDEOS = int(os.getenv("KEYWORD_VIDEOS", "5"))
+
+# Source adapters, in routing priority order
+source_registry.register(YouTubeAdapter(yt_client, rate_limit=float(os.getenv("YOUTUBE_RATE_LIMIT", "10"))))
+source_registry.register(InstagramAdapter())
+# Simulation responses are cached per tenant, each namespace within its memory budget
+simulation_cache.namespace_fn = current_tenant
+simulation_cache.budget_fn = tenant_registry.cache_budget
+# ...and keyed by the classifier version that scored them (a new model never serves stale risks)
+simulation_cache.version_fn = lambda: ml_classifier.version
+# Early-decline change points go out through the webhook dispatcher
+change_monitor.subscribe(alert_dispatcher.notify_change_point)
 
 def analyze_trend_real(input_text: str):
     """
     Enhanced Main Orchestrator with Full USP Integration:
     
     Pipeline:
-    1. Data Ingestion (YouTube API)
+    1. Data Ingestion (source adapters for URLs, or keyword search over the top N videos)
     2. Feature Extraction (Universal Signals)
     3. ML Prediction (Proxy Model)
     4. SHAP Explanation (XAI)
@@ -33,76 +59,135 @@ def analyze_trend_real(input_text: str):
     """
     
     # --- 1. DATA INGESTION ---
-    is_url = "youtube.com" in input_text or "youtu.be" in input_text
-    
-    video_data = {}
-    comments = []
-    trend_name = input_text
-    
-    trend_name = input_text
-    
-    if is_url:
-        print(f"🔗 Detected YouTube URL: {input_text}")
-        try:
-            video_id = yt_client.extract_video_id(input_text)
-            
-            if video_id:
-                video_data = yt_client.get_video_stats(video_id) or {}
-                comments = yt_client.get_comments(video_id) or []
-                trend_name = video_data.get("title", trend_name)
-                print(f"✅ Fetched Data for: {trend_name}")
-            else:
-                print("❌ Invalid YouTube URL (ID extraction failed)")
-                # Fallback to simulation if extraction fails but it looked like a URL
-                return _get_simulation_fallback(input_text)
-        except Exception as e:
-            print(f"❌ YouTube Extraction Error: {e}")
-            return _get_simulation_fallback(input_text)
+    # One compiled-regex scan picks the source adapter (None: plain keyword)
+    route = source_registry.route(input_text)
+    
+    if route is not None:
+        adapter = source_registry.adapter(route.source)
+        print(f"🔗 Detected {route.source} input: {input_text}")
+        item = None
+        if route.key is not None:
+            # External I/O stage: bounded so a slow API cannot tie up every worker thread
+            with profile_stage("fetch"), stage_limiter.limit("io"):
+                try:
+                    item = source_registry.fetch([route])[0]
+                except Exception as e:
+                    print(f"❌ {route.source} Extraction Error: {e}")
+        if item is None:
+            # No ID in the input, source not fetchable (e.g. Instagram) or fetch failed
+            print(f"❌ No {route.source} data for input (Using Simulation)")
+            return _simulate_source(route.source, input_text)
+        trend_name = item.metadata.get("title", input_text)
+        print(f"✅ Fetched Data for: {trend_name}")
 
-    elif "instagram.com" in input_text:
-        print(f"📸 Detected Instagram URL: {input_text} (Using Instagram Simulation)")
-        return _get_instagram_simulation(input_text)
-    else:
+        dynamics = _record_snapshot(item)
+
+        # CPU stage (features, scoring, SHAP): bounded separately from external I/O
+        with stage_limiter.limit("cpu"):
+            return _analyze_video(input_text, trend_name, item.metadata, item.comments,
+                                  input_type=adapter.input_type, dynamics=dynamics)
+
+    # Plain keyword: aggregate the top search results (simulation when the API is unavailable)
+    videos = _fetch_keyword_videos(input_text)
+    if not videos:
         print(f"🔍 Detected Keyword: {input_text} (Using Simulation)")
-        return _get_simulation_fallback(input_text)
+        return _cached_simulation(input_text)
+    print(f"🔍 Detected Keyword: {input_text} ({len(videos)} videos)")
+    dynamics = [_record_snapshot(item) for item in videos]
+    with stage_limiter.limit("cpu"):
+        with profile_stage("features"):
+            signals = ft_engine.compute_topic_signals([(item.metadata, item.comments) for item in videos], dynamics)
+        # Comments of every result video feed the topic's term extraction
+        comments = [c for item in videos for c in item.comments]
+        return _analyze_video(input_text, input_text, {}, comments, signals=signals, input_type="keyword")
 
+
+def _analyze_video(routing_key: str, trend_name: str, video_data: dict, comments: list, dry_run: bool = False,
+                   signals=None, input_type: str = "url", dynamics=None):
+    """
+    Stages 2-11 of the pipeline for fetched video data.
+    Pass precomputed `signals` (e.g. a keyword's aggregated vector) to skip stage 2.
+    `dynamics` are the video's measured rates from earlier polls (SnapshotStore).
+    dry_run (warm-up probes): nothing is written to Feather and GenAI uses the offline template.
+    """
+    # Pin one model version (and its explainer) for every stage of this request
+    model_version = model_registry.select(routing_key)
+    # Pick the cost tier for the expensive stages from current load / latency
+    tiers = degradation.full_tiers() if dry_run else degradation.select()
+    if dry_run:
+        tiers["genai"] = "template"
+    
     # --- 2. FEATURE ENGINEERING ---
     print("🚀 Starting Feature Engineering...")
-    signals = ft_engine.compute_signals(video_data, comments)
+    if signals is None:
+        with profile_stage("features"):
+            signals = ft_engine.compute_signals(video_data, comments, dynamics=dynamics)
+    # What the audience says: top n-grams and emerging complaint terms (streaming sketches)
+    with profile_stage("comment_terms"):
+        comment_terms = ft_engine.extract_comment_terms(comments) if comments else None
     print("✅ Feature Engineering complete")
     
     # --- 2.5 FEATHER FEATURE STORE INTEGRATION ---
-    request_id = f"req_{int(pd.Timestamp.now().timestamp())}"
-    print(f"📦 Storing features in Feather (ID: {request_id})...")
-    feather.store_features(request_id, signals)
+    request_id = None
+    if not dry_run:
+        request_id = f"req_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        tag_request(request_id)  # a profiled request's profile is stored under this ID
+        print(f"📦 Storing features in Feather (ID: {request_id})...")
+        feather.store_features(request_id, signals)
     
     # --- 3. ML PREDICTION (Ensemble Logic) ---
     print("🚀 Starting Ensemble ML Prediction...")
-    # Model A: Proxy Logistic Regression
-    ml_prediction = ml_classifier.predict_risk(signals)
-    
-    # Model B: Weighted Business Logic Model (via Feather)
-    business_prediction = decline_model.predict(request_id)
-    
-    # Combine predictions (Average or weighted)
-    # We'll use business_prediction as a refinement on the ML base
-    combined_risk = (ml_prediction["risk_score"] * 0.4) + (business_prediction["declineRisk"] * 0.6)
-    risk_score = round(combined_risk, 2)
+    # All registered scorers (proxy LR, business logic, ...) share the same feature array
+    with profile_stage("scoring"):
+        ensemble_result = ensemble.score(signals, overrides={"ml_proxy": model_version.score_batch})
+    risk_score = ensemble_result["risk_score"]
+    components = ensemble_result["components"]
+    if request_id is not None:
+        # Make this trend searchable by /similar
+        similarity_index.add_one(request_id, signals, risk_score, trend_name)
+    
+    # --- 3.5 EARLY-DECLINE DETECTION (online change points per monitored trend) ---
+    alerts = []
+    if not dry_run:
+        alerts = change_monitor.update(routing_key, {
+            "sentiment": signals["sentiment_score"],
+            "engagement": signals["engagement_velocity"],
+            "risk": risk_score,
+        })
     
-    # Update prediction metadata
-    prediction = ml_prediction.copy()
-    prediction["risk_score"] = risk_score
-    prediction["decline_window"] = business_prediction["timeWindow"]
+    # Risk level / lifecycle from the ML base, decline window from the business model
+    ml_score = components.get("ml_proxy", risk_score)
+    prediction = {
+        "risk_score": risk_score,
+        "risk_level": ml_classifier._map_risk_level(ml_score),
+        "decline_window": (
+            decline_model.time_window(components["business_logic"])
+            if "business_logic" in components
+            else ml_classifier._map_decline_window(risk_score)
+        ),
+        "lifecycle_stage": ml_classifier._map_lifecycle_stage(ml_score)
+    }
     
     print(f"✅ Ensemble Prediction complete (Final Risk: {risk_score})")
     
     # --- 4. ENHANCED XAI (SHAP + Rule-Based) ---
-    print("🚀 Starting XAI Explanation...")
-    explanation = xai_layer.generate_decision_justification(
-        signals, 
-        risk_score,
-        ml_model=ml_classifier.model  # Pass model for SHAP
-    )
+    print(f"🚀 Starting XAI Explanation (tier: {tiers['xai']})...")
+    # Resolve (lazily built) explainers first: one-off build cost is not stage latency
+    shap_explainer = model_version.explainer if tiers["xai"] == "shap" else None
+    linear_attributor = model_version.linear_attributor if tiers["xai"] == "linear" else None
+    stage_start = time.perf_counter()
+    with profile_stage("xai"):
+        explanation = xai_layer.generate_decision_justification(
+            signals, 
+            risk_score,
+            ml_model=model_version.model,  # Pass model for SHAP
+            shap_explainer=shap_explainer,
+            tier=tiers["xai"],
+            linear_attributor=linear_attributor,
+            comment_terms=comment_terms
+        )
+    if not dry_run:
+        degradation.record("xai", tiers["xai"], (time.perf_counter() - stage_start) * 1000)
     print("✅ XAI Explanation complete")
     
     # --- 5. USP LOGIC LAYERS ---
@@ -113,23 +198,34 @@ def analyze_trend_real(input_text: str):
     
     # 5b. Lifecycle Classification
     lifecycle_result = usp_engine.classify_lifecycle(risk_score, signals)
+    if not dry_run:
+        # Stage / cringe transitions fire webhook alerts (queued, never blocks this request)
+        alert_dispatcher.observe(routing_key, trend_name, lifecycle_result["stage"],
+                                 cringe_result["is_cringe_point"], risk_score)
     
     # 5c. ROI Calculation
     decline_days = _extract_decline_days(prediction["decline_window"])
-    roi_result = usp_engine.calculate_roi(risk_score, decline_days)
+    # Savings bands sized by how much the ensemble's scorers disagree on the risk
+    roi_result = usp_engine.calculate_roi(risk_score, decline_days, uncertainty=True,
+                                          risk_sd=usp_engine.risk_uncertainty(components, ensemble.weights))
     
     # 5d. Prepare SHAP drivers for GenAI
     shap_drivers = explanation.get("shap_drivers", [])
     print("✅ USP Logic complete")
     
     # --- 6. GENAI EXPLANATION ---
-    print("🚀 Starting GenAI Explanation...")
-    genai_summary = genai_explainer.generate_executive_summary(
-        risk_score=risk_score,
-        shap_drivers=shap_drivers if shap_drivers else _fallback_shap_format(explanation["top_signals"]),
-        lifecycle_stage=lifecycle_result["stage"],
-        is_cringe_point=cringe_result["is_cringe_point"]
-    )
+    print(f"🚀 Starting GenAI Explanation (tier: {tiers['genai']})...")
+    stage_start = time.perf_counter()
+    with profile_stage("genai"):
+        genai_summary, genai_tier = genai_explainer.generate_summary_for_tier(
+            risk_score=risk_score,
+            shap_drivers=shap_drivers if shap_drivers else _fallback_shap_format(explanation["top_signals"]),
+            lifecycle_stage=lifecycle_result["stage"],
+            is_cringe_point=cringe_result["is_cringe_point"],
+            tier=tiers["genai"]
+        )
+    if not dry_run:
+        degradation.record("genai", genai_tier, (time.perf_counter() - stage_start) * 1000)
     print("✅ GenAI Explanation complete")
     
     # --- 7. DECISION JUSTIFICATION ---
@@ -159,15 +255,25 @@ def analyze_trend_real(input_text: str):
     # --- 11. RETURN ENHANCED JSON ---
     print("[SUCCESS] Analysis Complete. Returning JSON.")
     return {
-        "inputType": "url",
+        "inputType": input_type,
         "detectedTrend": trend_name,
         "declineRisk": int(risk_score),
         "timeWindow": prediction["decline_window"],
         "primaryDriver": explanation["primary_driver"],
-        "featureBreakdown": signals,
+        "featureBreakdown": signals.to_dict(),
         "explanation": genai_summary,  # GenAI-powered explanation
         "recommendedAction": recommended_action,
         "confidence": decision_justification["confidence_score"],
+        "roiDistribution": roi_result["savings_distribution"],
+        "modelVersion": model_version.version,
+        "requestId": request_id,
+        "commentTerms": comment_terms,
+        "alerts": alerts,
+        # Tiers actually served (degradation policy): xai shap/linear/rule-based, genai gemini/cached/template
+        "degradation": {
+            "xai": explanation["explanation_method"],
+            "genai": genai_tier
+        },
         
         # Enhanced Insight Object with ALL USPs
         "trend": {
@@ -188,6 +294,7 @@ def analyze_trend_real(input_text: str):
             
             # NEW: USP Fields
             "roi_savings": roi_result["estimated_savings"],
+            "roi_distribution": roi_result["savings_distribution"],
             "is_cringe_point": cringe_result["is_cringe_point"],
             "cringe_severity": cringe_result["severity"],
             "lifecycle_stage": lifecycle_result["stage"],
@@ -198,11 +305,76 @@ def analyze_trend_real(input_text: str):
     }
 
 
-def _get_simulation_fallback(trend_name):
+# Fixed probe used by the startup warm-up (no network, no Feather writes)
+WARMUP_VIDEO = {
+    "title": "Warm-up Probe",
+    "viewCount": 250000,
+    "likeCount": 9000,
+    "commentCount": 1200,
+    "publishedAt": "2024-01-01T00:00:00Z"
+}
+WARMUP_COMMENTS = ["love this", "so boring now", "seen this again", "great edit", "this trend is dead"]
+
+
+def run_warmup_probe():
+    """Run one dry-run analysis through every pipeline stage (ingestion excluded)."""
+    return _analyze_video("warmup", WARMUP_VIDEO["title"], WARMUP_VIDEO, WARMUP_COMMENTS, dry_run=True)
+
+
+def _fetch_keyword_videos(keyword):
+    """Search (TTL-cached) and fetch the top KEYWORD_VIDEOS videos (SourceItems) for a keyword; [] when unavailable."""
+    if not yt_client.youtube:
+        return []
+    with profile_stage("fetch"), stage_limiter.limit("io"):
+        try:
+            video_ids = yt_client.search_video_ids(keyword, KEYWORD_VIDEOS)
+            if not video_ids:
+                return []
+            items = source_registry.fetch_keys("youtube", video_ids)
+            return [item for item in items if item.metadata]
+        except Exception as e:
+            print(f"❌ YouTube Keyword Search Error: {e}")
+            return []
+
+
+def _record_snapshot(item):
+    """Every fetch is a poll: fold the stats into the video's rolling state, return its dynamics."""
+    return snapshot_store.record(f"{item.source}:{item.key}", item.metadata)
+
+
+def _simulate_source(source, input_text):
+    """Deterministic simulation for a recognized source that yielded no data (None: plain keyword)."""
+    kind, seed, compute, tier = _simulation_entry(source, input_text)
+    # A Gemini-tier entry that fell back to the template is served but not memoized
+    return simulation_cache.get_or_compute(
+        kind, seed, compute, cacheable=lambda result: result["degradation"]["genai"] == tier
+    )
+
+
+def _cached_simulation(trend_name):
+    """Keyword simulation served from the LRU memo / precomputed index when possible."""
+    return _simulate_source(None, trend_name)
+
+
+def _simulation_entry(source, input_text):
+    """
+    (kind, seed, compute, genai tier) of the simulated response for `input_text`, shared with
+    precompute_simulations.py. Instagram is keyed by shortcode, so URL variants share one entry.
+    The summary is Gemini text when Gemini is configured, so the GenAI tier is part of the kind.
+    """
+    tier = "gemini" if genai_explainer.model else "template"
+    if source == "instagram":
+        return (f"instagram/{tier}", _instagram_seed(input_text),
+                lambda: _get_instagram_simulation(input_text, genai_tier=tier), tier)
+    return (f"keyword/{tier}", input_text,
+            lambda: _get_simulation_fallback(input_text, genai_tier=tier), tier)
+
+
+def _get_simulation_fallback(trend_name, genai_tier="gemini"):
     """Enhanced simulation with USP support."""
     
-    random.seed(trend_name)
-    base_risk = random.randint(20, 95)
+    rng = _seeded_rng(trend_name)
+    base_risk = rng.randint(20, 95)
     
     # Simulate signals
     signals = {
@@ -221,14 +393,15 @@ def _get_simulation_fallback(trend_name):
     cringe_result = usp_engine.detect_cringe_point(signals, risk_score)
     lifecycle_result = usp_engine.classify_lifecycle(risk_score, signals)
     decline_days = _extract_decline_days(prediction["decline_window"])
-    roi_result = usp_engine.calculate_roi(risk_score, decline_days)
+    roi_result = usp_engine.calculate_roi(risk_score, decline_days, uncertainty=True)
     
     # GenAI summary
-    genai_summary = genai_explainer.generate_executive_summary(
+    genai_summary, genai_tier = genai_explainer.generate_summary_for_tier(
         risk_score, 
         _fallback_shap_format(explanation["top_signals"]),
         lifecycle_result["stage"],
-        cringe_result["is_cringe_point"]
+        cringe_result["is_cringe_point"],
+        tier=genai_tier
     )
     
     recommended_action = genai_explainer.generate_recommended_action(
@@ -238,9 +411,9 @@ def _get_simulation_fallback(trend_name):
     )
     
     drivers = [
-        {"label": "Fatigue", "value": random.randint(20, 40), "fullMark": 100},
-        {"label": "Sentiment", "value": random.randint(10, 30), "fullMark": 100},
-        {"label": "Saturation", "value": random.randint(10, 20), "fullMark": 100}
+        {"label": "Fatigue", "value": rng.randint(20, 40), "fullMark": 100},
+        {"label": "Sentiment", "value": rng.randint(10, 30), "fullMark": 100},
+        {"label": "Saturation", "value": rng.randint(10, 20), "fullMark": 100}
     ]
     
     formatted_signals = [
@@ -258,10 +431,12 @@ def _get_simulation_fallback(trend_name):
         "explanation": genai_summary,
         "recommendedAction": recommended_action,
         "confidence": 0.75,
+        "roiDistribution": roi_result["savings_distribution"],
+        "degradation": {"xai": explanation["explanation_method"], "genai": genai_tier},
         
         "trend": {
             "history": [
-                {"timestamp": f"Day {i}", "value": max(0, int(100 - (i * (risk_score/12)) + random.randint(-5, 5)))}
+                {"timestamp": f"Day {i}", "value": max(0, int(100 - (i * (risk_score/12)) + rng.randint(-5, 5)))}
                 for i in range(1, 8)
             ]
         },
@@ -278,6 +453,7 @@ def _get_simulation_fallback(trend_name):
             
             # USP Fields
             "roi_savings": roi_result["estimated_savings"],
+            "roi_distribution": roi_result["savings_distribution"],
             "is_cringe_point": cringe_result["is_cringe_point"],
             "cringe_severity": cringe_result["severity"],
             "lifecycle_stage": lifecycle_result["stage"],
@@ -295,23 +471,12 @@ def _get_simulation_fallback(trend_name):
     }
 
 
-def _get_instagram_simulation(url):
+def _get_instagram_simulation(url, genai_tier="gemini"):
     """ specialised simulation for Instagram Reels/Posts """
-    # Extract username or shortcode if possible for better seed
-    try:
-        if "/reel/" in url:
-            shortcode = url.split("/reel/")[1].split("/")[0]
-            seed_val = shortcode
-        elif "/p/" in url:
-            shortcode = url.split("/p/")[1].split("/")[0]
-            seed_val = shortcode
-        else:
-            seed_val = url
-    except:
-        seed_val = url
+    seed_val = _instagram_seed(url)
 
-    random.seed(seed_val)
-    base_risk = random.randint(30, 85) # slightly different range than general fallback
+    rng = _seeded_rng(seed_val)
+    base_risk = rng.randint(30, 85) # slightly different range than general fallback
     
     # Simulate high engagement (insta usually has higher engagement rate)
     signals = {
@@ -330,16 +495,17 @@ def _get_instagram_simulation(url):
     cringe_result = usp_engine.detect_cringe_point(signals, risk_score)
     lifecycle_result = usp_engine.classify_lifecycle(risk_score, signals)
     decline_days = _extract_decline_days(prediction["decline_window"])
-    roi_result = usp_engine.calculate_roi(risk_score, decline_days)
+    roi_result = usp_engine.calculate_roi(risk_score, decline_days, uncertainty=True)
     
     # GenAI summary (customized prompt context essentially)
-    genai_summary = f"INSTAGRAM FORENSIC: {'Viral momentum detected' if risk_score < 50 else 'Engagement plateau detected'}. " + \
-                    genai_explainer.generate_executive_summary(
-                        risk_score, 
-                        _fallback_shap_format(explanation["top_signals"]),
-                        lifecycle_result["stage"],
-                        cringe_result["is_cringe_point"]
-                    )
+    genai_summary, genai_tier = genai_explainer.generate_summary_for_tier(
+        risk_score, 
+        _fallback_shap_format(explanation["top_signals"]),
+        lifecycle_result["stage"],
+        cringe_result["is_cringe_point"],
+        tier=genai_tier
+    )
+    genai_summary = f"INSTAGRAM FORENSIC: {'Viral momentum detected' if risk_score < 50 else 'Engagement plateau detected'}. " + genai_summary
     
     recommended_action = genai_explainer.generate_recommended_action(
         risk_score, 
@@ -348,9 +514,9 @@ def _get_instagram_simulation(url):
     )
     
     drivers = [
-        {"label": "Algorithm Shift", "value": random.randint(40, 60), "fullMark": 100},
-        {"label": "Ad Fatigue", "value": random.randint(20, 40), "fullMark": 100},
-        {"label": "Audience Retention", "value": random.randint(30, 50), "fullMark": 100}
+        {"label": "Algorithm Shift", "value": rng.randint(40, 60), "fullMark": 100},
+        {"label": "Ad Fatigue", "value": rng.randint(20, 40), "fullMark": 100},
+        {"label": "Audience Retention", "value": rng.randint(30, 50), "fullMark": 100}
     ]
     
     formatted_signals = [
@@ -368,10 +534,12 @@ def _get_instagram_simulation(url):
         "explanation": genai_summary,
         "recommendedAction": recommended_action,
         "confidence": 0.82,
+        "roiDistribution": roi_result["savings_distribution"],
+        "degradation": {"xai": explanation["explanation_method"], "genai": genai_tier},
         
         "trend": {
             "history": [
-                {"timestamp": f"Day {i}", "value": max(0, int(100 - (i * (risk_score/15)) + random.randint(-10, 10)))}
+                {"timestamp": f"Day {i}", "value": max(0, int(100 - (i * (risk_score/15)) + rng.randint(-10, 10)))}
                 for i in range(1, 8)
             ]
         },
@@ -388,6 +556,7 @@ def _get_instagram_simulation(url):
             
             # USP Fields
             "roi_savings": roi_result["estimated_savings"],
+            "roi_distribution": roi_result["savings_distribution"],
             "is_cringe_point": cringe_result["is_cringe_point"],
             "cringe_severity": cringe_result["severity"],
             "lifecycle_stage": lifecycle_result["stage"],
@@ -407,6 +576,27 @@ def _get_instagram_simulation(url):
 
 # --- HELPER FUNCTIONS ---
 
+def _instagram_seed(url: str) -> str:
+    """Extract username or shortcode if possible for better seed."""
+    try:
+        if "/reel/" in url:
+            return url.split("/reel/")[1].split("/")[0]
+        elif "/p/" in url:
+            return url.split("/p/")[1].split("/")[0]
+    except IndexError:
+        pass
+    return url
+
+
+def _seeded_rng(seed_val: str) -> random.Random:
+    """
+    Private RNG per simulation request.
+    String seeds are hashed with SHA-512 by `random`, so the stream is stable across
+    processes and restarts, and concurrent requests never reseed each other.
+    """
+    return random.Random(seed_val)
+
+
 def _extract_decline_days(decline_window: str) -> int:
     """Extract number of days from decline window string."""
     if "24" in decline_window or "Hours" in decline_window:
@@ -5,9 +5,109 @@ Implements the 4 Secondary USPs:
 2. ROI Calculator (Explainable ROI Engine)
 3. Lifecycle Classifier (Trend Lifecycle Governance)
 4. Decision Justification Formatter
+
+Each scalar USP has a bulk counterpart that works on NumPy arrays and returns
+integer codes; the text is looked up lazily from the code tables below.
 """
 
-from typing import Dict, Any, List
+import hashlib
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# --- Code tables (shared by scalar and bulk paths) ---
+
+# Cringe codes: 0 = none, 1 = low, 2 = medium, 3 = high
+CRINGE_TABLE = (
+    (False, "low", "Trend reputation is stable."),
+    (True, "low", "Negative sentiment building. Early signs of audience backlash."),
+    (True, "medium", "Content saturation detected. Audience perceives this trend as 'overdone' or 'cringe'."),
+    (True, "high", "Audience is actively engaged BUT sentiment is hostile. Continuing risks brand credibility."),
+)
+
+# Lifecycle codes: 0 = Birth, 1 = Growth, 2 = Peak, 3 = Decay, 4 = Zombie
+LIFECYCLE_TABLE = (
+    ("Birth", "Trend is emerging. Early indicators are forming.",
+     "Monitor closely. Test small campaigns before committing."),
+    ("Growth", "Trend is accelerating with positive momentum.",
+     "Scale investment strategically. High ROI window."),
+    ("Peak", "Trend has reached maximum saturation. Further growth unlikely.",
+     "Harvest current value but avoid additional investment."),
+    ("Decay", "Trend is actively declining. Audience interest is waning.",
+     "Prepare exit within 3-5 days. Salvage remaining value."),
+    ("Zombie", "Trend is visible but carries no strategic value. Engagement is artificial or low-quality.",
+     "Immediate exit. This trend damages more than it benefits."),
+)
+
+# ROI basis codes: 0 = low, 1 = medium, 2 = high, 3 = critical
+ROI_BASIS_TEMPLATES = (
+    "Low risk. Campaign ROI is protected.",
+    "Medium risk. Partial budget optimization recommended over {days} days.",
+    "High decline probability. {days}-day exposure carries {waste:.0%} waste risk.",
+    "Critical risk detected. Continuing {days} more days would waste {waste:.0%} of spend.",
+)
+
+ROI_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def risk_concentration(risk_score: float, risk_sd: float) -> float:
+    """
+    Beta(a+b) whose standard deviation matches the model's risk uncertainty (method of
+    moments: var = p(1-p)/(a+b+1)), clipped to [2, 1000].
+    """
+    p = min(max(risk_score / 100.0, 1e-3), 1 - 1e-3)
+    var = max(risk_sd / 100.0, 1e-3) ** 2
+    return float(min(max(p * (1 - p) / var - 1.0, 2.0), 1000.0))
+
+
+@lru_cache(maxsize=2048)
+def _simulate_savings_distribution(
+    risk_score: float,
+    risk_sd: float,
+    decline_window_days: float,
+    daily_budget: float,
+    n_draws: int,
+    days_sigma: float,
+    cpm_sigma: float
+) -> Tuple[Tuple[str, float], ...]:
+    """
+    Vectorized Monte Carlo over (risk, decline days, CPM). Inputs arrive already
+    quantized, so the lru_cache serves repeated dashboards without re-simulating.
+    The RNG is seeded from the inputs, so cached and fresh results are identical.
+    Returns immutable (name, value) pairs: the cached result is shared by every caller.
+    """
+    key = f"{risk_score}|{risk_sd}|{decline_window_days}|{daily_budget}|{n_draws}".encode()
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha256(key).digest()[:8], "little"))
+    
+    # Risk ~ Beta centred on the model's prediction, as wide as the model's own uncertainty
+    p = min(max(risk_score / 100.0, 1e-3), 1 - 1e-3)
+    concentration = risk_concentration(risk_score, risk_sd)
+    risk = rng.beta(p * concentration, (1 - p) * concentration, n_draws)
+    # Decline timing and CPM ~ log-normal around the point estimates (exp of one normal
+    # block, computed in place: the same draws as two rng.lognormal calls, fewer temporaries)
+    spread = rng.standard_normal((2, n_draws))
+    spread[0] *= days_sigma
+    spread[1] *= cpm_sigma
+    np.exp(spread, out=spread)
+    days, cost = spread
+    days *= decline_window_days
+    np.maximum(days, 1.0, out=days)
+    
+    savings = risk
+    savings *= days
+    savings *= cost
+    savings *= daily_budget
+    percentiles = np.percentile(savings, ROI_PERCENTILES)
+    
+    distribution = [(f"p{q}", round(float(v), 2)) for q, v in zip(ROI_PERCENTILES, percentiles)]
+    distribution += [
+        ("mean", round(float(savings.mean()), 2)),
+        ("std", round(float(savings.std()), 2)),
+        ("risk_sd", risk_sd),
+        ("draws", n_draws),
+    ]
+    return tuple(distribution)
 
 
 class USPEngine:
@@ -19,6 +119,17 @@ class USPEngine:
         # Default CPM for ROI calculations (Cost Per 1000 impressions in ₹)
         self.default_cpm = 500
         self.default_daily_impressions = 50000
+        
+        # Monte Carlo ROI: the risk spread comes from the model (risk_uncertainty); decline
+        # timing and CPM spreads are market priors. 100k draws keep the p5/p95 bands stable
+        # to ~1%; an uncached simulation takes ~15 ms, repeats are lru_cache hits.
+        self.mc_draws = 100_000
+        # Floor on the risk std (score points). The scorers' disagreement is only a lower
+        # bound on the model's error: they can agree (spread ~0) and both be wrong, and a
+        # single scorer has no spread at all. 5 points is a prior, not a measured error.
+        self.mc_min_risk_sd = 5.0
+        self.mc_days_sigma = 0.35           # log-normal sigma on decline timing
+        self.mc_cpm_sigma = 0.20            # log-normal sigma on CPM
     
     def detect_cringe_point(self, signals: Dict[str, float], risk_score: float) -> Dict[str, Any]:
         """
@@ -47,27 +158,21 @@ class USPEngine:
         # Scenario: Engagement is high (people watching) BUT sentiment is very negative
         # OR fatigue is high (content feels forced/overdone)
         
-        is_cringe = False
-        severity = "low"
-        explanation = "Trend reputation is stable."
+        code = 0
         
         # Critical Cringe: High visibility + Very negative sentiment
         if engagement > 0.3 and sentiment < -0.4:
-            is_cringe = True
-            severity = "high"
-            explanation = "Audience is actively engaged BUT sentiment is hostile. Continuing risks brand credibility."
+            code = 3
         
         # Medium Cringe: Content fatigue despite traffic
         elif fatigue > 0.6 and risk_score > 60:
-            is_cringe = True
-            severity = "medium"
-            explanation = "Content saturation detected. Audience perceives this trend as 'overdone' or 'cringe'."
+            code = 2
         
         # Low Cringe: Subtle reputation erosion
         elif sentiment < -0.3 and risk_score > 50:
-            is_cringe = True
-            severity = "low"
-            explanation = "Negative sentiment building. Early signs of audience backlash."
+            code = 1
+        
+        is_cringe, severity, explanation = CRINGE_TABLE[code]
         
         return {
             "is_cringe_point": is_cringe,
@@ -79,7 +184,9 @@ class USPEngine:
         self, 
         risk_score: float, 
         decline_window_days: int,
-        daily_budget: float = None
+        daily_budget: float = None,
+        uncertainty: bool = False,
+        risk_sd: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         💰 USP #2: Explainable ROI Engine
@@ -95,6 +202,8 @@ class USPEngine:
             risk_score: 0-100 decline risk
             decline_window_days: Days until predicted collapse
             daily_budget: Optional custom budget (₹/day)
+            uncertainty: Also return Monte Carlo savings percentiles ("savings_distribution")
+            risk_sd: Model uncertainty of risk_score in points (risk_uncertainty); widens the bands
         
         Returns:
             {
@@ -121,24 +230,78 @@ class USPEngine:
         
         # Determine calculation basis
         if risk_score >= 85:
-            basis = f"Critical risk detected. Continuing {days_at_risk} more days would waste {waste_probability:.0%} of spend."
+            basis_code = 3
         elif risk_score >= 70:
-            basis = f"High decline probability. {days_at_risk}-day exposure carries {waste_probability:.0%} waste risk."
+            basis_code = 2
         elif risk_score >= 40:
-            basis = f"Medium risk. Partial budget optimization recommended over {days_at_risk} days."
+            basis_code = 1
         else:
-            basis = "Low risk. Campaign ROI is protected."
+            basis_code = 0
+        basis = ROI_BASIS_TEMPLATES[basis_code].format(days=days_at_risk, waste=waste_probability)
         
         # Confidence based on data quality (simplified for demo)
         confidence = 0.92 if risk_score > 60 else 0.85
         
-        return {
+        result = {
             "estimated_savings": round(estimated_savings, 2),
             "calculation_basis": basis,
             "confidence": confidence,
             "daily_budget_assumed": round(daily_budget, 2),
             "days_at_risk": days_at_risk
         }
+        
+        if uncertainty:
+            result["savings_distribution"] = self.simulate_roi_uncertainty(
+                risk_score, days_at_risk, daily_budget, risk_sd=risk_sd
+            )
+        
+        return result
+    
+    def simulate_roi_uncertainty(
+        self,
+        risk_score: float,
+        decline_window_days: int,
+        daily_budget: float = None,
+        n_draws: int = None,
+        risk_sd: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Monte Carlo savings percentiles (p5..p95, mean, std) as a fresh dict.
+        Samples risk (Beta with the model's risk_sd), decline days and CPM; inputs are
+        quantized (risk and risk_sd to 0.5 pts, budget to ₹10) so nearby requests share
+        one cached simulation.
+        """
+        if not daily_budget:
+            daily_budget = (self.default_cpm / 1000) * self.default_daily_impressions
+        risk_sd = max(float(risk_sd or 0.0), self.mc_min_risk_sd)
+        
+        return dict(_simulate_savings_distribution(
+            round(risk_score * 2) / 2,
+            round(risk_sd * 2) / 2,
+            float(max(1, int(decline_window_days))),
+            float(round(daily_budget, -1)),
+            int(n_draws or self.mc_draws),
+            self.mc_days_sigma,
+            self.mc_cpm_sigma
+        ))
+
+    @staticmethod
+    def risk_uncertainty(components: Dict[str, float],
+                         weights: Optional[Dict[str, float]] = None) -> Optional[float]:
+        """
+        Std (score points) of the ensemble's component scores: how much the scorers disagree.
+        Weighted by the ensemble weights around the weighted mean, with the small-sample
+        correction for reliability weights (sum w - sum w^2 / sum w), so two scorers are not
+        read as a population. None with fewer than two weighted scorers.
+        """
+        names = [name for name in components if (weights or {}).get(name, 1.0) > 0]
+        if len(names) < 2:
+            return None
+        scores = np.array([components[name] for name in names], dtype=np.float64)
+        w = np.array([(weights or {}).get(name, 1.0) for name in names], dtype=np.float64)
+        mean = float(w @ scores / w.sum())
+        var = float(w @ (scores - mean) ** 2) / (w.sum() - (w @ w) / w.sum())
+        return round(var ** 0.5, 2)
     
     def classify_lifecycle(self, risk_score: float, signals: Dict[str, float]) -> Dict[str, Any]:
         """
@@ -165,33 +328,25 @@ class USPEngine:
         # Lifecycle Logic
         if risk_score >= 85:
             # Zombie: High visibility but hollow engagement
-            stage = "Zombie"
-            description = "Trend is visible but carries no strategic value. Engagement is artificial or low-quality."
-            advice = "Immediate exit. This trend damages more than it benefits."
+            code = 4
         
         elif risk_score >= 70:
             # Decay: Active falling
-            stage = "Decay"
-            description = "Trend is actively declining. Audience interest is waning."
-            advice = "Prepare exit within 3-5 days. Salvage remaining value."
+            code = 3
         
         elif risk_score >= 40:
             # Peak: Saturation point
-            stage = "Peak"
-            description = "Trend has reached maximum saturation. Further growth unlikely."
-            advice = "Harvest current value but avoid additional investment."
+            code = 2
         
         elif engagement > 0.3 and sentiment > 0.2:
             # Growth: Healthy acceleration
-            stage = "Growth"
-            description = "Trend is accelerating with positive momentum."
-            advice = "Scale investment strategically. High ROI window."
+            code = 1
         
         else:
             # Birth: New/emerging
-            stage = "Birth"
-            description = "Trend is emerging. Early indicators are forming."
-            advice = "Monitor closely. Test small campaigns before committing."
+            code = 0
+        
+        stage, description, advice = LIFECYCLE_TABLE[code]
         
         return {
             "stage": stage,
@@ -199,6 +354,230 @@ class USPEngine:
             "strategic_advice": advice
         }
     
+    # --- Bulk (portfolio) counterparts: arrays in, integer codes out ---
+    
+    def detect_cringe_points_bulk(
+        self,
+        engagement: np.ndarray,
+        sentiment: np.ndarray,
+        fatigue: np.ndarray,
+        risk_score: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized detect_cringe_point. Returns severity codes (see CRINGE_TABLE)
+        and the is_cringe_point mask; use cringe_text() for the wording.
+        """
+        engagement = np.asarray(engagement, dtype=np.float64)
+        sentiment = np.asarray(sentiment, dtype=np.float64)
+        fatigue = np.asarray(fatigue, dtype=np.float64)
+        risk_score = np.asarray(risk_score, dtype=np.float64)
+        
+        codes = np.select(
+            [
+                (engagement > 0.3) & (sentiment < -0.4),
+                (fatigue > 0.6) & (risk_score > 60),
+                (sentiment < -0.3) & (risk_score > 50),
+            ],
+            [3, 2, 1],
+            default=0
+        ).astype(np.int8)
+        
+        return {"severity_code": codes, "is_cringe_point": codes > 0}
+    
+    def classify_lifecycle_bulk(
+        self,
+        risk_score: np.ndarray,
+        engagement: np.ndarray,
+        sentiment: np.ndarray
+    ) -> np.ndarray:
+        """Vectorized classify_lifecycle. Returns stage codes (see LIFECYCLE_TABLE)."""
+        risk_score = np.asarray(risk_score, dtype=np.float64)
+        engagement = np.asarray(engagement, dtype=np.float64)
+        sentiment = np.asarray(sentiment, dtype=np.float64)
+        
+        return np.select(
+            [
+                risk_score >= 85,
+                risk_score >= 70,
+                risk_score >= 40,
+                (engagement > 0.3) & (sentiment > 0.2),
+            ],
+            [4, 3, 2, 1],
+            default=0
+        ).astype(np.int8)
+    
+    def calculate_roi_bulk(
+        self,
+        risk_score: np.ndarray,
+        decline_window_days: np.ndarray,
+        daily_budget: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_roi. Budgets that are missing or <= 0 use the default CPM budget.
+        Returns arrays; basis text is built on demand with roi_basis_text().
+        """
+        risk_score = np.asarray(risk_score, dtype=np.float64)
+        days = np.asarray(decline_window_days)
+        default_budget = (self.default_cpm / 1000) * self.default_daily_impressions
+        
+        if daily_budget is None:
+            budget = np.full(risk_score.shape, default_budget)
+        else:
+            budget = np.asarray(daily_budget, dtype=np.float64)
+            budget = np.where(budget > 0, budget, default_budget)
+        
+        days_at_risk = np.where(days > 0, days, 1).astype(np.int64)
+        waste_probability = risk_score / 100.0
+        estimated_savings = budget * days_at_risk * waste_probability
+        
+        basis_code = np.select(
+            [risk_score >= 85, risk_score >= 70, risk_score >= 40],
+            [3, 2, 1],
+            default=0
+        ).astype(np.int8)
+        
+        return {
+            "estimated_savings": np.round(estimated_savings, 2),
+            "basis_code": basis_code,
+            "confidence": np.where(risk_score > 60, 0.92, 0.85),
+            "daily_budget_assumed": np.round(budget, 2),
+            "days_at_risk": days_at_risk
+        }
+    
+    def portfolio_roi_rollup(
+        self,
+        risk_score: np.ndarray,
+        engagement: np.ndarray,
+        sentiment: np.ndarray,
+        fatigue: np.ndarray,
+        decline_window_days: np.ndarray,
+        daily_budget: Optional[np.ndarray] = None
+    ) -> Dict[str, Any]:
+        """
+        Portfolio-wide rollup across many campaigns in one vectorized pass:
+        total savings, savings and counts per lifecycle stage, cringe counts per severity.
+        """
+        roi = self.calculate_roi_bulk(risk_score, decline_window_days, daily_budget)
+        cringe = self.detect_cringe_points_bulk(engagement, sentiment, fatigue, risk_score)
+        stages = self.classify_lifecycle_bulk(risk_score, engagement, sentiment)
+        
+        savings = roi["estimated_savings"]
+        stage_counts = np.bincount(stages, minlength=len(LIFECYCLE_TABLE))
+        stage_savings = np.bincount(stages, weights=savings, minlength=len(LIFECYCLE_TABLE))
+        severity_counts = np.bincount(cringe["severity_code"], minlength=len(CRINGE_TABLE))
+        stop_mask = (np.asarray(risk_score) >= 85) | cringe["is_cringe_point"]
+        
+        return {
+            "campaigns": int(savings.size),
+            "total_estimated_savings": round(float(savings.sum()), 2),
+            "stop_immediately": int(stop_mask.sum()),
+            "savings_if_stopped": round(float(savings[stop_mask].sum()), 2),
+            "by_lifecycle_stage": {
+                LIFECYCLE_TABLE[code][0]: {
+                    "campaigns": int(stage_counts[code]),
+                    "estimated_savings": round(float(stage_savings[code]), 2)
+                }
+                for code in range(len(LIFECYCLE_TABLE))
+            },
+            "cringe_points_by_severity": {
+                CRINGE_TABLE[code][1]: int(severity_counts[code])
+                for code in range(1, len(CRINGE_TABLE))
+            }
+        }
+    
+    def optimize_portfolio(
+        self,
+        daily_budget: np.ndarray,
+        risk_score: np.ndarray,
+        decline_window_days: np.ndarray,
+        total_budget: Optional[float] = None,
+        min_budget: Optional[np.ndarray] = None,
+        max_budget: Optional[np.ndarray] = None,
+        horizon_days: int = 30
+    ) -> Dict[str, Any]:
+        """
+        💼 Portfolio spend reallocation under a total daily budget.
+        
+        A unit of daily spend on a campaign is wasted with probability risk/100 for
+        every day of the horizon after its predicted decline, so its expected waste rate is
+            waste_rate = (risk / 100) × max(0, horizon - decline_days) / horizon
+        Minimizing Σ spend × waste_rate under Σ spend = total_budget and per-campaign
+        [min, max] bounds is a fractional knapsack: filling campaigns in ascending
+        waste_rate order is LP-optimal, and runs in O(n log n).
+        
+        Defaults: total_budget = current total spend, min = 0, max = 2 × current budget.
+        
+        Returns:
+            Arrays (allocation, waste_rate) plus expected waste before/after and the saved value.
+        """
+        budget = np.asarray(daily_budget, dtype=np.float64)
+        risk_score = np.asarray(risk_score, dtype=np.float64)
+        days = np.maximum(np.asarray(decline_window_days, dtype=np.float64), 1)
+        
+        lower = np.zeros_like(budget) if min_budget is None else np.asarray(min_budget, dtype=np.float64)
+        upper = budget * 2 if max_budget is None else np.asarray(max_budget, dtype=np.float64)
+        upper = np.maximum(upper, lower)
+        total = float(budget.sum()) if total_budget is None else float(total_budget)
+        
+        # Out-of-range inputs flip the waste ordering (e.g. horizon 0 -> NaN, negative -> reversed plan)
+        if horizon_days < 1:
+            raise ValueError(f"horizon_days must be at least 1 (got {horizon_days}).")
+        if np.any((risk_score < 0) | (risk_score > 100)):
+            raise ValueError("Risk scores must be between 0 and 100.")
+        if np.any(budget < 0) or np.any(lower < 0) or total < 0:
+            raise ValueError("Budgets must not be negative.")
+        
+        if lower.sum() > total:
+            raise ValueError(
+                f"Minimum budgets (₹{lower.sum():,.0f}) exceed the total budget (₹{total:,.0f})."
+            )
+        
+        waste_rate = (risk_score / 100.0) * np.clip(horizon_days - days, 0, None) / horizon_days
+        
+        # Everyone gets their floor, then fill the cheapest-waste capacity first
+        order = np.argsort(waste_rate, kind="stable")
+        capacity = (upper - lower)[order]
+        filled_before = np.concatenate(([0.0], np.cumsum(capacity)[:-1]))
+        extra = np.clip(total - lower.sum() - filled_before, 0, capacity)
+        
+        allocation = lower.copy()
+        allocation[order] += extra
+        
+        horizon_waste_before = float((budget * waste_rate).sum() * horizon_days)
+        horizon_waste_after = float((allocation * waste_rate).sum() * horizon_days)
+        
+        return {
+            "allocation": np.round(allocation, 2),
+            "waste_rate": waste_rate,
+            "total_budget": round(total, 2),
+            "unallocated_budget": round(max(0.0, total - float(allocation.sum())), 2),
+            "expected_waste_before": round(horizon_waste_before, 2),
+            "expected_waste_after": round(horizon_waste_after, 2),
+            "expected_saved_value": round(horizon_waste_before - horizon_waste_after, 2),
+            "horizon_days": horizon_days
+        }
+    
+    @staticmethod
+    def cringe_text(code: int) -> Dict[str, Any]:
+        """Scalar-shaped cringe result for one severity code."""
+        is_cringe, severity, explanation = CRINGE_TABLE[int(code)]
+        return {"is_cringe_point": is_cringe, "explanation": explanation, "severity": severity}
+    
+    @staticmethod
+    def lifecycle_text(code: int) -> Dict[str, Any]:
+        """Scalar-shaped lifecycle result for one stage code."""
+        stage, description, advice = LIFECYCLE_TABLE[int(code)]
+        return {"stage": stage, "description": description, "strategic_advice": advice}
+    
+    @staticmethod
+    def lifecycle_labels(codes: np.ndarray) -> np.ndarray:
+        """Stage names for an array of stage codes."""
+        return np.array([row[0] for row in LIFECYCLE_TABLE])[codes]
+    
+    @staticmethod
+    def roi_basis_text(basis_code: int, days_at_risk: int, risk_score: float) -> str:
+        return ROI_BASIS_TEMPLATES[int(basis_code)].format(days=int(days_at_risk), waste=risk_score / 100.0)
+    
     def format_decision_justification(
         self,
         risk_score: float,
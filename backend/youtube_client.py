@@ -1,23 +1,75 @@
+import contextvars
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from urllib.parse import urlparse, parse_qs
+from tenants import tenant_registry
+from shared_cache import shared_cache
 
 load_dotenv()
 
+# videos.list accepts up to 50 comma-separated IDs per call
+VIDEOS_PER_BATCH = 50
+
 class YouTubeClient:
-    def __init__(self):
+    def __init__(self, search_ttl: float = 900.0, search_cache_size: int = 1024, max_workers: int = 8):
         self.api_key = os.getenv("YOUTUBE_API_KEY")
+        self._youtube = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        # The service object is shared, but httplib2 connections are not thread-safe:
+        # every thread executes requests over its own Http instance
+        self._local = threading.local()
+        # Keyword -> video IDs, one search per keyword per TTL window (single-flight)
+        self.search_ttl = search_ttl
+        self._search_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._search_cache_size = search_cache_size
+        self._search_inflight = {}
+        self._search_lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor = None
         if not self.api_key:
             print("⚠️ WARNING: YOUTUBE_API_KEY not found in .env")
-            self.youtube = None
-        else:
-            try:
-                self.youtube = build("youtube", "v3", developerKey=self.api_key)
-            except Exception as e:
-                print(f"⚠️ Failed to initialize YouTube API: {e}")
-                self.youtube = None
+            self._initialized = True
+
+    @property
+    def youtube(self):
+        """API service, built on first use (googleapiclient's discovery import is slow)."""
+        if not self._initialized:
+            # Double-checked: concurrent first requests build the service once
+            with self._init_lock:
+                if not self._initialized:
+                    try:
+                        from googleapiclient.discovery import build
+                        self._youtube = build("youtube", "v3", developerKey=self.api_key)
+                    except Exception as e:
+                        print(f"⚠️ Failed to initialize YouTube API: {e}")
+                        self._youtube = None
+                    self._initialized = True
+        return self._youtube
+
+    @youtube.setter
+    def youtube(self, value):
+        self._youtube = value
+        self._initialized = True
+
+    def _execute(self, request):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            from googleapiclient.http import build_http
+            http = self._local.http = build_http()
+        # Quota is charged to the tenant whose request triggered the call
+        tenant_registry.record_api_call("youtube", getattr(request, "methodId", None))
+        return request.execute(http=http)
+
+    def ping(self):
+        """Cheapest authenticated call (i18nLanguages.list, 1 quota unit): raises if the key or API is unusable."""
+        if not self.youtube:
+            raise RuntimeError("YOUTUBE_API_KEY not configured" if not self.api_key else "client unavailable")
+        self._execute(self.youtube.i18nLanguages().list(part="snippet", hl="en"))
 
     def extract_video_id(self, url):
         """Extracts video ID from various YouTube URL formats."""
@@ -37,28 +89,53 @@ class YouTubeClient:
     def get_video_stats(self, video_id):
         """Fetches viewCount, likeCount, commentCount."""
         if not self.youtube: return None
+        from googleapiclient.errors import HttpError
         try:
             request = self.youtube.videos().list(
                 part="snippet,statistics",
                 id=video_id
             )
-            response = request.execute()
+            response = self._execute(request)
             if not response['items']: return None
             
-            stats = response['items'][0]['statistics']
-            snippet = response['items'][0]['snippet']
-            
-            return {
-                "title": snippet.get("title", "Unknown"),
-                "viewCount": int(stats.get("viewCount", 0)),
-                "likeCount": int(stats.get("likeCount", 0)),
-                "commentCount": int(stats.get("commentCount", 0)),
-                "publishedAt": snippet.get("publishedAt", "")
-            }
+            return self._parse_video(response['items'][0])
         except HttpError as e:
             print(f"YouTube API Error: {e}")
             return None
 
+    def get_videos_stats(self, video_ids):
+        """Batched get_video_stats: one videos.list call per 50 IDs. Returns {video_id: stats}."""
+        if not self.youtube or not video_ids: return {}
+        from googleapiclient.errors import HttpError
+        results = {}
+        for start in range(0, len(video_ids), VIDEOS_PER_BATCH):
+            batch = video_ids[start:start + VIDEOS_PER_BATCH]
+            try:
+                request = self.youtube.videos().list(
+                    part="snippet,statistics",
+                    id=",".join(batch),
+                    maxResults=len(batch)
+                )
+                response = self._execute(request)
+                for item in response.get("items", []):
+                    results[item["id"]] = self._parse_video(item)
+            except HttpError as e:
+                print(f"YouTube API Error: {e}")
+        return results
+
+    @staticmethod
+    def _parse_video(item):
+        stats = item['statistics']
+        snippet = item['snippet']
+        
+        return {
+            "title": snippet.get("title", "Unknown"),
+            "viewCount": int(stats.get("viewCount", 0)),
+            "likeCount": int(stats.get("likeCount", 0)),
+            "commentCount": int(stats.get("commentCount", 0)),
+            "publishedAt": snippet.get("publishedAt", "")
+        }
+
     def get_comments(self, video_id, max_results=50):
         """Fetches top comments for sentiment analysis."""
         if not self.youtube: return []
@@ -69,7 +146,7 @@ class YouTubeClient:
                 maxResults=max_results,
                 textFormat="plainText"
             )
-            response = request.execute()
+            response = self._execute(request)
             
             comments = []
             for item in response.get("items", []):
@@ -90,8 +167,97 @@ class YouTubeClient:
                 maxResults=1,
                 order="relevance"
             )
-            response = request.execute()
+            response = self._execute(request)
             return response.get("items", [])
         except Exception as e:
             print(f"Search Error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def search_video_ids(self, query, max_results=5):
+        """
+        Top video IDs for a keyword (relevance order). Cached per keyword for
+        search_ttl seconds; concurrent misses for one keyword share a single search,
+        across workers too when the shared cache tier is enabled (search.list costs
+        100 quota units). Returns None on API errors.
+        """
+        if not self.youtube: return None
+        key = (query.strip().lower(), max_results)
+        with self._search_lock:
+            entry = self._search_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._search_cache.move_to_end(key)
+                return list(entry[1])
+            pending = self._search_inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._search_inflight[key] = threading.Event()
+
+        if not leader:
+            pending.wait(timeout=30)
+            with self._search_lock:
+                entry = self._search_cache.get(key)
+            return list(entry[1]) if entry is not None else None
+
+        video_ids = None
+        try:
+            video_ids = shared_cache.get_or_compute(
+                "youtube_search", f"{key[1]}:{key[0]}", lambda: self._search(query, max_results), ttl=self.search_ttl
+            )
+        finally:
+            with self._search_lock:
+                if video_ids is not None:
+                    self._search_cache[key] = (time.monotonic() + self.search_ttl, tuple(video_ids))
+                    self._search_cache.move_to_end(key)
+                    while len(self._search_cache) > self._search_cache_size:
+                        self._search_cache.popitem(last=False)
+                self._search_inflight.pop(key, None)
+            pending.set()
+        return video_ids
+
+    def _search(self, query, max_results):
+        try:
+            request = self.youtube.search().list(
+                part="id",
+                q=query,
+                type="video",
+                maxResults=max_results,
+                order="relevance"
+            )
+            response = self._execute(request)
+            return [item["id"]["videoId"] for item in response.get("items", []) if item.get("id", {}).get("videoId")]
+        except Exception as e:
+            print(f"Search Error: {e}")
+            return None
+
+    def fetch_videos(self, video_ids, max_comments=50):
+        """
+        Stats (one batched videos.list) plus comments (fetched concurrently) for each video.
+        Returns [(stats, comments), ...] in input order, skipping unavailable videos.
+        """
+        fetched = self.fetch_videos_by_id(video_ids, max_comments)
+        return [fetched[vid] for vid in video_ids if vid in fetched]
+
+    def fetch_videos_by_id(self, video_ids, max_comments=50):
+        """fetch_videos keyed by video ID: {video_id: (stats, comments)}."""
+        stats = self.get_videos_stats(video_ids)
+        available = [vid for vid in video_ids if vid in stats]
+        if not available: return {}
+        if len(available) == 1:
+            comments = [self.get_comments(available[0], max_comments)]
+        else:
+            # Each task runs in a copy of the caller's context (tenant metering)
+            executor = self._get_executor()
+            comments = [
+                future.result() for future in [
+                    executor.submit(contextvars.copy_context().run, self.get_comments, vid, max_comments)
+                    for vid in available
+                ]
+            ]
+        return {vid: (stats[vid], video_comments) for vid, video_comments in zip(available, comments)}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._search_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="youtube")
+        return self._executor
\ No newline at end of file